@@ -0,0 +1,95 @@
+import asyncio
+from typing import Callable
+
+import drone
+from config import *
+from perception import Perception
+from utils import check_queue
+
+
+class ActionExecutor:
+    """
+    动作执行器: 动作以独立任务运行, 期间感知任务并行推送检测结果, 新动作到达时抢占当前动作
+    """
+    def __init__(self, drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception,
+                 match_action: Callable[[str], Callable], next_timeout: float | None=ACTION_NEXT_TIMEOUT):
+        """
+        Args:
+            match_action:根据动作名返回动作函数
+            next_timeout:等待决策链下一步动作的最长时间(s), 超时后恢复导航, None表示一直等待
+        """
+        self.drone = drone
+        self.feedback_queue = feedback_queue
+        self.perception = perception
+        self.match_action = match_action
+        self.next_timeout = next_timeout
+        self.current = None # 正在执行的动作名
+        self.preempted = 0 # 被抢占的动作数量
+        self._pending = None # 与动作完成同时到达的新动作
+
+    async def poll(self, action_queue: asyncio.Queue, timeout: float=0.5) -> bool:
+        """
+        在限定时间内等待新动作, 有动作时依次执行直至某一动作返回True
+
+        Returns:
+            bool:是否跳过下一导航点
+        """
+        action, self._pending = self._pending, None
+        if action is None:
+            action = await check_queue(action_queue, timeout)
+        if action is None:
+            return False
+
+        try:
+            while True:
+                action_func = self.match_action(action)
+                if action_func is None:
+                    print(f"未知动作: {action}")
+                    action = await self._next(action_queue)
+                    if action is None:
+                        return False
+                    continue
+
+                self.current = action
+                action_task = asyncio.create_task(action_func(self.drone, self.feedback_queue, self.perception))
+                next_task = asyncio.create_task(action_queue.get())
+                done, _ = await asyncio.wait({action_task, next_task}, return_when=asyncio.FIRST_COMPLETED)
+
+                if action_task not in done:
+                    # 新动作抢占当前动作
+                    action_task.cancel()
+                    await asyncio.gather(action_task, return_exceptions=True)
+                    self.preempted += 1
+                    print(f"动作{action}被新动作{next_task.result()}抢占")
+                    action = next_task.result()
+                    continue
+
+                # 动作完成时可能恰好取到新动作, 留待之后执行
+                next_task.cancel()
+                await asyncio.gather(next_task, return_exceptions=True)
+                if not next_task.cancelled():
+                    self._pending = next_task.result()
+
+                if action_task.result():
+                    return True
+                if self._pending is not None:
+                    action, self._pending = self._pending, None
+                else:
+                    action = await self._next(action_queue)
+                    if action is None:
+                        return False
+        finally:
+            self.current = None
+            await self.perception.stop()
+
+    async def _next(self, action_queue: asyncio.Queue) -> str | None:
+        """
+        等待决策链的下一步动作, 超时(如agent决策超时而中断决策链)时返回None
+        """
+        if self.next_timeout is None:
+            return await action_queue.get()
+        action = await check_queue(action_queue, self.next_timeout)
+        if action is None:
+            print(f"{self.next_timeout:.0f}s内未收到下一步动作, 恢复导航")
+
+        return action
@@ -1,14 +1,94 @@
-import time, math
+import time, math, re, json
 import numpy as np
 import asyncio
-from ultralytics import YOLO
+from dataclasses import dataclass
+from typing import Callable
 
 import drone
-from utils import cal_pos
-from nodes.agent_node import yolo_fliter
+from config import CAMERA_FOV, SEEK_RADIUS, SEEK_VIEW_DISTANCE, SEEK_OVERLAP, SEEK_PATTERN
+from perception import Perception
+from planner import coverage_path
+from tracker import Tracker
 
 
-async def seek(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@dataclass
+class Action:
+    """
+    动作注册信息
+    """
+    name: str # 动作名(动作队列中传递)
+    description: str # 提示词中的操作描述
+    handler: Callable # 动作函数
+    resume: bool=False # 执行后是否结束本次决策并继续导航
+
+
+ACTIONS = {} # 动作名 -> Action(按注册顺序)
+_action_pattern = None
+
+def action(name: str, description: str, resume: bool=False):
+    """
+    注册动作的装饰器
+    """
+    def decorator(func):
+        global _action_pattern
+        ACTIONS[name] = Action(name, description, func, resume)
+        _action_pattern = None
+        return func
+
+    return decorator
+
+def action_prompt() -> str:
+    """
+    由注册表生成可执行操作列表及JSON回答格式提示
+    """
+    descriptions = ",".join(f"'{item.description}'" for item in ACTIONS.values())
+    example = json.dumps({"action": next(iter(ACTIONS.values())).description}, ensure_ascii=False)
+
+    return f"(可执行操作包含:{descriptions})请以JSON格式回答, 例如{example}。"
+
+def parse_action(answer: str) -> str | None:
+    """
+    从模型回答中解析动作名, 支持JSON({"action": ...})与纯文本回答
+
+    JSON的action字段可为动作名或描述; 纯文本只匹配注册的操作描述, 避免自由文本中的英文单词被误认为动作名。
+    Returns:
+        动作名, 未识别到时返回None
+    """
+    global _action_pattern
+    if _action_pattern is None:
+        # 描述与动作名按长度降序排列, 避免较短的词先匹配
+        descriptions = {item.description: item.name for item in ACTIONS.values()}
+        keys = {**descriptions, **{item.name: item.name for item in ACTIONS.values()}}
+        _action_pattern = (re.compile("|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True))),
+                           re.compile("|".join(re.escape(key) for key in sorted(descriptions, key=len, reverse=True))),
+                           keys)
+    pattern, text_pattern, keys = _action_pattern
+
+    match = re.search(r"\{.*?\}", answer, re.S)
+    if match:
+        try:
+            value = json.loads(match.group())
+        except ValueError:
+            value = None
+        if isinstance(value, dict) and isinstance(value.get("action"), str):
+            found = pattern.search(value["action"])
+            if found:
+                return keys[found.group()]
+    found = text_pattern.search(answer)
+
+    return keys[found.group()] if found else None
+
+
+async def fly_to(drone: drone.Drone, target_pos: list, tolerance: float=1.0):
+    """
+    连续避障移动至指定坐标附近并悬停
+    """
+    while np.linalg.norm(np.array(target_pos) - np.array(await drone.get_pos_async())) >= tolerance:
+        await drone.move_to_pos_oa(target_pos, blend=True)
+    drone.hover()
+
+@action("seek", "在被困人员物品周围搜寻被困人员")
+async def seek(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     在附近搜寻被困人员
 
@@ -17,27 +97,37 @@ async def seek(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
     """
     
     print("在附近搜寻被困人员")
-    drone_pos = drone.get_pos()
-    waypoints = [
-        [drone_pos[0] + 15, drone_pos[1] - 15, -1],
-        [drone_pos[0] - 15, drone_pos[1] - 15, -1],
-        [drone_pos[0] - 15, drone_pos[1] + 15, -1],
-        [drone_pos[0] + 15, drone_pos[1] + 15, -1],
-        [drone_pos[0], drone_pos[1] + 15, -1]
-    ]
+    drone_pos = await drone.get_pos_async()
+    # 按相机视野生成覆盖路线, 只在拍摄点悬停识别
+    waypoints = coverage_path(drone_pos[:2], SEEK_RADIUS, CAMERA_FOV, SEEK_VIEW_DISTANCE, SEEK_OVERLAP, SEEK_PATTERN)
+    start = time.time()
+    latencies = []
+    found = False
+
     for target_pos in waypoints:
-        while np.linalg.norm(np.array(target_pos) - np.array(drone.get_pos())) >= 1:
-            await drone.move_to_pos_oa(target_pos)
-            _, detected_classes = yolo_fliter(drone.take_photos())
-            if "person" in detected_classes:
-                feedback_queue.put_nowait("已在视野内发现被困人员，请选择下一个需要执行的操作")
-                return False
+        await fly_to(drone, target_pos)
+        detections = await perception.capture(time.time())
+        latencies.append(time.time() - detections.timestamp)
+        if "person" in detections.classes:
+            found = True
+            break
+
+    elapsed = max(time.time() - start, 1e-6)
+    area = (2 * SEEK_RADIUS) ** 2 * len(latencies) / len(waypoints)
+    print(f"覆盖搜寻: 拍摄点 {len(latencies)}/{len(waypoints)}, 面积 {area:.0f}m², 用时 {elapsed:.1f}s, "
+          f"{area / elapsed * 60:.0f}m²/min, 平均识别延迟 {np.mean(latencies) * 1000:.0f}ms"
+          + (f", 发现人员用时 {elapsed:.1f}s" if found else ""))
+
+    if found:
+        feedback_queue.put_nowait("已在视野内发现被困人员，请选择下一个需要执行的操作")
+        return False
 
     feedback_queue.put_nowait("未发现附近有被困人员，请选择下一个需要执行的操作")
     
     return False
 
-async def moveto(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@action("moveto", "移动至被困人员处")
+async def moveto(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     移动至被困人员处
 
@@ -45,68 +135,74 @@ async def moveto(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
         bool:是否跳过下一导航点
     """
     print("移动至被困人员处")
-    model = YOLO("models/yolo11x.pt")  # 使用 YOLOv11 Extra-Large 模型
     MIN_HEIGHT = 400
-    direction = drone.get_facing()
-    drone_pos = drone.get_pos()
-    pos = cal_pos(drone.get_pos(), direction, 1.0)
-    count = 0
-    cal_singal = True
-
-    _, detected_classes = yolo_fliter(drone.take_photos())
-    if 'person' not in detected_classes:
+    LOST_TIMEOUT = 3.0 # 持续未检测到人员的最长时间(s)
+
+    stream = perception.subscribe(time.time())
+    detections = await stream.get()
+    if 'person' not in detections.classes:
         feedback_queue.put_nowait("未在视野内发现被困人员，请确认并再次选择需要执行的操作")
         return False
 
-    while True:
-        image = drone.take_photos()
-        results = model(image, verbose=False)
-        count += 1
-        for result in results:
-            boxes = result.boxes.cpu().numpy()
-            for box in boxes:
-                class_id = int(box.cls[0])
-                class_name = result.names[class_id]
-                if class_name != 'person': continue
-
-                count = 0
-                x1, y1, x2, y2 = box.xyxy[0]           
-                bbox_height = y2 - y1
-
-                if cal_singal:
-                    cal_singal = False
-                    scale = 1.8 / bbox_height
-                    horizontal_offset = int((x1 + x2 - 1920) / 2)
-                    relative_yaw = horizontal_offset / 1920 * 90 * 1.25
-                    direction = drone.get_facing() + relative_yaw
-                    distance = abs(horizontal_offset * scale / math.sin(math.radians(relative_yaw)))
-
-                    pos = cal_pos(drone.get_pos(), direction, distance)
-
-                if bbox_height > MIN_HEIGHT:
-                    feedback_queue.put_nowait("已成功移动至被困人员处，请选择下一个需要执行的操作")
-                    return False              
-        
-        await drone.move_to_pos_oa(pos)
-        if count == 3:
-            feedback_queue.put_nowait("未发现被困人员，请确认并选择需要执行的操作")
-            break
+    # 由跟踪轨迹给出平滑后的目标位置, 检测结果到达前沿用上次估计继续移动
+    tracker = Tracker(min_hits=1)
+    target = None
+    last_seen = time.time()
+    detect_task = move_task = None
+    try:
+        while True:
+            if detections is not None:
+                pose = (await drone.get_pos_async(), await drone.get_facing_async())
+                tracks = tracker.update(detections, pose)
+                target = tracker.get(target.id) if target is not None else None
+                if target is None and tracks:
+                    target = max(tracks, key=lambda track: track.height)
+                if target is not None and target.misses == 0:
+                    last_seen = time.time()
+                    if target.height > MIN_HEIGHT:
+                        feedback_queue.put_nowait("已成功移动至被困人员处，请选择下一个需要执行的操作")
+                        return False
+                detections = None
+
+            if target is None or time.time() - last_seen > LOST_TIMEOUT:
+                feedback_queue.put_nowait("未发现被困人员，请确认并选择需要执行的操作")
+                return False
+            # 移动与识别并行, 新的检测结果持续到达
+            if (move_task is None or move_task.done()) and target.world_pos is not None:
+                move_task = asyncio.create_task(drone.move_to_pos_oa([*target.world_pos, -1], blend=True))
+
+            detect_task = detect_task or asyncio.create_task(stream.get())
+            waits = {detect_task} if move_task is None or move_task.done() else {detect_task, move_task}
+            done, _ = await asyncio.wait(waits, timeout=LOST_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+            if detect_task in done:
+                detections = detect_task.result()
+                detect_task = None
+    finally:
+        for task in (move_task, detect_task):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        drone.hover()
+        stats = tracker.stats()
+        print(f"目标跟踪 {stats['frames']}帧, 平均耗时{stats['mean_ms']:.2f}ms")
 
     return False
 
-async def broadcast(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@action("broadcast", "通知总部找到被困人员")
+async def broadcast(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     通知总部找到被困人员
 
     Returns:
         bool:是否跳过下一导航点
     """
-    print(f"无人机于{str(drone.get_pos())}找到被困人员")
+    print(f"无人机于{str(await drone.get_pos_async())}找到被困人员")
     feedback_queue.put_nowait("已成功通知总部，请选择下一个需要执行的操作")
 
     return False
 
-async def drop(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@action("drop", "向被困人员发放紧急救援物资")
+async def drop(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     向被困人员发放紧急救援物资
 
@@ -118,7 +214,8 @@ async def drop(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
 
     return False
 
-async def console(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@action("console", "安抚被困人员")
+async def console(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     安抚被困人员
 
@@ -130,7 +227,8 @@ async def console(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
 
     return False
 
-async def seek_next(drone: drone.Drone, feedback_queue: asyncio.Queue) -> bool:
+@action("seek_next", "继续寻找其他被困人员", resume=True)
+async def seek_next(drone: drone.Drone, feedback_queue: asyncio.Queue, perception: Perception) -> bool:
     """
     继续寻找其他被困人员
 
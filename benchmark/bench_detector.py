@@ -0,0 +1,19 @@
+"""
+各规模YOLO模型启动耗时与内存占用: python -m benchmark.bench_detector [n s m x]
+"""
+import sys
+
+from detector import Detector
+
+
+def main():
+    variants = sys.argv[1:] or ["n", "s", "m", "x"]
+    for variant in variants:
+        detector = Detector(variant)
+        detector.load()
+        stats = detector.stats()
+        print(f"yolo11{variant} | load {stats['load_time']:.2f} s | warmup {stats['warmup_time']:.2f} s | "
+              f"rss +{stats['memory_mb']:.0f} MB")
+
+if __name__ == "__main__":
+    main()
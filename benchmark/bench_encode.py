@@ -0,0 +1,43 @@
+"""
+大模型上传图像编码耗时与数据量对比: python -m benchmark.bench_encode
+"""
+import numpy as np
+from PIL import Image
+
+from benchmark.common import measure
+from llm import encode_image
+
+
+SETTINGS = [
+    ("PNG", 100, None, False),
+    ("PNG", 100, None, True),
+    ("JPEG", 85, None, False),
+    ("JPEG", 85, None, True),
+    ("JPEG", 85, 1280, False),
+    ("JPEG", 85, 1280, True),
+    ("JPEG", 70, 960, True),
+    ("WEBP", 80, 1280, False),
+    ("WEBP", 80, 1280, True),
+]
+
+
+def load_frame(path: str="test/dog.jpg", size: tuple=(1920, 1080)) -> np.uint8:
+    """
+    读取测试图像并缩放至相机分辨率
+    """
+    return np.asarray(Image.open(path).convert("RGB").resize(size, Image.BILINEAR))
+
+def main():
+    frame = load_frame()
+    for fmt, quality, max_side, use_cv2 in SETTINGS:
+        try:
+            stats = measure(encode_image, frame, False, fmt, quality, max_side, use_cv2, repeat=10)
+        except ImportError:
+            continue
+        payload = len(encode_image(frame, False, fmt, quality, max_side, use_cv2))
+        encoder = "cv2" if use_cv2 else "PIL"
+        print(f"{fmt:>4} q{quality:<3} max_side {str(max_side):>4} {encoder:>3} | "
+              f"{stats['mean_ms']:7.1f} ms | {payload / 1024:7.0f} KB")
+
+if __name__ == "__main__":
+    main()
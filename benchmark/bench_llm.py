@@ -0,0 +1,63 @@
+"""
+大模型客户端单次调用开销(本地接口替身): python -m benchmark.bench_llm
+"""
+import asyncio, time
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+from benchmark.mock_llm_server import MockLLMServer
+from llm import LLM, aclose_clients, close_clients
+
+
+def per_call_client(llm: LLM, text: str) -> str:
+    """
+    原实现: 每次调用新建客户端(作为对照基准)
+    """
+    client = OpenAI(api_key=llm.api_key, base_url=llm.base_url)
+    completion = client.chat.completions.create(model=llm.model, messages=[{"role": "user", "content": text}])
+    client.close()
+
+    return completion.choices[0].message.content
+
+def summary(samples: list) -> str:
+    samples = np.array(samples) * 1000
+    return f"mean {samples.mean():6.2f} ms | p95 {np.percentile(samples, 95):6.2f} ms"
+
+async def pooled_async(llm: LLM, n: int) -> list:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await llm.call_async("1+1等于几")
+        samples.append(time.perf_counter() - start)
+        llm.clear_messages()
+    await aclose_clients()
+
+    return samples
+
+def main(n: int=100):
+    with MockLLMServer("2") as server:
+        llm = LLM(model="mock", api_key="mock", base_url=server.base_url)
+
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            per_call_client(llm, "1+1等于几")
+            samples.append(time.perf_counter() - start)
+        print(f"client per call | {summary(samples)} | connections {server.connections}")
+
+        connections = server.connections
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            llm.call("1+1等于几")
+            samples.append(time.perf_counter() - start)
+            llm.clear_messages()
+        close_clients()
+        print(f"pooled sync     | {summary(samples)} | connections {server.connections - connections}")
+
+        connections = server.connections
+        samples = asyncio.run(pooled_async(llm, n))
+        print(f"pooled async    | {summary(samples)} | connections {server.connections - connections}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+障碍分布图生成性能对比: python -m benchmark.bench_od
+"""
+import numpy as np
+
+from benchmark.common import measure, random_point_cloud
+from utils import cal_angel_index, generate_od
+
+
+def generate_od_loop(lidar_data: np.ndarray, o_range: float=1.2) -> list:
+    """
+    原逐点循环实现(作为对照基准)
+    """
+    obstacle_diagram = [0] * 72
+
+    for point in lidar_data:
+        distance = np.linalg.norm(np.array([point[0], point[1]]))
+        if (distance < o_range) and (abs(point[2] - 0.5) < 0.5):
+            index = cal_angel_index(point)
+            obstacle_diagram[index] += 1
+            index_l = index
+            index_r = index
+            for i in range(18):
+                index_l = 71 if (index_l == 0) else (index_l - 1)
+                index_r = 0 if (index_r == 71) else (index_r + 1)
+                obstacle_diagram[index_l] += 1
+                obstacle_diagram[index_r] += 1
+
+    return obstacle_diagram
+
+def main():
+    for n in (1_000, 10_000, 100_000):
+        lidar_data = random_point_cloud(n, radius=2.0)
+        assert generate_od(lidar_data).tolist() == generate_od_loop(lidar_data)
+
+        repeat = 3 if n >= 100_000 else 10
+        loop = measure(generate_od_loop, lidar_data, repeat=repeat, warmup=1)
+        vec = measure(generate_od, lidar_data, repeat=repeat)
+        print(f"{n:>7} points | loop {loop['mean_ms']:9.2f} ms | vectorized {vec['mean_ms']:7.3f} ms | "
+              f"x{loop['mean_ms'] / vec['mean_ms']:.0f}")
+
+if __name__ == "__main__":
+    main()
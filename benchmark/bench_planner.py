@@ -0,0 +1,38 @@
+"""
+局部路径规划耗时随地图尺寸变化: python -m benchmark.bench_planner
+"""
+import numpy as np
+
+from benchmark.common import measure
+from planner import astar, inflate, smooth
+
+
+def random_obstacles(cells: int, density: float=0.02, seed: int=0) -> np.ndarray:
+    """
+    随机撒布方块障碍, 保证起点与终点附近空闲
+    """
+    rng = np.random.default_rng(seed)
+    occupied = np.zeros((cells, cells), dtype=bool)
+    for i, j in rng.integers(0, cells, size=(int(cells * cells * density / 9), 2)):
+        occupied[i:i + 3, j:j + 3] = True
+    occupied[:5, :5] = False
+    occupied[-5:, -5:] = False
+
+    return occupied
+
+def plan(occupied: np.ndarray, radius: int) -> list | None:
+    inflated = inflate(occupied, radius)
+    path = astar(inflated, (0, 0), (len(inflated) - 1, len(inflated) - 1))
+
+    return smooth(inflated, path) if path is not None else None
+
+def main():
+    for cells in (100, 200, 400):
+        occupied = random_obstacles(cells)
+        path = plan(occupied, 2)
+        result = measure(plan, occupied, 2, repeat=5, warmup=1)
+        waypoints = len(path) if path is not None else 0
+        print(f"{cells:>4}x{cells:<4} cells | plan {result['mean_ms']:8.2f} ms | waypoints {waypoints}")
+
+if __name__ == "__main__":
+    main()
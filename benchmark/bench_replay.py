@@ -0,0 +1,93 @@
+"""
+在录制数据上确定性回放observe→make_decision→动作下发, 统计端到端延迟:
+python -m benchmark.bench_replay 录制目录 [回放次数]
+
+录制方法: 在config中设置RECORD_PATH后运行main.py(需要YOLO模型权重)
+"""
+import sys, asyncio, time
+import numpy as np
+
+from drone import Drone
+from frame_buffer import FrameRing
+from perception import Perception
+from action_executor import ActionExecutor
+from replay import Player, Recording
+from telemetry import get_telemetry
+import nodes.agent_node as agent_node
+import nodes.drone_node as drone_node
+
+
+class LoggedQueue(asyncio.Queue):
+    """
+    记录下发动作的队列
+    """
+    def __init__(self):
+        super().__init__()
+        self.log = []
+
+    def put_nowait(self, item):
+        self.log.append(item)
+        super().put_nowait(item)
+
+async def run_agent(agent: agent_node.Agent, drone: Drone, images, shape: tuple) -> tuple[list, list]:
+    """
+    逐帧运行agent: 写入一帧后等待observe(含决策与动作反馈)返回再写入下一帧
+
+    Args:
+        agent:新建的agent状态(每次运行从相同状态开始)
+        images:相机帧序列
+        shape:相机帧形状
+    Returns:
+        每帧端到端延迟(s), 下发的动作序列
+    """
+    frames = FrameRing(shape, 4)
+    action_queue, feedback_queue = LoggedQueue(), asyncio.Queue()
+    executor = ActionExecutor(drone, feedback_queue, Perception(frames), drone_node.match_action)
+
+    async def execute():
+        while True:
+            await executor.poll(action_queue)
+
+    executor_task = asyncio.create_task(execute())
+    reader = frames.reader()
+    detected_classes = set(['background'])
+    latencies = []
+    try:
+        for image in images:
+            frames.write(image)
+            start = time.perf_counter()
+            detected_classes = await agent_node.observe(agent, reader, action_queue, detected_classes, feedback_queue)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        executor_task.cancel()
+        await asyncio.gather(executor_task, return_exceptions=True)
+        frames.close()
+
+    return latencies, action_queue.log
+
+async def run(recording: Recording) -> tuple[list, list]:
+    """
+    以最快速度回放录制数据运行agent
+    """
+    player = Player(recording)
+    agent = agent_node.create_agent(cache_path=None)
+    for llm in (agent.small_llm, agent.large_llm):
+        player.attach_llm(llm)
+
+    return await run_agent(agent, Drone(player.connect), recording.frames(), recording.camera(0).shape)
+
+def main():
+    recording = Recording(sys.argv[1])
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    logs = []
+    for k in range(repeat):
+        latencies, actions = asyncio.run(run(recording))
+        logs.append(actions)
+        samples = np.array(latencies) * 1000
+        print(f"第{k + 1}次回放 {len(samples)}帧 | 端到端 mean {samples.mean():.1f} ms | p95 {np.percentile(samples, 95):.1f} ms | "
+              f"max {samples.max():.1f} ms | 动作 {actions}")
+    print("回放结果一致" if all(log == logs[0] for log in logs) else "回放结果不一致")
+    print(get_telemetry().report())
+
+if __name__ == "__main__":
+    main()
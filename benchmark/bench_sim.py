@@ -0,0 +1,49 @@
+"""
+无界面任务循环基准(进程内模拟器): python -m benchmark.bench_sim [运行秒数] [时间倍速]
+"""
+import sys, asyncio, time
+
+from config import CAMERA_SHAPE, FRAME_RING_SLOTS
+from drone import Drone
+from frame_buffer import FrameRing
+from sim import SimWorld
+from telemetry import get_telemetry
+import nodes.camera_node
+import nodes.drone_node
+
+
+async def run(duration: float, time_scale: float) -> dict:
+    world = SimWorld.default(time_scale)
+    drone = Drone(world.connect)
+    frames = FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS)
+    start = time.perf_counter()
+    sim_start = world.now()
+    try:
+        await asyncio.wait_for(asyncio.gather(nodes.camera_node.main(drone, frames, 0.1),
+                                              nodes.drone_node.main(drone, asyncio.Queue(), asyncio.Queue(), frames)),
+                               duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        frames.close()
+    elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed,
+            "speedup": (world.now() - sim_start) / elapsed,
+            "ticks": drone.ticks,
+            "rpc_per_tick": drone.rpc_per_tick(),
+            "frames": world.frames,
+            "collisions": world.collisions,
+            "pos": world.pos.round(1).tolist()}
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    time_scale = float(sys.argv[2]) if len(sys.argv) > 2 else 4.0
+    result = asyncio.run(run(duration, time_scale))
+    print(f"真实用时 {result['elapsed']:.1f}s | 模拟倍速 x{result['speedup']:.1f} | 控制周期 {result['ticks']} | "
+          f"相机帧 {result['frames']} | 碰撞 {result['collisions']} | 终点 {result['pos']}")
+    print("平均每控制周期RPC次数", {stream: round(count, 2) for stream, count in result["rpc_per_tick"].items()})
+    print(get_telemetry().report())
+
+if __name__ == "__main__":
+    main()
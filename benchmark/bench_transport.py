@@ -0,0 +1,122 @@
+"""
+节点间传输延迟与吞吐量(对端为回显进程): python -m benchmark.bench_transport [重复次数]
+"""
+import sys, time, asyncio, contextlib, multiprocessing
+import numpy as np
+
+from config import CAMERA_SHAPE
+from frame_buffer import Frame
+from transport import Channel, PipeTransport, accept, connect, listen
+
+
+def echo(kind: str, endpoint):
+    """
+    回显进程: 将收到的消息原样发回
+    """
+    transport = PipeTransport(endpoint) if kind == "pipe" else connect("127.0.0.1", endpoint)
+    channel = Channel(transport, "echo")
+
+    async def run():
+        while True:
+            channel.put_nowait(await channel.get())
+
+    try:
+        asyncio.run(run())
+    except EOFError:
+        pass
+
+@contextlib.contextmanager
+def echo_peer(kind: str):
+    """
+    启动回显进程并返回与其相连的通道
+
+    Args:
+        kind:pipe或tcp
+    """
+    context = multiprocessing.get_context("spawn")
+    if kind == "pipe":
+        connection, endpoint = context.Pipe()
+        process = context.Process(target=echo, args=(kind, endpoint), daemon=True)
+        process.start()
+        endpoint.close()
+        transport = PipeTransport(connection)
+    else:
+        server = listen("127.0.0.1", 0)
+        process = context.Process(target=echo, args=(kind, server.getsockname()[1]), daemon=True)
+        process.start()
+        transport = accept(server, 30)
+    channel = Channel(transport, kind)
+    try:
+        yield channel
+    finally:
+        channel.close()
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+
+def messages() -> dict:
+    """
+    Returns:
+        dict:消息名 -> 消息(动作指令与一帧相机图像)
+    """
+    image = np.random.default_rng(0).integers(0, 255, CAMERA_SHAPE, dtype=np.uint8)
+
+    return {"action": "向前移动", "frame": Frame(0, time.time(), image)}
+
+async def roundtrip(channel: Channel, message, repeat: int=50, warmup: int=3) -> list:
+    """
+    Returns:
+        每次往返耗时(s)
+    """
+    for _ in range(warmup):
+        channel.put_nowait(message)
+        await channel.get()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        channel.put_nowait(message)
+        await channel.get()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+async def throughput(channel: Channel, message, count: int=50) -> float:
+    """
+    连续发送count条消息后等待全部回显
+
+    Returns:
+        每秒往返消息数
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        channel.put_nowait(message)
+    for _ in range(count):
+        await channel.get()
+
+    return count / (time.perf_counter() - start)
+
+async def run(channel: Channel, repeat: int=50) -> dict:
+    """
+    通道绑定首次读取时的事件循环, 全部测量在同一事件循环中进行
+
+    Returns:
+        dict:消息名 -> (往返耗时列表(s), 每秒往返消息数, 消息字节数)
+    """
+    results = {}
+    for name, message in messages().items():
+        samples = await roundtrip(channel, message, repeat)
+        rate = await throughput(channel, message, repeat)
+        results[name] = samples, rate, message.image.nbytes if isinstance(message, Frame) else len(message.encode())
+
+    return results
+
+def main(repeat: int=50):
+    for kind in ("pipe", "tcp"):
+        with echo_peer(kind) as channel:
+            for name, (samples, rate, size) in asyncio.run(run(channel, repeat)).items():
+                samples = np.array(samples) * 1000
+                print(f"{kind:<5}{name:<8}| 往返 mean {samples.mean():7.3f} ms | p95 {np.percentile(samples, 95):7.3f} ms | "
+                      f"{rate:8.1f} 条/s | {rate * size * 2 / 1e6:8.1f} MB/s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,39 @@
+import time
+import numpy as np
+
+
+def measure(func, *args, repeat: int=20, warmup: int=2) -> dict:
+    """
+    多次调用函数并统计耗时
+
+    Args:
+        func:被测函数
+        repeat:计时调用次数
+        warmup:预热调用次数(不计时)
+    Returns:
+        dict:耗时统计结果(单位ms)
+    """
+    for _ in range(warmup):
+        func(*args)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+
+    return {"mean_ms": float(samples.mean()),
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+            "min_ms": float(samples.min())}
+
+def random_point_cloud(n: int, seed: int=0, radius: float=5.0) -> np.ndarray:
+    """
+    生成可复现的随机点云(NED坐标)
+    """
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(-radius, radius, size=(n, 2))
+    z = rng.uniform(-0.5, 1.5, size=(n, 1))
+
+    return np.hstack((xy, z))
@@ -0,0 +1,74 @@
+"""
+本地OpenAI兼容接口替身, 用于测量客户端开销
+"""
+import json, socket, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMServer:
+    """
+    在后台线程中运行的/chat/completions接口替身
+
+    Args:
+        reply:固定回复内容, 或根据请求消息列表生成回复的函数
+        delay:每次响应前的模拟推理耗时(s)
+    """
+    def __init__(self, reply="没有", delay: float=0.0, port: int=0):
+        self.reply = reply
+        self.delay = delay
+        self.requests = 0 # 已处理请求数
+        self.connections = 0 # 已建立连接数
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # 支持长连接
+
+            def setup(self):
+                super().setup()
+                # 头部与正文分两次写出, 关闭Nagle避免与延迟确认叠加产生40ms停顿
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests += 1
+                if server.delay:
+                    time.sleep(server.delay)
+                content = server.reply(body["messages"]) if callable(server.reply) else server.reply
+                payload = json.dumps({
+                    "id": f"mock-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except ConnectionError:
+                    # 客户端已超时或取消请求
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,250 @@
+"""
+性能基准套件: 固定数据集上测量感知、规划与决策热点路径, 结果追加到历史文件并与上次结果比较
+
+python -m benchmark.suite [--only od,encode] [--history benchmark/history.jsonl] [--threshold 0.2] [--no-save]
+
+每项结果输出一行JSON; 任一指标比历史结果慢threshold以上时以退出码1结束, 便于在CI中发现性能退化。
+"""
+import sys, os, json, time, asyncio, platform, argparse, subprocess
+import numpy as np
+
+from benchmark.common import measure, random_point_cloud
+
+
+CASES = {} # 用例名 -> 生成结果的函数
+OPTIONAL_MODULES = {"ultralytics", "torch", "airsim"} # 缺少时跳过相应用例的可选依赖
+OPTIONAL_FILES = (".pt",) # 缺少时跳过相应用例的文件类型(模型权重)
+
+
+def case(name: str):
+    """
+    注册基准用例, 用例函数逐条产出(指标名, 参数, 耗时统计)
+    """
+    def decorator(func):
+        CASES[name] = func
+        return func
+
+    return decorator
+
+def measure_async(func, *args, repeat: int=20, warmup: int=2) -> dict:
+    """
+    同measure, 用于协程函数(在同一事件循环中多次调用)
+    """
+    async def timed():
+        for _ in range(warmup):
+            await func(*args)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await func(*args)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    return summarize(asyncio.run(timed()))
+
+def summarize(samples: list) -> dict:
+    """
+    Args:
+        samples:耗时样本(s)
+    Returns:
+        dict:耗时统计结果(单位ms)
+    """
+    samples = np.array(samples) * 1000
+
+    return {"mean_ms": float(samples.mean()),
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+            "min_ms": float(samples.min())}
+
+
+@case("od")
+def bench_od():
+    from drone import Drone
+    from sim import SimWorld
+    from utils import generate_od
+
+    for n in (1_000, 10_000, 100_000):
+        yield "od.generate_od", {"points": n}, measure(generate_od, random_point_cloud(n, radius=2.0))
+
+    # 模拟器提供固定场景的点云, 不同线数对应不同点云规模
+    for beams in (360, 1440, 5760):
+        world = SimWorld(circles=[(1.0, 0.2, 0.3), (-0.8, -0.6, 0.4), (0.2, 1.1, 0.3)], boxes=[(-3, -3, 3, -2.5)],
+                         start=(0, 0, -1), lidar_beams=beams)
+        drone = Drone(world.connect)
+        yield "od.cal_direction", {"points": len(world.lidar())}, measure_async(drone._cal_direction, [10, 0, -1])
+
+@case("planner")
+def bench_planner():
+    from benchmark.bench_planner import plan, random_obstacles
+
+    for cells in (100, 200, 400):
+        yield "planner.plan", {"cells": cells}, measure(plan, random_obstacles(cells), 2, repeat=5, warmup=1)
+
+@case("encode")
+def bench_encode():
+    from benchmark.bench_encode import load_frame
+    from config import IMAGE_MAX_SIDE
+    from llm import encode_image
+
+    frame = load_frame()
+    for fmt, quality in (("JPEG", 85), ("WEBP", 80), ("PNG", 100)):
+        yield "encode.encode_image", {"format": fmt, "max_side": IMAGE_MAX_SIDE}, \
+            measure(encode_image, frame, False, fmt, quality, IMAGE_MAX_SIDE, False, repeat=10)
+
+@case("yolo")
+def bench_yolo():
+    from benchmark.bench_encode import load_frame
+    from detector import Detector, _filter_result
+
+    for variant in ("n", "s"):
+        detector = Detector(variant)
+        detector.load()
+        for width, height in ((640, 360), (1280, 720), (1920, 1080)):
+            frame = load_frame(size=(width, height))
+            yield "yolo.yolo_fliter", {"variant": variant, "resolution": f"{width}x{height}"}, \
+                measure(lambda image: _filter_result(image, detector(image)), frame, repeat=10)
+
+@case("llm")
+def bench_llm():
+    from benchmark.bench_llm import pooled_async
+    from benchmark.mock_llm_server import MockLLMServer
+    from llm import LLM, close_clients
+
+    with MockLLMServer("2") as server:
+        llm = LLM(model="mock", api_key="mock", base_url=server.base_url)
+
+        def call():
+            llm.call("1+1等于几")
+            llm.clear_messages()
+
+        yield "llm.call", {"mode": "sync"}, measure(call, repeat=50, warmup=5)
+        close_clients()
+        yield "llm.call", {"mode": "async"}, summarize(asyncio.run(pooled_async(llm, 50)))
+
+@case("agent")
+def bench_agent():
+    from benchmark.bench_replay import run_agent
+    from benchmark.mock_llm_server import MockLLMServer
+    from drone import Drone
+    from sim import SimWorld
+    import nodes.agent_node as agent_node
+
+    # 固定场景: 沿直线接近一名人员, 逐帧渲染相机画面
+    world = SimWorld(people=[(12, 0.5)], circles=[(6, 3, 0.5)], start=(0, 0, -1))
+    images = []
+    for x in np.linspace(0, 8, 20):
+        world.pos = np.array([x, 0, -1.0])
+        images.append(world.image())
+
+    with MockLLMServer('有 {"action": "继续寻找其他被困人员"}') as server:
+        agent = agent_node.create_agent(cache_path=None)
+        for llm in (agent.small_llm, agent.large_llm):
+            llm.base_url, llm.api_key = server.base_url, "mock"
+        latencies, actions = asyncio.run(run_agent(agent, Drone(world.connect), images, images[0].shape))
+    stats = summarize(latencies)
+    stats["actions"] = len(actions)
+    yield "agent.observe", {"frames": len(images)}, stats
+
+@case("transport")
+def bench_transport():
+    from benchmark.bench_transport import echo_peer, run
+
+    for kind in ("pipe", "tcp"):
+        with echo_peer(kind) as channel:
+            for name, (samples, rate, size) in asyncio.run(run(channel)).items():
+                stats = summarize(samples)
+                stats["msgs_per_s"] = rate
+                yield "transport.roundtrip", {"transport": kind, "message": name, "bytes": size}, stats
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def missing_optional(error: Exception) -> bool:
+    """
+    是否因缺少可选依赖或模型权重而失败(仓库内部的导入错误不算)
+    """
+    if isinstance(error, ImportError):
+        return (error.name or "").split(".")[0] in OPTIONAL_MODULES
+    if isinstance(error, FileNotFoundError):
+        return str(error.filename or "").endswith(OPTIONAL_FILES)
+
+    return False
+
+def _key(result: dict) -> str:
+    return json.dumps([result["name"], result["params"]], sort_keys=True)
+
+def load_history(path: str) -> dict:
+    """
+    Returns:
+        dict:指标 -> 历史文件中最近一次结果
+    """
+    latest = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    result = json.loads(line)
+                    latest[_key(result)] = result
+
+    return latest
+
+def compare(result: dict, previous: dict | None, threshold: float) -> str | None:
+    """
+    Returns:
+        退化描述, 未退化时返回None
+    """
+    if previous is None or "mean_ms" not in previous or "mean_ms" not in result:
+        return None
+    # 同时比较均值与中位数, 避免单次抖动造成误报
+    ratio = min(result["mean_ms"] / max(previous["mean_ms"], 1e-9),
+                result["p50_ms"] / max(previous.get("p50_ms", previous["mean_ms"]), 1e-9))
+    if ratio > 1 + threshold:
+        return f"{result['name']} {result['params']} {previous['mean_ms']:.3f} ms -> {result['mean_ms']:.3f} ms (x{ratio:.2f})"
+
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="性能基准套件")
+    parser.add_argument("--only", default=None, help=f"逗号分隔的用例名({','.join(CASES)})")
+    parser.add_argument("--history", default="benchmark/history.jsonl", help="历史结果文件(JSONL)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定退化的相对变慢比例")
+    parser.add_argument("--no-save", action="store_true", help="不写入历史文件")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"未知的用例: {','.join(unknown)}(可选: {','.join(CASES)})")
+    history = load_history(args.history)
+    run = {"commit": _commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+           "machine": platform.machine()}
+    results, regressions = [], []
+    for name in names:
+        try:
+            for metric, params, stats in CASES[name]():
+                result = {"name": metric, "params": params, **stats, **run}
+                results.append(result)
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+                regression = compare(result, history.get(_key(result)), args.threshold)
+                if regression is not None:
+                    regressions.append(regression)
+        except (ImportError, FileNotFoundError) as e:
+            # 只跳过缺少可选依赖(如ultralytics、YOLO权重)的用例, 其他错误照常抛出
+            if not missing_optional(e):
+                raise
+            print(json.dumps({"name": name, "skipped": f"{type(e).__name__}: {e}", **run}, ensure_ascii=False), flush=True)
+
+    if not args.no_save and results:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    for regression in regressions:
+        print(f"性能退化: {regression}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -6,5 +6,69 @@ MODEL_7 = "qwen2.5-7b-instruct-1m"
 MODEL_MAX_VL = "qwen-vl-max-2025-04-08"
 MODEL_MAX = "qwen-max-2025-01-25"
 BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
-
-
+LOOP_LAG_INTERVAL = 0.05 # 事件循环延迟采样间隔(s)
+LOOP_LAG_REPORT = 10.0 # 事件循环延迟统计打印间隔(s)
+STATE_MAX_AGE = 0.05 # 无人机状态快照缓存有效期(s), 设为0即每次读取都发起RPC
+ARRIVAL_TOLERANCE = 0.2 # 到达判定距离(m)
+ARRIVAL_POLL_RATE = 20.0 # 到达判定位置轮询频率(Hz)
+BLEND_RADIUS = 0.35 # 连续轨迹模式下提前切换到下一路径点的距离(m)
+MOVE_TIMEOUT_FACTOR = 3.0 # 移动超时时间相对"距离/速度"的倍数
+MOVE_TIMEOUT_MIN = 2.0 # 移动超时时间附加量(s)
+YOLO_VARIANT = "x" # YOLO11模型规模(n/s/m/l/x), 规模越小CPU推理越快
+YOLO_MODEL_DIR = "models" # YOLO模型权重目录
+YOLO_MAX_BATCH = 4 # 推理线程单次合并推理的最大帧数
+FRAME_RING_SLOTS = 8 # 相机帧环形缓冲区槽位数
+FRAME_RING_SHARED = False # 相机帧缓冲区是否放在共享内存中(供其他进程读取)
+CAMERA_SHAPE = (1080, 1920, 3) # 相机图像形状(H, W, 3)
+IMAGE_FORMAT = "JPEG" # 上传大模型的图像编码格式(JPEG/WEBP/PNG)
+IMAGE_QUALITY = 85 # JPEG/WEBP编码质量
+IMAGE_MAX_SIDE = 1280 # 上传图像长边最大像素数, None表示不缩放
+IMAGE_USE_CV2 = False # 是否使用OpenCV编码器
+IMAGE_CACHE_SIZE = 8 # 图像编码结果缓存数量
+LLM_TIMEOUT = 60.0 # 大模型请求超时时间(s)
+LLM_CONNECT_TIMEOUT = 5.0 # 大模型连接建立超时时间(s)
+LLM_MAX_RETRIES = 2 # 大模型请求失败重试次数
+LLM_MAX_CONNECTIONS = 10 # 大模型客户端连接池最大连接数
+LLM_MAX_KEEPALIVE = 5 # 大模型客户端保持的空闲长连接数
+LLM_KEEPALIVE_EXPIRY = 60.0 # 空闲长连接保持时间(s)
+LLM_TRIAGE_TIMEOUT = 15.0 # 小模型判断超时时间(s)
+LLM_DECISION_TIMEOUT = 60.0 # 大模型决策单次调用超时时间(s)
+ACTION_NEXT_TIMEOUT = LLM_DECISION_TIMEOUT + 10.0 # 无人机等待决策链下一步动作的最长时间(s), 超时后恢复导航
+LLM_MAX_MESSAGES = 24 # 对话记录保留的最近消息条数
+LLM_MAX_IMAGES = 2 # 对话记录中保留图像的最近消息条数, 更早的图像替换为文字摘要
+LLM_MAX_PROMPT_BYTES = 4_000_000 # 单次请求消息总字节数上限
+TRIAGE_CACHE_SIZE = 256 # 小模型判断结果缓存条目数
+TRIAGE_CACHE_TTL = 300.0 # 小模型判断结果缓存有效期(s)
+TRIAGE_CACHE_DISTANCE = 0 # 视为同一画面的最大感知哈希汉明距离(共64位), 0表示仅完全相同时命中
+TRIAGE_CACHE_GRID = 64 # 判断缓存键中人员检测框坐标取整的网格大小(px)
+TRIAGE_CACHE_PATH = None # 小模型判断结果磁盘缓存路径, None表示仅使用内存
+SCENE_CHANGE_THRESHOLD = 6.0 # 画面变化门控阈值(缩略图区块最大灰度差, 0-255; 人员大小的目标约为其与背景的灰度差), 设为-1即不跳过
+SCENE_MAX_SKIPS = 10 # 画面变化门控最多连续跳过的帧数, 超出后强制识别一次
+SCENE_REPORT_FRAMES = 200 # 每检查多少帧打印一次跳过比例
+LOCAL_MAP_SIZE = 60.0 # 局部占据栅格边长(m)
+LOCAL_MAP_RESOLUTION = 0.2 # 局部占据栅格分辨率(m)
+CAMERA_FOV = 90.0 # 相机水平视场角(度)
+PLANNER_MAX_EXPANSIONS = 10000 # 单次A*路径搜索最多扩展的栅格数(默认局部栅格共300x300)
+PLANNER_REPLAN_COOLDOWN = 2.0 # 规划失败后同一导航点暂停重新规划的时间(s)
+SEEK_RADIUS = 15.0 # 搜寻区域半边长(m)
+SEEK_VIEW_DISTANCE = 8.0 # 相机到观测平面的距离(m), 前视相机取有效识别距离, 下视相机取飞行高度
+SEEK_OVERLAP = 0.2 # 相邻拍摄点视野重叠比例
+SEEK_PATTERN = "boustrophedon" # 覆盖搜寻路线(boustrophedon/spiral)
+TELEMETRY_PATH = None # 遥测JSONL轨迹文件路径(如"trace.jsonl"), None表示只在内存中统计
+TELEMETRY_SAMPLE_INTERVAL = 0.5 # 队列长度采样间隔(s)
+DRONE_BACKEND = "airsim" # 无人机后端(airsim/sim), sim为进程内运动学模拟器
+SIM_TIME_SCALE = 4.0 # 模拟器时间倍速
+RECORD_PATH = None # 录制目录(传感器数据与大模型应答), None表示不录制
+REPLAY_PATH = None # 回放目录, 设置后以录制数据代替无人机后端与大模型
+REPLAY_REALTIME = False # 按录制时间轴回放, False表示以最快速度确定性回放
+LLM_POOL_CONCURRENCY = 4 # 多机共享大模型请求池的最大并发请求数
+LLM_POOL_RATE = 2.0 # 多机共享大模型请求池每秒最多发出的请求数, None表示不限制
+FLEET_VEHICLES = {"Drone1": (0.0, 0.0), "Drone2": (0.0, 4.0)} # 机群无人机名 -> 出生点世界坐标(x, y)
+FLEET_AREA = (-100.0, -50.0, 0.0, 5.0) # 机群搜索区域世界坐标(x1, y1, x2, y2)
+FLEET_LANE_SPACING = 10.0 # 区域内往复航线间距(m)
+FLEET_REPORT_INTERVAL = 30.0 # 机群吞吐统计打印间隔(s)
+TRANSPORT = "tcp" # 分进程运行节点时的传输方式(pipe/tcp), pipe仅限同一主机且传输大帧时较慢
+TRANSPORT_HOSTS = {"agent": "127.0.0.1", "drone": "127.0.0.1"} # 接收消息的节点所在主机(tcp)
+TRANSPORT_PORTS = {"frames.agent": 7601, "frames.drone": 7602, "action": 7603, "feedback": 7604} # 各通道端口(tcp)
+TRANSPORT_FRAME_QUEUE = 2 # 相机帧通道发送缓冲帧数, 超出时丢弃最旧帧
+TRANSPORT_CONNECT_TIMEOUT = 30.0 # 等待对端节点启动的最长时间(s)
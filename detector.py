@@ -0,0 +1,317 @@
+import os, time, threading, resource, queue, asyncio
+import numpy as np
+import cv2
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import YOLO_VARIANT, YOLO_MODEL_DIR, YOLO_MAX_BATCH
+from telemetry import get_telemetry
+
+
+telemetry = get_telemetry()
+
+
+def _rss_mb() -> float:
+    """
+    当前进程常驻内存(MB)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # 非Linux平台退化为峰值常驻内存
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Detector:
+    """
+    YOLO目标检测服务: 首次使用时加载并预热模型, 全进程共享一份权重
+    """
+    def __init__(self, variant: str=YOLO_VARIANT, model_dir: str=YOLO_MODEL_DIR):
+        """
+        Args:
+            variant:模型规模(n/s/m/l/x)
+            model_dir:模型权重目录
+        """
+        self.variant = variant
+        self.model_path = os.path.join(model_dir, f"yolo11{variant}.pt")
+        self._model = None
+        self._lock = threading.Lock()
+
+        self.load_time = None # 权重加载耗时(s)
+        self.warmup_time = None # 预热推理耗时(s)
+        self.memory_mb = None # 加载后常驻内存增量(MB)
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    def load(self):
+        """
+        加载并预热模型(重复调用无副作用)
+        """
+        with self._lock:
+            if self._model is not None:
+                return
+            from ultralytics import YOLO
+
+            rss_before = _rss_mb()
+            start = time.perf_counter()
+            model = YOLO(self.model_path)
+            self.load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+            self.warmup_time = time.perf_counter() - start
+            self.memory_mb = _rss_mb() - rss_before
+
+            self._model = model
+
+    def __call__(self, image):
+        """
+        对图像(或图像列表)进行推理, 返回ultralytics结果列表
+        """
+        return self.model(image, verbose=False)
+
+    def stats(self) -> dict:
+        return {"variant": self.variant,
+                "load_time": self.load_time,
+                "warmup_time": self.warmup_time,
+                "memory_mb": self.memory_mb}
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_detector() -> Detector:
+    """
+    获取进程内共享的检测服务
+    """
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = Detector()
+    return _detector
+
+@dataclass
+class Detections:
+    """
+    单帧检测结果
+    """
+    image: np.uint8 # 绘制了过滤后检测框的图像
+    classes: set # 过滤后识别结果集合
+    boxes: list = field(default_factory=list) # 全部检测框(类别名, 置信度, x1, y1, x2, y2)
+    seq: int = -1 # 对应相机帧序号
+    timestamp: float = 0.0 # 对应相机帧拍摄时间(time.time)
+
+
+def _filter_result(image: np.uint8, results) -> Detections:
+    """
+    过滤掉结果中过小或置信度过低的框并绘制到图像副本上(无框可画时不拷贝)
+    """
+    annotated = None
+    detected_classes = set()
+    all_boxes = []
+    MIN_HEIGHT = 120
+    MIN_CONFIDENCE = 0.5
+
+    for result in results:
+        boxes = result.boxes.cpu().numpy()
+        for box in boxes:
+            x1, y1, x2, y2 = box.xyxy[0]
+            class_id = box.cls[0]
+            bbox_height = y2 - y1
+            confidence = box.conf[0]
+            all_boxes.append((result.names[int(class_id)], float(confidence), float(x1), float(y1), float(x2), float(y2)))
+
+            if bbox_height > MIN_HEIGHT and confidence > MIN_CONFIDENCE:
+                detected_classes.add(result.names[class_id])
+                label = f"{result.names[int(class_id)]} {confidence:.2f}"
+                if annotated is None:
+                    annotated = image.copy()
+                cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+                cv2.putText(annotated, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)               
+
+    return Detections(image if annotated is None else annotated, detected_classes, all_boxes)
+
+def yolo_fliter(image: np.uint8) -> tuple[np.uint8, list]:
+    """
+    yolo模型识别并过滤掉结果中过小的框
+
+    Args:
+        image:场景图像
+    Returns:
+        np.uint8:过滤后识别结果图像
+        list:过滤后识别结果列表
+    """
+    with telemetry.span("yolo.filter"):
+        detections = _filter_result(image, get_detector()(image))
+
+    return detections.image, detections.classes
+
+
+class InferenceWorker:
+    """
+    后台推理线程: 从队列取帧, 将同时等待的帧合并为一次批量推理
+    """
+    def __init__(self, detector: Detector | None=None, max_batch: int=YOLO_MAX_BATCH, window: int=500):
+        """
+        Args:
+            detector:检测服务, 默认使用共享实例
+            max_batch:单次推理最大帧数
+            window:保留的延迟采样数量
+        """
+        self.detector = detector or get_detector()
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.closed = False
+
+        self.latencies = deque(maxlen=window) # 单帧提交至返回的延迟(s)
+        self.frames = 0 # 已处理帧数
+        self.batches = 0 # 已执行推理次数
+        self.busy_time = 0.0 # 推理累计耗时(s)
+        self._start_time = None
+
+    def _start(self):
+        if self._thread is None:
+            self._start_time = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="yolo-worker", daemon=True)
+            self._thread.start()
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def close(self):
+        """
+        停止推理线程: 已提交的图像处理完毕后退出, 之后的提交被拒绝
+        """
+        with self._lock:
+            self.closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        # 结束标记之前的图像照常处理, 等待期间不持有锁, 并发的提交立即被拒绝而不会阻塞
+        if thread is not None:
+            thread.join()
+        # 推理线程未处理的图像(如线程异常退出)以异常结束等待
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                _, loop, future, _ = item
+                try:
+                    loop.call_soon_threadsafe(_resolve, future, RuntimeError("推理线程已关闭"))
+                except RuntimeError:
+                    pass
+
+    def submit(self, image: np.uint8) -> asyncio.Future:
+        """
+        提交一帧图像, 返回可等待的检测结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # 检查与入队在同一锁内, 关闭后不会有图像排在结束标记之后
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("推理线程已关闭")
+            self._start()
+            self._queue.put((image, loop, future, time.perf_counter()))
+
+        return future
+
+    async def detect(self, image: np.uint8) -> Detections:
+        return await self.submit(image)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch: list):
+        start = time.perf_counter()
+        try:
+            results = self.detector([image for image, _, _, _ in batch])
+            outputs = [_filter_result(image, [result]) for (image, _, _, _), result in zip(batch, results)]
+        except Exception as e:
+            outputs = [e] * len(batch)
+        end = time.perf_counter()
+
+        telemetry.record("yolo.batch", end - start)
+        telemetry.gauge("queue.inference", self._queue.qsize())
+        self.busy_time += end - start
+        self.batches += 1
+        self.frames += len(batch)
+        for (_, loop, future, submit_time), output in zip(batch, outputs):
+            self.latencies.append(end - submit_time)
+            try:
+                loop.call_soon_threadsafe(_resolve, future, output)
+            except RuntimeError:
+                # 提交方的事件循环已关闭
+                pass
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:单帧延迟(ms)、平均批大小与帧率统计
+        """
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+
+        return {"frames": self.frames,
+                "mean_batch": self.frames / max(self.batches, 1),
+                "latency_mean_ms": float(latencies.mean()),
+                "latency_p95_ms": float(np.percentile(latencies, 95)),
+                "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+                "capacity_fps": self.frames / self.busy_time if self.busy_time > 0 else 0.0}
+
+
+def _resolve(future: asyncio.Future, output):
+    if future.done():
+        return
+    if isinstance(output, Exception):
+        future.set_exception(output)
+    else:
+        future.set_result(output)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_worker() -> InferenceWorker:
+    """
+    获取进程内共享的推理线程
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = InferenceWorker()
+    return _worker
+
+async def yolo_fliter_async(image: np.uint8) -> tuple[np.uint8, set]:
+    """
+    在推理线程中执行yolo_fliter, 不阻塞事件循环
+    """
+    detections = await get_worker().detect(image)
+
+    return detections.image, detections.classes
@@ -0,0 +1,171 @@
+"""
+分进程运行相机、agent与控制节点, 节点间的队列由transport中的通道代替
+
+    python -m distributed [--transport pipe|tcp] [--duration 600]    在本机启动全部节点进程
+    python -m distributed --node agent                               只运行一个节点(tcp, 按TRANSPORT_HOSTS跨主机部署)
+
+相机进程将帧发送给agent与控制进程, 两者各自写入本地FrameRing, 节点代码无需改动。
+相机与控制进程各自连接无人机后端, 需使用AirSim等进程外后端(进程内模拟器不在进程间共享)。
+"""
+import asyncio, argparse, multiprocessing
+
+from config import *
+from telemetry import get_telemetry
+from transport import Channel, PipeTransport, accept, connect, listen, publish_frames, receive_frames
+
+
+# 通道名 -> (发送节点, 接收节点, 发送缓冲消息数)
+CHANNELS = {"frames.agent": ("camera", "agent", TRANSPORT_FRAME_QUEUE),
+            "frames.drone": ("camera", "drone", TRANSPORT_FRAME_QUEUE),
+            "action": ("agent", "drone", 0),
+            "feedback": ("drone", "agent", 0)}
+
+
+def open_channels(node: str, connections: dict | None=None) -> dict:
+    """
+    建立节点的全部通道
+
+    Args:
+        node:节点名
+        connections:通道名 -> 管道连接, None表示按TRANSPORT_HOSTS与TRANSPORT_PORTS建立TCP连接
+    Returns:
+        dict:通道名 -> Channel
+    """
+    if connections is not None:
+        return {name: Channel(PipeTransport(connection), name, CHANNELS[name][2])
+                for name, connection in connections.items()}
+
+    # 先监听全部端口再连接对端, 各节点以任意顺序启动都不会互相等待
+    servers = {name: listen(TRANSPORT_HOSTS[node], TRANSPORT_PORTS[name])
+               for name, (_, receiver, _) in CHANNELS.items() if receiver == node}
+    channels = {}
+    for name, (sender, receiver, maxsize) in CHANNELS.items():
+        if sender == node:
+            transport = connect(TRANSPORT_HOSTS[receiver], TRANSPORT_PORTS[name], TRANSPORT_CONNECT_TIMEOUT)
+            channels[name] = Channel(transport, name, maxsize)
+    for name, server in servers.items():
+        channels[name] = Channel(accept(server, TRANSPORT_CONNECT_TIMEOUT), name)
+
+    return channels
+
+
+async def camera(channels: dict):
+    from drone import Drone
+    from frame_buffer import FrameRing
+    import nodes.camera_node
+
+    drone = Drone()
+    frames = FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS)
+    try:
+        await asyncio.gather(nodes.camera_node.main(drone, frames, 0.1),
+                             publish_frames(frames.reader(), [channels["frames.agent"], channels["frames.drone"]]))
+    finally:
+        frames.close()
+
+async def agent(channels: dict):
+    from detector import get_detector
+    from frame_buffer import FrameRing
+    from llm import aclose_clients
+    import nodes.agent_node
+
+    detector = get_detector()
+    detector.load()
+    print(f"YOLO模型加载完成 {detector.stats()}")
+    frames = FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS)
+    try:
+        await asyncio.gather(receive_frames(channels["frames.agent"], frames),
+                             nodes.agent_node.main(frames.reader(), channels["action"], channels["feedback"],
+                                                   nodes.agent_node.create_agent()))
+    finally:
+        frames.close()
+        await aclose_clients()
+
+async def drone(channels: dict):
+    from drone import Drone
+    from frame_buffer import FrameRing
+    import nodes.drone_node
+
+    vehicle = Drone()
+    frames = FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS)
+    try:
+        await asyncio.gather(receive_frames(channels["frames.drone"], frames),
+                             nodes.drone_node.main(vehicle, channels["action"], channels["feedback"], frames))
+    finally:
+        frames.close()
+
+NODES = {"camera": camera, "agent": agent, "drone": drone}
+
+
+async def _run(node: str, channels: dict, duration: float | None):
+    telemetry = get_telemetry()
+    try:
+        await asyncio.wait_for(asyncio.gather(NODES[node](channels),
+                                              telemetry.sample_queues(channels, TELEMETRY_SAMPLE_INTERVAL)),
+                               duration)
+    except asyncio.TimeoutError:
+        pass
+
+def run_node(node: str, connections: dict | None=None, duration: float | None=None):
+    """
+    在当前进程中运行一个节点直至结束或任一通道的对端关闭
+    """
+    channels = open_channels(node, connections)
+    telemetry = get_telemetry()
+    if TELEMETRY_PATH is not None:
+        telemetry.open(f"{TELEMETRY_PATH}.{node}")
+    try:
+        asyncio.run(_run(node, channels, duration))
+    except EOFError as e:
+        print(f"[{node}] {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for name, channel in channels.items():
+            print(f"[{node}] 通道{name} {channel.stats()}")
+            channel.close()
+        print(f"[{node}]\n{telemetry.report()}")
+        telemetry.close()
+
+def launch(transport: str=TRANSPORT, duration: float | None=None):
+    """
+    在本机为每个节点启动一个进程
+
+    Args:
+        transport:pipe或tcp
+        duration:运行时长(s), None表示一直运行
+    """
+    context = multiprocessing.get_context("spawn")
+    connections = {node: {} for node in NODES}
+    if transport == "pipe":
+        for name, (sender, receiver, _) in CHANNELS.items():
+            connections[receiver][name], connections[sender][name] = context.Pipe(duplex=False)
+    elif transport != "tcp":
+        raise ValueError(f"未知的传输方式: {transport}")
+
+    processes = [context.Process(target=run_node, name=node, args=(node, connections[node] or None, duration))
+                 for node in NODES]
+    for process in processes:
+        process.start()
+    # 关闭父进程持有的管道端, 任一节点退出时对端能收到EOF
+    for ends in connections.values():
+        for connection in ends.values():
+            connection.close()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="分进程运行节点")
+    parser.add_argument("--transport", default=TRANSPORT, help="传输方式(pipe/tcp)")
+    parser.add_argument("--node", default=None, choices=list(NODES), help="只运行指定节点(tcp)")
+    parser.add_argument("--duration", type=float, default=None, help="运行时长(s), 默认一直运行")
+    args = parser.parse_args()
+    if args.node is not None:
+        run_node(args.node, None, args.duration)
+    else:
+        launch(args.transport, args.duration)
@@ -1,86 +1,346 @@
-import airsim, math, asyncio
+import math, asyncio, time, functools
 import numpy as np
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import methodcaller
+from typing import Callable
 
-from utils import cal_angle, cal_angel_index, cal_pos
+try:
+    import airsim
+except ImportError:
+    # 仅使用进程内模拟器时不需要airsim
+    airsim = None
 
+from config import STATE_MAX_AGE, ARRIVAL_TOLERANCE, ARRIVAL_POLL_RATE, BLEND_RADIUS, MOVE_TIMEOUT_FACTOR, MOVE_TIMEOUT_MIN, \
+    LOCAL_MAP_SIZE, LOCAL_MAP_RESOLUTION, DRONE_BACKEND, SIM_TIME_SCALE
+from local_map import OccupancyGrid
+from telemetry import get_telemetry
+from utils import cal_angle, cal_angel_index, cal_pos, generate_od
 
-class Drone:
-    def __init__(self):
-        # 连接到AirSim模拟器
+
+Z_OFFSET = 0.5 # get_pos返回高度相对指令坐标的偏移
+telemetry = get_telemetry()
+
+
+@dataclass
+class DroneState:
+    """
+    无人机状态快照(一次getMultirotorState调用的结果)
+    """
+    pos: list # 位置NED坐标
+    yaw: float # 朝向角度
+    velocity: list # 线速度
+    timestamp: float # 获取时间(time.monotonic)
+
+    def age(self) -> float:
+        return time.monotonic() - self.timestamp
+
+
+class AirSimBackend:
+    """
+    AirSim无人机后端(一个实例对应一条RPC连接)
+    """
+    def __init__(self, vehicle_name: str=""):
+        """
+        Args:
+            vehicle_name:多机场景中的无人机名(settings.json中的Vehicles), 空字符串表示默认无人机
+        """
+        if airsim is None:
+            raise ImportError("使用AirSim后端需要安装airsim")
         self.client = airsim.MultirotorClient()
+        self.vehicle_name = vehicle_name
+
+    def connect(self):
         self.client.confirmConnection()
-        self.client.enableApiControl(True)
-        self.client.armDisarm(True)
+        self.client.enableApiControl(True, vehicle_name=self.vehicle_name)
+        self.client.armDisarm(True, vehicle_name=self.vehicle_name)
+
+    def read_state(self) -> DroneState:
+        kinematics = self.client.getMultirotorState(vehicle_name=self.vehicle_name).kinematics_estimated
+        position = kinematics.position
+        velocity = kinematics.linear_velocity
+        _, _, yaw = airsim.to_eularian_angles(kinematics.orientation)
+
+        return DroneState(pos=[position.x_val, position.y_val, position.z_val - Z_OFFSET],
+                          yaw=math.degrees(yaw),
+                          velocity=[velocity.x_val, velocity.y_val, velocity.z_val],
+                          timestamp=time.monotonic())
+
+    def read_image(self) -> np.uint8:
+        responses = self.client.simGetImages([airsim.ImageRequest("0", airsim.ImageType.Scene, False, False)],
+                                             vehicle_name=self.vehicle_name)
+        response = responses[0]
+        img1d = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
+
+        return img1d.reshape(response.height, response.width, 3)
+
+    def read_lidar(self) -> np.ndarray:
+        data = self.client.getLidarData(vehicle_name=self.vehicle_name)
+
+        return np.array(data.point_cloud).reshape(-1, 3)
+
+    def move_to(self, pos: list, velocity: float, yaw: float):
+        """
+        发出移动指令(不等待完成)
+        """
+        yaw_mode = airsim.YawMode(is_rate=False, yaw_or_rate=yaw)
+        self.client.moveToPositionAsync(pos[0], pos[1], pos[2], velocity, yaw_mode=yaw_mode,
+                                        vehicle_name=self.vehicle_name)
+
+    def hover(self):
+        self.client.hoverAsync(vehicle_name=self.vehicle_name)
+
+    def take_off(self):
+        self.client.takeoffAsync(vehicle_name=self.vehicle_name).join()
+
+    def land(self):
+        self.client.landAsync(vehicle_name=self.vehicle_name).join()
+        self.client.armDisarm(False, vehicle_name=self.vehicle_name)
+        self.client.enableApiControl(False, vehicle_name=self.vehicle_name)
+
+
+def backend_factory(name: str=DRONE_BACKEND, vehicle_name: str="", origin: tuple=(0.0, 0.0)) -> Callable:
+    """
+    按名称返回无人机后端构造函数(每次调用建立一条新连接)
+
+    Args:
+        name:airsim或sim(进程内运动学模拟器)
+        vehicle_name:AirSim无人机名
+        origin:无人机出生点在全局坐标中的位置(x, y), 模拟器据此将场景平移到无人机本地坐标
+    """
+    if name == "airsim":
+        return functools.partial(AirSimBackend, vehicle_name)
+    if name == "sim":
+        from sim import SimWorld
+        return SimWorld.default(SIM_TIME_SCALE, origin).connect
+    raise ValueError(f"未知的无人机后端: {name}")
+
+_read_state = methodcaller("read_state")
+_read_image = methodcaller("read_image")
+_read_lidar = methodcaller("read_lidar")
+
+
+class SensorStream:
+    """
+    传感器数据流: 独占一个线程与一条RPC连接, 阻塞调用不占用事件循环
+    """
+    def __init__(self, name: str, client_factory: Callable):
+        self.name = name
+        self._client_factory = client_factory
+        self._client = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sensor-{name}")
+
+    def _run(self, func):
+        # 连接在工作线程内建立, 保证每条连接只被一个线程使用
+        if self._client is None:
+            self._client = self._client_factory()
+        return func(self._client)
+
+    async def run(self, func):
+        """
+        在数据流线程中执行func(client)并等待结果
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, func)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class Drone:
+    def __init__(self, client_factory: Callable | None=None):
+        """
+        Args:
+            client_factory:无人机后端构造函数, 默认按配置DRONE_BACKEND选择
+        """
+        # 连接到无人机后端(AirSim或进程内模拟器)
+        client_factory = client_factory or backend_factory()
+        self.client = client_factory()
+        self.client.connect()
+
+        # 各传感器独立的数据流
+        self.streams = {name: SensorStream(name, client_factory) for name in ("camera", "lidar", "state")}
+
+        # 状态快照缓存, 同一控制周期内共享一次RPC结果
+        self.state_max_age = STATE_MAX_AGE
+        self._state = None
+        self._state_request = None
+
+        # RPC调用计数(按数据流分类)与控制周期计数
+        self.rpc_counter = Counter()
+        self.ticks = 0
+        self.legs = 0 # 已完成的导航段数
 
         self.obstacle_diagram = [0] * 72 # 障碍分布图
+        self.local_map = OccupancyGrid(LOCAL_MAP_SIZE, LOCAL_MAP_RESOLUTION) # 激光雷达局部占据栅格
 
-    async def move_to_pos(self, pos: list, velocity: float=1.0):
+    async def move_to_pos(self, pos: list, velocity: float=1.0, tolerance: float=ARRIVAL_TOLERANCE,
+                          timeout: float | None=None, blend: bool=False) -> bool:
         """
-        移动至指定坐标(始终朝向移动方向)
+        移动至指定坐标(始终朝向移动方向), 轮询位置直至到达
+
+        Args:
+            velocity:移动速度
+            tolerance:到达判定距离
+            timeout:最长等待时间(s), 默认按距离与速度估算
+            blend:为True时在进入BLEND_RADIUS后立即返回且不悬停, 便于衔接下一段移动
+        Returns:
+            bool:是否在超时前到达
         """
         # 获取当前位置
-        pos_now = self.get_pos()
+        pos_now = await self.get_pos_async()
         distance = np.linalg.norm(np.array(pos) - np.array(pos_now))
+        if timeout is None:
+            timeout = distance / velocity * MOVE_TIMEOUT_FACTOR + MOVE_TIMEOUT_MIN
 
         # 计算朝向并移动
-        yaw_mode = airsim.YawMode(is_rate=False, yaw_or_rate=cal_angle(pos_now, pos))
-        self.client.moveToPositionAsync(pos[0], pos[1], pos[2], velocity, yaw_mode=yaw_mode)
+        self.rpc_counter["control"] += 1
+        self.client.move_to(pos, velocity, cal_angle(pos_now, pos))
 
-        # 异步
-        await asyncio.sleep(distance / velocity)
-        self.hover()
+        # 按固定频率轮询位置, 到达后立即返回
+        radius = max(tolerance, BLEND_RADIUS) if blend else tolerance
+        arrived = await self.wait_arrival(pos, radius, timeout)
+        if not blend:
+            self.hover()
+
+        return arrived
+
+    async def wait_arrival(self, pos: list, tolerance: float=ARRIVAL_TOLERANCE, timeout: float=10.0) -> bool:
+        """
+        等待无人机到达指定坐标
+
+        Returns:
+            bool:是否在超时前到达
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        target = np.array(pos, dtype=float)
+        with telemetry.span("drone.wait_arrival"):
+            while True:
+                state = await self.get_state_async(max_age=0)
+                # 状态快照中的高度含偏移, 与指令坐标比较前还原
+                current = np.array(state.pos) + np.array([0, 0, Z_OFFSET])
+                if np.linalg.norm(target - current) <= tolerance:
+                    return True
+                if loop.time() >= deadline:
+                    telemetry.count("drone.move_timeout")
+                    return False
+                await asyncio.sleep(1 / ARRIVAL_POLL_RATE)
+
+    async def _rpc(self, stream: str, func):
+        self.rpc_counter[stream] += 1
+        with telemetry.span(f"rpc.{stream}"):
+            return await self.streams[stream].run(func)
+
+    def _is_fresh(self, max_age: float | None) -> bool:
+        max_age = self.state_max_age if max_age is None else max_age
+        return self._state is not None and self._state.age() <= max_age
+
+    def get_state(self, max_age: float | None=None) -> DroneState:
+        """
+        获取无人机状态快照, 缓存未过期时直接返回缓存
+
+        Args:
+            max_age:缓存有效期(s), 默认使用state_max_age
+        """
+        if not self._is_fresh(max_age):
+            self.rpc_counter["state"] += 1
+            self._state = self.client.read_state()
+
+        return self._state
+
+    async def get_state_async(self, max_age: float | None=None) -> DroneState:
+        """
+        异步获取无人机状态快照, 并发的请求共享同一次RPC
+
+        Args:
+            max_age:缓存有效期(s), 默认使用state_max_age
+        """
+        if self._is_fresh(max_age):
+            return self._state
+        if self._state_request is None:
+            self._state_request = asyncio.ensure_future(self._rpc("state", _read_state))
+        request = self._state_request
+        try:
+            self._state = await asyncio.shield(request)
+        finally:
+            if self._state_request is request and request.done():
+                self._state_request = None
+
+        return self._state
 
     def get_facing(self) -> float:
         """
         获取无人机当前朝向
         """
-        state = self.client.getMultirotorState().kinematics_estimated.orientation
-        _, _, yaw = airsim.to_eularian_angles(state)
-        yaw = math.degrees(yaw)
-
-        return yaw
+        return self.get_state().yaw
 
     def get_pos(self) -> list:
         """
         获取无人机当前位置
         """
-        state = self.client.getMultirotorState()
-        position = state.kinematics_estimated.position
-        pos = [position.x_val, position.y_val, position.z_val - 0.5]
+        return list(self.get_state().pos)
 
-        return pos
+    async def get_facing_async(self) -> float:
+        """
+        异步获取无人机当前朝向
+        """
+        return (await self.get_state_async()).yaw
+
+    async def get_pos_async(self) -> list:
+        """
+        异步获取无人机当前位置
+        """
+        return list((await self.get_state_async()).pos)
+
+    def tick(self):
+        """
+        标记一个控制周期
+        """
+        self.ticks += 1
+
+    def rpc_per_tick(self) -> dict:
+        """
+        Returns:
+            dict:各数据流平均每个控制周期的RPC调用次数
+        """
+        ticks = max(self.ticks, 1)
+
+        return {stream: count / ticks for stream, count in self.rpc_counter.items()}
 
     def take_off(self):
         """
         无人机起飞至默认高度
         """
-        self.client.takeoffAsync().join()
+        self.client.take_off()
 
     def land(self):
         """
         无人机降落并脱离控制
         """
-        self.client.landAsync().join()
-        self.client.armDisarm(False)
-        self.client.enableApiControl(False)
+        self.client.land()
     
     def hover(self):
         """
         无人机悬停
         """
-        self.client.hoverAsync()
+        self.rpc_counter["control"] += 1
+        self.client.hover()
 
     def take_photos(self) -> np.uint8:
         """
         使用无人机前置相机拍照
         """
-        responses = self.client.simGetImages([airsim.ImageRequest("0", airsim.ImageType.Scene, False, False)])
-        response = responses[0]
-        img1d = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
-        img_rgb = img1d.reshape(response.height, response.width, 3)
+        self.rpc_counter["camera"] += 1
+        return self.client.read_image()
+
+    async def take_photos_async(self) -> np.uint8:
+        """
+        异步使用无人机前置相机拍照
+        """
+        return await self._rpc("camera", _read_image)
 
-        return img_rgb
-    
     def get_lidar_data(self) -> np.ndarray:
         """
         获取激光雷达点云数据
@@ -88,63 +348,59 @@ class Drone:
         Returns:
             numpy二维数组形式的点云数据(每个元素为一个点的NED坐标)
         """
-        data = self.client.getLidarData()
-        point_cloud = np.array(data.point_cloud)
-        point_cloud = point_cloud.reshape(-1, 3)
+        self.rpc_counter["lidar"] += 1
+        return self.client.read_lidar()
 
-        return point_cloud
-    
-    def _generate_od(self, o_range: float=1.2):
+    async def get_lidar_data_async(self) -> np.ndarray:
+        """
+        异步获取激光雷达点云数据
+        """
+        return await self._rpc("lidar", _read_lidar)
+
+    async def _generate_od(self, o_range: float=1.2):
         """
         生成障碍分布图
 
         Args:
             o_range:障碍物检测范围
         """
-        obstacle_diagram = [0] * 72
-        lidar_data = self.get_lidar_data()
+        lidar_data = await self.get_lidar_data_async()
+        drone_pos = await self.get_pos_async()
+        self.local_map.integrate(drone_pos, lidar_data)
 
-        for point in lidar_data:
-            distance = np.linalg.norm(np.array([point[0], point[1]]))
-            if (distance < o_range) and (abs(point[2] - 0.5) < 0.5):
-                index = cal_angel_index(point)
-                obstacle_diagram[index] += 1
-                index_l = index
-                index_r = index
-                for i in range(18):
-                    index_l = 71 if (index_l == 0) else (index_l - 1)
-                    index_r = 0 if (index_r == 71) else (index_r + 1)
-                    obstacle_diagram[index_l] += 1
-                    obstacle_diagram[index_r] += 1
+        # 实时点云与局部地图中记忆的障碍合并
+        obstacle_diagram = np.maximum(generate_od(lidar_data, o_range), self.local_map.obstacle_diagram(drone_pos, o_range))
+        self.obstacle_diagram = obstacle_diagram.tolist()
 
-        self.obstacle_diagram = obstacle_diagram
-
-    async def move_to_pos_oa(self, pos: list):
+    async def move_to_pos_oa(self, pos: list, blend: bool=False) -> bool:
         """
         向指定坐标方向移动一步(带避障)
+
+        Args:
+            blend:是否与下一步衔接成连续轨迹(不悬停)
         """
-        pos = self._generate_path(pos, 0.7)
-        await self.move_to_pos(pos)
+        pos = await self._generate_path(pos, 0.7)
+        return await self.move_to_pos(pos, blend=blend)
 
-    def _generate_path(self, target_pos: list, step: float=1.0) -> list:
+    async def _generate_path(self, target_pos: list, step: float=1.0) -> list:
         """
         生成下一路径点NED坐标
 
         Args:
             step:无人机移动步长
         """
-        drone_pos = self.get_pos()
-        direction = self._cal_direction(target_pos)
+        drone_pos = await self.get_pos_async()
+        direction = await self._cal_direction(target_pos)
         next_pos = cal_pos(drone_pos, direction, step)
 
         return list(next_pos)
     
-    def _cal_direction(self, target_pos: list) -> int:
+    async def _cal_direction(self, target_pos: list) -> int:
         """
         计算无人机移动方向(角度)
         """
-        self._generate_od()
-        drone_pos = self.get_pos()
+        await self._generate_od()
+        drone_pos = await self.get_pos_async()
         ref_angel = cal_angel_index(np.array(target_pos) - np.array(drone_pos), 1)
         
         index = int(ref_angel / 5)
@@ -0,0 +1,173 @@
+"""
+多机搜救: 每架无人机独立运行相机/控制/agent节点, 共享同一YOLO推理线程与大模型请求池, 搜索区域按条带分配
+
+python -m fleet [--backend sim] [--duration 600]
+"""
+import time, asyncio, argparse
+import numpy as np
+from dataclasses import dataclass, field
+
+from config import *
+from detector import get_detector, get_worker
+from drone import Drone, backend_factory
+from frame_buffer import FrameRing
+from llm import RequestPool, aclose_clients
+from planner import split_area, sweep
+from telemetry import get_telemetry
+import nodes.agent_node
+import nodes.camera_node
+import nodes.drone_node
+
+
+@dataclass
+class FleetMember:
+    """
+    机群中的一架无人机及其节点间队列
+    """
+    name: str
+    origin: tuple # 出生点世界坐标(x, y)
+    area: tuple # 分配的搜索区域(x1, y1, x2, y2, 世界坐标)
+    way_points: list # 导航点(无人机本地坐标)
+    drone: Drone
+    agent: nodes.agent_node.Agent
+    frames: FrameRing
+    action_queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    feedback_queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    distance: float = 0.0 # 累计飞行距离(m)
+    last_pos: np.ndarray | None = None
+
+
+class Fleet:
+    """
+    机群: 将搜索区域按无人机数量切分为条带, 每架无人机在自己的条带内往复搜寻
+    """
+    def __init__(self, vehicles: dict=FLEET_VEHICLES, area: tuple=FLEET_AREA, lane_spacing: float=FLEET_LANE_SPACING,
+                 backend: str=DRONE_BACKEND, pool: RequestPool | None=None, z: float=-1.0):
+        """
+        Args:
+            vehicles:无人机名 -> 出生点世界坐标(x, y)
+            area:搜索区域世界坐标(x1, y1, x2, y2)
+            lane_spacing:往复航线间距(m), 同时作为估算搜索面积的扫描宽度
+            backend:无人机后端(airsim/sim)
+            pool:共享的大模型请求池, 默认按配置新建
+            z:飞行高度(NED)
+        """
+        self.lane_spacing = lane_spacing
+        self.pool = pool or RequestPool()
+        self.members = []
+        for (name, origin), strip in zip(vehicles.items(), split_area(area, len(vehicles))):
+            ox, oy = origin
+            # 各无人机的坐标以自身出生点为原点
+            way_points = [[x - ox, y - oy, z] for x, y in sweep(strip, lane_spacing, strip[2] - strip[0])]
+            self.members.append(FleetMember(name, origin, strip, way_points,
+                                            Drone(backend_factory(backend, name, origin)),
+                                            nodes.agent_node.create_agent(name, self.pool),
+                                            FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS)))
+        self._start = None
+
+    async def track(self, interval: float=1.0):
+        """
+        周期性读取各无人机位置, 累计飞行距离
+        """
+        while True:
+            for member in self.members:
+                pos = np.array(await member.drone.get_pos_async())
+                if member.last_pos is not None:
+                    member.distance += float(np.linalg.norm(pos[:2] - member.last_pos[:2]))
+                member.last_pos = pos
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:各无人机与机群整体的搜索面积(m²/min)、识别帧率与人员检测速率(/s)
+        """
+        elapsed = time.perf_counter() - self._start if self._start else 0.0
+        minutes = max(elapsed / 60, 1e-9)
+        seconds = max(elapsed, 1e-9)
+        drones = {}
+        for member in self.members:
+            area = member.distance * self.lane_spacing
+            drones[member.name] = {"legs": f"{member.drone.legs}/{len(member.way_points)}",
+                                   "area_m2": area,
+                                   "area_per_min": area / minutes,
+                                   "fps": member.agent.frames / seconds,
+                                   "detections_per_s": member.agent.person_frames / seconds}
+        total_area = sum(item["area_m2"] for item in drones.values())
+
+        return {"elapsed_s": elapsed,
+                "drones": drones,
+                "area_per_min": total_area / minutes,
+                "fps": sum(member.agent.frames for member in self.members) / seconds,
+                "detections_per_s": sum(member.agent.person_frames for member in self.members) / seconds,
+                "pool": self.pool.stats(),
+                "worker": get_worker().stats()}
+
+    def report(self) -> str:
+        stats = self.stats()
+        lines = [f"机群运行 {stats['elapsed_s']:.0f}s, 搜索{stats['area_per_min']:.0f}m²/min, "
+                 f"识别{stats['fps']:.1f}帧/s, 人员检测{stats['detections_per_s']:.2f}次/s"]
+        for name, item in stats["drones"].items():
+            lines.append(f"  {name}: 导航段{item['legs']}, 搜索{item['area_m2']:.0f}m² ({item['area_per_min']:.0f}m²/min), "
+                         f"识别{item['fps']:.1f}帧/s, 人员检测{item['detections_per_s']:.2f}次/s")
+        lines.append(f"  大模型请求池 {stats['pool']}")
+        lines.append(f"  YOLO推理线程 {stats['worker']}")
+
+        return "\n".join(lines)
+
+    async def report_loop(self, interval: float=FLEET_REPORT_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            print(self.report())
+
+    async def run(self, report_interval: float=FLEET_REPORT_INTERVAL):
+        """
+        运行全部无人机的节点直至取消
+        """
+        self._start = time.perf_counter()
+        telemetry = get_telemetry()
+        queues = {}
+        tasks = [self.track(), self.report_loop(report_interval)]
+        for member in self.members:
+            queues[f"{member.name}.action"] = member.action_queue
+            queues[f"{member.name}.feedback"] = member.feedback_queue
+            tasks += [nodes.camera_node.main(member.drone, member.frames, 0.1),
+                      nodes.drone_node.main(member.drone, member.action_queue, member.feedback_queue, member.frames,
+                                            member.way_points),
+                      nodes.agent_node.main(member.frames.reader(), member.action_queue, member.feedback_queue,
+                                            member.agent)]
+        tasks.append(telemetry.sample_queues(queues, TELEMETRY_SAMPLE_INTERVAL))
+        await asyncio.gather(*tasks)
+
+    def close(self):
+        for member in self.members:
+            member.frames.close()
+
+
+async def main(backend: str=DRONE_BACKEND, duration: float | None=None):
+    detector = get_detector()
+    detector.load()
+    print(f"YOLO模型加载完成 {detector.stats()}")
+    fleet = Fleet(backend=backend)
+    for member in fleet.members:
+        print(f"{member.name} 搜索区域 {member.area}, 导航点 {len(member.way_points)} 个")
+    telemetry = get_telemetry()
+    if TELEMETRY_PATH is not None:
+        telemetry.open(TELEMETRY_PATH)
+    try:
+        await asyncio.wait_for(fleet.run(), duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        print(fleet.report())
+        fleet.close()
+        await aclose_clients()
+        print(telemetry.report())
+        telemetry.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多机搜救")
+    parser.add_argument("--backend", default=DRONE_BACKEND, help="无人机后端(airsim/sim)")
+    parser.add_argument("--duration", type=float, default=None, help="运行时长(s), 默认一直运行")
+    args = parser.parse_args()
+    asyncio.run(main(args.backend, args.duration))
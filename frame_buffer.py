@@ -0,0 +1,185 @@
+import asyncio, time
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+from config import FRAME_RING_SLOTS
+from telemetry import get_telemetry
+
+
+telemetry = get_telemetry()
+
+
+@dataclass
+class Frame:
+    """
+    环形缓冲区中的一帧(image为缓冲区的只读视图)
+    """
+    seq: int # 帧序号(从0递增)
+    timestamp: float # 写入时间(time.time)
+    image: np.ndarray
+
+
+class FrameRing:
+    """
+    预分配的相机帧环形缓冲区, 可放在共享内存中供其他进程零拷贝读取
+
+    写入时每个槽位先标记为-1再拷贝图像, 读取方通过槽位序号判断数据是否完整。
+    视图在之后写入slots-1帧前保持有效, 需要长期保存的帧请调用valid检查或自行拷贝。
+    """
+    def __init__(self, shape: tuple | None=None, slots: int=FRAME_RING_SLOTS, shared: bool=False,
+                 name: str | None=None, create: bool=True):
+        """
+        Args:
+            shape:单帧形状(H, W, 3), 非共享模式下可为None, 按首帧形状分配
+            slots:槽位数量
+            shared:是否使用multiprocessing.shared_memory
+            name:共享内存名称(attach时必需)
+            create:是否创建共享内存(否则连接已存在的共享内存)
+        """
+        if shared and shape is None:
+            raise ValueError("共享内存模式必须指定帧形状")
+        self.slots = slots
+        self.shared = shared
+        self._shm = None
+        self._event = None
+        self._create = create
+        self.shape = None
+        if shape is not None:
+            self._allocate(tuple(shape), name)
+
+    @classmethod
+    def attach(cls, name: str, shape: tuple, slots: int=FRAME_RING_SLOTS) -> "FrameRing":
+        """
+        连接其他进程创建的共享内存缓冲区
+        """
+        return cls(shape, slots, shared=True, name=name, create=False)
+
+    @property
+    def name(self) -> str | None:
+        return self._shm.name if self._shm is not None else None
+
+    def _allocate(self, shape: tuple, name: str | None):
+        self.shape = shape
+        header_size = 8 * (2 * self.slots + 1)
+        frame_size = int(np.prod(shape))
+        if self.shared:
+            if self._create:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=header_size + frame_size * self.slots)
+            else:
+                self._shm = shared_memory.SharedMemory(name=name)
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(header_size + frame_size * self.slots)
+
+        # 头部: 各槽位序号, 各槽位时间戳, 最新帧序号
+        self._seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=buffer, offset=0)
+        self._stamps = np.ndarray((self.slots,), dtype=np.float64, buffer=buffer, offset=8 * self.slots)
+        self._latest = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=16 * self.slots)
+        self._frames = np.ndarray((self.slots, *shape), dtype=np.uint8, buffer=buffer, offset=header_size)
+        if self._create:
+            self._seqs[:] = -1
+            self._latest[0] = -1
+
+    def write(self, image: np.ndarray, timestamp: float | None=None) -> int:
+        """
+        写入一帧(覆盖最旧的槽位)
+
+        Args:
+            timestamp:拍摄时间(time.time), 默认为写入时间
+
+        Returns:
+            int:写入帧的序号
+        """
+        if self.shape is None:
+            self._allocate(image.shape, None)
+        elif image.shape != self.shape:
+            raise ValueError(f"帧形状{image.shape}与缓冲区{self.shape}不一致")
+
+        seq = int(self._latest[0]) + 1
+        slot = seq % self.slots
+        self._seqs[slot] = -1
+        self._frames[slot] = image
+        self._stamps[slot] = time.time() if timestamp is None else timestamp
+        self._seqs[slot] = seq
+        self._latest[0] = seq
+
+        if self._event is not None:
+            self._event.set()
+
+        return seq
+
+    def latest(self) -> Frame | None:
+        """
+        读取最新一帧, 缓冲区为空时返回None
+        """
+        if self.shape is None:
+            return None
+        seq = int(self._latest[0])
+        if seq < 0:
+            return None
+        slot = seq % self.slots
+        if self._seqs[slot] != seq:
+            return None
+        image = self._frames[slot]
+        image.flags.writeable = False
+
+        return Frame(seq, float(self._stamps[slot]), image)
+
+    def valid(self, frame: Frame) -> bool:
+        """
+        帧视图是否仍未被覆盖
+        """
+        return self._seqs[frame.seq % self.slots] == frame.seq
+
+    async def get(self, after: int=-1, since: float=0.0, poll: float=0.005) -> Frame:
+        """
+        等待并返回序号大于after且拍摄时间不早于since的最新帧
+
+        Args:
+            after:已读取的帧序号
+            since:最早拍摄时间(time.time)
+            poll:跨进程读取时的轮询间隔(s)
+        """
+        if self._event is None:
+            self._event = asyncio.Event()
+        while True:
+            frame = self.latest()
+            if frame is not None and frame.seq > after and frame.timestamp >= since:
+                return frame
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), poll)
+            except asyncio.TimeoutError:
+                pass
+
+    def reader(self) -> "FrameReader":
+        return FrameReader(self)
+
+    def close(self):
+        if self._shm is not None:
+            self._frames = self._seqs = self._stamps = self._latest = None
+            self._shm.close()
+            if self._create:
+                self._shm.unlink()
+            self._shm = None
+
+
+class FrameReader:
+    """
+    帧读取游标: 每次get返回上次读取之后的最新帧
+    """
+    def __init__(self, ring: FrameRing):
+        self.ring = ring
+        self.last_seq = -1
+        self.dropped = 0 # 跳过的帧数
+
+    async def get(self) -> Frame:
+        frame = await self.ring.get(self.last_seq)
+        if self.last_seq >= 0 and frame.seq > self.last_seq + 1:
+            # 处理不及时被跳过的帧
+            self.dropped += frame.seq - self.last_seq - 1
+            telemetry.count("frames.dropped", frame.seq - self.last_seq - 1)
+        self.last_seq = frame.seq
+
+        return frame
@@ -1,10 +1,18 @@
-from openai import AsyncOpenAI, OpenAI
+from openai import AsyncOpenAI, OpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, Timeout, DEFAULT_CONNECTION_LIMITS
 from config import *
 from enum import Enum, unique
+from collections import OrderedDict, deque
 import numpy as np
 from PIL import Image
 import io
 import base64
+import weakref
+import asyncio
+import threading
+import time
+import contextlib
+
+from telemetry import get_telemetry
 
 
 @unique
@@ -14,51 +22,352 @@ class Role(Enum):
     assistant = "assistant"
 
 
-def encode_image(img: np.uint8, bgr_signal: bool=False) -> str:
-    if bgr_signal:
-        img = img[..., ::-1]
-    image = Image.fromarray(np.uint8(img))
-    buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+telemetry = get_telemetry()
+
+
+def _resize(img: np.uint8, max_side: int | None, use_cv2: bool) -> np.uint8:
+    h, w = img.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return img
+    scale = max_side / max(h, w)
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if use_cv2:
+        import cv2
+        return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+    return np.asarray(Image.fromarray(img).resize(size, Image.BILINEAR))
+
+def encode_image(img: np.uint8, bgr_signal: bool=False, fmt: str=IMAGE_FORMAT, quality: int=IMAGE_QUALITY,
+                 max_side: int | None=IMAGE_MAX_SIDE, use_cv2: bool=IMAGE_USE_CV2) -> str:
+    """
+    将图像编码为base64字符串
+
+    Args:
+        bgr_signal:输入图像是否为BGR通道顺序
+        fmt:编码格式(JPEG/WEBP/PNG)
+        quality:JPEG/WEBP编码质量(1-100)
+        max_side:长边最大像素数, 超出时等比缩小, None表示不缩放
+        use_cv2:是否使用OpenCV编码器
+    """
+    fmt = fmt.upper()
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"不支持的图像格式: {fmt}")
+    img = _resize(np.ascontiguousarray(img, dtype=np.uint8), max_side, use_cv2)
+
+    if use_cv2:
+        import cv2
+        if not bgr_signal:
+            img = img[..., ::-1]
+        params = {"JPEG": [cv2.IMWRITE_JPEG_QUALITY, quality],
+                  "WEBP": [cv2.IMWRITE_WEBP_QUALITY, quality],
+                  "PNG": [cv2.IMWRITE_PNG_COMPRESSION, 3]}[fmt]
+        ok, buffer = cv2.imencode("." + fmt.lower().replace("jpeg", "jpg"), np.ascontiguousarray(img), params)
+        if not ok:
+            raise ValueError(f"OpenCV编码{fmt}失败")
+        data = buffer.tobytes()
+    else:
+        if bgr_signal:
+            img = img[..., ::-1]
+        image = Image.fromarray(np.ascontiguousarray(img))
+        buffered = io.BytesIO()
+        if fmt == "PNG":
+            image.save(buffered, format=fmt)
+        else:
+            image.save(buffered, format=fmt, quality=quality)
+        data = buffered.getvalue()
+
+    return base64.b64encode(data).decode('utf-8')
+
+
+_encode_cache = OrderedDict() # (id, 编码参数) -> (弱引用, data url)
+
+def image_data_url(img: np.uint8, bgr_signal: bool=False, **kwargs) -> str:
+    """
+    将图像编码为data url, 按帧对象身份缓存结果
+
+    同一图像对象重复发送(如重试)时直接复用编码结果, 原地修改过内容的图像对象不会重新编码。
+    其余参数同encode_image。
+    """
+    settings = {"fmt": IMAGE_FORMAT, "quality": IMAGE_QUALITY, "max_side": IMAGE_MAX_SIDE, "use_cv2": IMAGE_USE_CV2}
+    settings.update(kwargs)
+    key = (id(img), bgr_signal, *settings.values())
+    cached = _encode_cache.get(key)
+    if cached is not None and cached[0]() is img:
+        _encode_cache.move_to_end(key)
+        return cached[1]
+
+    with telemetry.span("image.encode"):
+        url = f"data:{MIME_TYPES[settings['fmt'].upper()]};base64,{encode_image(img, bgr_signal, **settings)}"
+    _encode_cache[key] = (weakref.ref(img), url)
+    while len(_encode_cache) > IMAGE_CACHE_SIZE:
+        _encode_cache.popitem(last=False)
+
+    return url
+
+
+_clients = {} # (api_key, base_url) -> OpenAI
+_async_clients = weakref.WeakKeyDictionary() # 事件循环 -> {(api_key, base_url): AsyncOpenAI}
+_clients_lock = threading.Lock()
+
+def _http_options() -> dict:
+    # openai未直接导出Limits, 取其默认连接限制的类型构造, 避免依赖具体的HTTP库
+    limits = type(DEFAULT_CONNECTION_LIMITS)
+    return {"limits": limits(max_connections=LLM_MAX_CONNECTIONS,
+                             max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                             keepalive_expiry=LLM_KEEPALIVE_EXPIRY),
+            "timeout": Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)}
+
+def get_client(api_key: str=API_KEY, base_url: str=BASE_URL) -> OpenAI:
+    """
+    获取共享的同步客户端(复用连接池)
+    """
+    key = (api_key, base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = OpenAI(api_key=api_key, base_url=base_url, max_retries=LLM_MAX_RETRIES,
+                                   http_client=DefaultHttpxClient(**_http_options()))
+        return _clients[key]
+
+def get_async_client(api_key: str=API_KEY, base_url: str=BASE_URL) -> AsyncOpenAI:
+    """
+    获取当前事件循环共享的异步客户端(复用连接池, 连接不能跨事件循环使用)
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (api_key, base_url)
+    if key not in clients:
+        clients[key] = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=LLM_MAX_RETRIES,
+                                   http_client=DefaultAsyncHttpxClient(**_http_options()))
+    return clients[key]
+
+async def aclose_clients():
+    """
+    关闭当前事件循环的异步客户端与全部同步客户端
+    """
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+    close_clients()
+
+def close_clients():
+    """
+    关闭全部同步客户端
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _message_bytes(message: dict) -> int:
+    """
+    估算单条消息上传的字节数
+    """
+    content = message["content"]
+    if isinstance(content, str):
+        return len(content.encode())
+    size = 0
+    for part in content:
+        if part["type"] == "text":
+            size += len(part["text"].encode())
+        else:
+            size += len(part["image_url"]["url"])
+
+    return size
+
+def _has_image(message: dict) -> bool:
+    return isinstance(message["content"], list) and any(part["type"] == "image_url" for part in message["content"])
+
+
+class RequestPool:
+    """
+    大模型请求池: 多个LLM实例共享, 限制异步请求的并发数与发送速率
+    """
+    def __init__(self, max_concurrency: int=LLM_POOL_CONCURRENCY, rate: float | None=LLM_POOL_RATE):
+        """
+        Args:
+            max_concurrency:同时进行的最大请求数
+            rate:每秒最多发出的请求数, None表示不限制
+        """
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.requests = 0 # 已发出的请求数
+        self.in_flight = 0 # 进行中的请求数
+        self.max_in_flight = 0
+        self.wait_times = deque(maxlen=500) # 请求排队耗时(s)
+        self._semaphores = weakref.WeakKeyDictionary() # 事件循环 -> asyncio.Semaphore
+        self._next_time = 0.0 # 下一请求最早发出时间(time.monotonic)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """
+        占用一个请求名额, 用法: async with pool.slot(): ...
+        """
+        start = time.perf_counter()
+        async with self._semaphore():
+            if self.rate:
+                now = time.monotonic()
+                send_time = max(now, self._next_time)
+                self._next_time = send_time + 1 / self.rate
+                if send_time > now:
+                    await asyncio.sleep(send_time - now)
+            self.wait_times.append(time.perf_counter() - start)
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:请求数与排队耗时统计(单位ms)
+        """
+        waits = np.array(self.wait_times) * 1000 if self.wait_times else np.zeros(1)
 
-    return img_str
+        return {"requests": self.requests,
+                "max_in_flight": self.max_in_flight,
+                "wait_mean_ms": float(waits.mean()),
+                "wait_p95_ms": float(np.percentile(waits, 95))}
 
 
 class LLM:
-    def __init__(self, model: str=MODEL_VL3, api_key: str=API_KEY, base_url: str=BASE_URL, init_msg: str="你是一个人工智能助手。"):
+    def __init__(self, model: str=MODEL_VL3, api_key: str=API_KEY, base_url: str=BASE_URL, init_msg: str="你是一个人工智能助手。",
+                 max_messages: int | None=LLM_MAX_MESSAGES, max_images: int | None=LLM_MAX_IMAGES,
+                 max_prompt_bytes: int | None=LLM_MAX_PROMPT_BYTES, pool: RequestPool | None=None):
+        """
+        Args:
+            max_messages:保留的最近消息条数(不含系统消息), None表示不限制
+            max_images:保留图像的最近消息条数, 更早的图像替换为文字摘要, None表示不限制
+            max_prompt_bytes:单次请求消息总字节数上限, None表示不限制
+            pool:共享的请求池(限制异步请求并发数与速率), None表示不限制
+        """
         self.model = model
         self.api_key = api_key
         self.base_url = base_url
         self.messages = [{"role": "system", "content": init_msg}]
         self.init_msg = init_msg
+        self.max_messages = max_messages
+        self.max_images = max_images
+        self.max_prompt_bytes = max_prompt_bytes
+        self.latencies = deque(maxlen=500) # 远程调用耗时(s)
+        self.prompt_sizes = deque(maxlen=500) # 每次请求的消息总字节数
+        self.pool = pool
 
     async def _call_llm_async(self) -> str:
-        client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-        )
+        client = get_async_client(self.api_key, self.base_url)
 
-        completion = await client.chat.completions.create(
-            model=self.model,
-            messages=self.messages
-            )
+        self.prompt_sizes.append(self.prompt_bytes())
+        async with self.pool.slot() if self.pool is not None else contextlib.nullcontext():
+            start = time.perf_counter()
+            completion = await client.chat.completions.create(
+                model=self.model,
+                messages=self.messages
+                )
+            self.latencies.append(time.perf_counter() - start)
         
         return completion.choices[0].message.content
     
     def _call_llm(self) -> str:
-        client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-        )
+        client = get_client(self.api_key, self.base_url)
 
+        self.prompt_sizes.append(self.prompt_bytes())
+        start = time.perf_counter()
         completion = client.chat.completions.create(
             model=self.model,
             messages=self.messages
             )
+        self.latencies.append(time.perf_counter() - start)
         
         return completion.choices[0].message.content
 
+    def latency_stats(self) -> dict:
+        """
+        Returns:
+            dict:调用延迟统计(单位ms)
+        """
+        if not self.latencies:
+            return {"calls": 0, "mean_ms": 0.0, "p95_ms": 0.0}
+        latencies = np.array(self.latencies) * 1000
+
+        return {"calls": len(latencies),
+                "mean_ms": float(latencies.mean()),
+                "p95_ms": float(np.percentile(latencies, 95))}
+
+    def prompt_bytes(self) -> int:
+        """
+        当前对话记录的总字节数
+        """
+        return sum(_message_bytes(message) for message in self.messages)
+
+    def prompt_stats(self) -> dict:
+        """
+        Returns:
+            dict:请求消息字节数统计
+        """
+        if not self.prompt_sizes:
+            return {"calls": 0, "last_bytes": 0, "mean_bytes": 0.0, "max_bytes": 0}
+        sizes = np.array(self.prompt_sizes)
+
+        return {"calls": len(sizes),
+                "last_bytes": int(sizes[-1]),
+                "mean_bytes": float(sizes.mean()),
+                "max_bytes": int(sizes.max())}
+
+    def _strip_image(self, index: int):
+        """
+        将消息中的图像替换为文字摘要(取其后助手回答的开头)
+        """
+        message = self.messages[index]
+        text = "".join(part["text"] for part in message["content"] if part["type"] == "text")
+        summary = "历史图像已省略"
+        if index + 1 < len(self.messages) and self.messages[index + 1]["role"] == Role.assistant.value:
+            reply = self.messages[index + 1]["content"]
+            if isinstance(reply, str):
+                summary += f", 当时回答: {reply[:40]}"
+        message["content"] = f"{text}[{summary}]"
+
+    def _prune_messages(self):
+        """
+        按上下文管理策略裁剪对话记录, 始终保留系统消息与最后一条消息
+        """
+        # 仅保留最近max_images条消息中的图像
+        if self.max_images is not None:
+            image_indexes = [i for i, message in enumerate(self.messages) if _has_image(message)]
+            for index in image_indexes[:max(len(image_indexes) - self.max_images, 0)]:
+                self._strip_image(index)
+
+        # 滑动窗口, 保证窗口以用户消息开始
+        if self.max_messages is not None:
+            history = self.messages[1:][-max(self.max_messages, 1):]
+            while len(history) > 1 and history[0]["role"] != Role.user.value:
+                history.pop(0)
+            self.messages = self.messages[:1] + history
+
+        # 字节预算: 先去除最早的图像, 再丢弃最早的消息
+        if self.max_prompt_bytes is not None:
+            size = self.prompt_bytes()
+            for index in range(1, len(self.messages) - 1):
+                if size <= self.max_prompt_bytes:
+                    break
+                if _has_image(self.messages[index]):
+                    size -= _message_bytes(self.messages[index])
+                    self._strip_image(index)
+                    size += _message_bytes(self.messages[index])
+            while size > self.max_prompt_bytes and len(self.messages) > 2:
+                size -= _message_bytes(self.messages.pop(1))
+                while len(self.messages) > 2 and self.messages[1]["role"] != Role.user.value:
+                    size -= _message_bytes(self.messages.pop(1))
+
     def _update_messages(self, role: Role, text: str, image=None):
         if image is None:
             new_message = {"role": role.value, "content": text}
@@ -72,15 +381,30 @@ class LLM:
             new_message = {"role": role.value, "content": [
                         {"type": "text", "text": text},
                         {"type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{encode_image(image)}"}}
+                        "image_url": {"url": image_data_url(image)}}
                         ]}
 
         self.messages.append(new_message)
+        if role == Role.user:
+            self._prune_messages()
 
-    async def call_async(self, text: str, image=None) -> str:
-        """可接受格式为url或np.uint8的image"""
+    async def call_async(self, text: str, image=None, timeout: float | None=None) -> str:
+        """
+        可接受格式为url或np.uint8的image
+
+        超时(asyncio.TimeoutError)或被取消时撤回本次提问, 对话记录保持调用前状态
+        """
+        # 追加提问时的裁剪会去除旧图像、丢弃旧消息, 失败时整体恢复(裁剪只替换消息的content, 浅拷贝即可)
+        snapshot = [dict(message) for message in self.messages]
         self._update_messages(Role.user, text, image)
-        output = await self._call_llm_async()
+        try:
+            with telemetry.span(f"llm.{self.model}"):
+                output = await asyncio.wait_for(self._call_llm_async(), timeout)
+        except BaseException as e:
+            self.messages = snapshot
+            if isinstance(e, asyncio.TimeoutError):
+                telemetry.count("llm.timeout")
+            raise
         self._update_messages(Role.assistant, output)
 
         return output
@@ -88,7 +412,8 @@ class LLM:
     def call(self, text: str, image=None) -> str:
         """可接受格式为url或np.uint8的image"""
         self._update_messages(Role.user, text, image)
-        output = self._call_llm()
+        with telemetry.span(f"llm.{self.model}"):
+            output = self._call_llm()
         self._update_messages(Role.assistant, output)
 
         return output
@@ -0,0 +1,154 @@
+import numpy as np
+
+from utils import generate_od
+
+
+class OccupancyGrid:
+    """
+    以无人机为中心的滚动二维占据栅格, 融合多帧激光雷达点云
+
+    点云按与障碍分布图相同的约定处理: 各点为相对无人机的坐标(坐标轴与世界NED坐标系一致)。
+    每个栅格保存饱和计数, 命中时增加, 被射线穿过时减少; 无人机远离中心后栅格整体平移, 内存占用固定。
+    """
+    def __init__(self, size: float=60.0, resolution: float=0.2, hit: int=2, miss: int=1, max_count: int=20,
+                 threshold: int=2, z_band: tuple=(0.0, 1.0)):
+        """
+        Args:
+            size:栅格覆盖的边长(m)
+            resolution:单个栅格边长(m)
+            hit:点云命中时增加的计数
+            miss:射线穿过时减少的计数
+            max_count:计数上限
+            threshold:判定为障碍的最小计数
+            z_band:参与建图的相对高度范围
+        """
+        self.resolution = resolution
+        self.cells = int(round(size / resolution))
+        self.hit = hit
+        self.miss = miss
+        self.max_count = max_count
+        self.threshold = threshold
+        self.z_band = z_band
+        self.grid = np.zeros((self.cells, self.cells), dtype=np.int16)
+        self.origin = None # 栅格[0, 0]左下角的世界坐标(x, y)
+
+    def _snap_origin(self, pos: list) -> np.ndarray:
+        half = self.cells * self.resolution / 2
+        return np.floor((np.asarray(pos[:2], dtype=float) - half) / self.resolution) * self.resolution
+
+    def recenter(self, pos: list, margin: float=0.25):
+        """
+        无人机偏离栅格中心超过边长的margin倍时平移栅格
+        """
+        origin = self._snap_origin(pos)
+        if self.origin is None:
+            self.origin = origin
+            return
+        shift = np.round((origin - self.origin) / self.resolution).astype(int)
+        if np.abs(shift).max() <= self.cells * margin:
+            return
+
+        di, dj = shift
+        grid = np.zeros_like(self.grid)
+        n = self.cells
+        src_i, dst_i = slice(max(di, 0), n + min(di, 0)), slice(max(-di, 0), n + min(-di, 0))
+        src_j, dst_j = slice(max(dj, 0), n + min(dj, 0)), slice(max(-dj, 0), n + min(-dj, 0))
+        if abs(di) < n and abs(dj) < n:
+            grid[dst_i, dst_j] = self.grid[src_i, src_j]
+        self.grid = grid
+        self.origin = self.origin + shift * self.resolution
+
+    def world_to_cell(self, xy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        世界坐标转换为栅格序号(可能越界, 需配合inside使用)
+        """
+        index = np.floor((np.asarray(xy, dtype=float)[..., :2] - self.origin) / self.resolution).astype(int)
+        return index[..., 0], index[..., 1]
+
+    def cell_to_world(self, i, j) -> np.ndarray:
+        """
+        栅格序号转换为栅格中心的世界坐标
+        """
+        return self.origin + (np.stack([i, j], axis=-1) + 0.5) * self.resolution
+
+    def inside(self, i, j) -> np.ndarray:
+        return (i >= 0) & (i < self.cells) & (j >= 0) & (j < self.cells)
+
+    def integrate(self, drone_pos: list, lidar_data: np.ndarray, ray_samples: int=8):
+        """
+        融合一帧点云
+
+        Args:
+            drone_pos:无人机位置NED坐标
+            lidar_data:相对无人机的点云数据
+            ray_samples:每条射线上清除的采样点数
+        """
+        self.recenter(drone_pos)
+        lidar_data = np.asarray(lidar_data, dtype=float).reshape(-1, 3)
+        z = lidar_data[:, 2]
+        points = lidar_data[(z > self.z_band[0]) & (z < self.z_band[1]), :2]
+        if len(points) == 0:
+            return
+        origin = np.asarray(drone_pos[:2], dtype=float)
+        flat = self.grid.reshape(-1)
+
+        # 射线穿过的栅格计数减少(不含端点)
+        if ray_samples > 0 and self.miss:
+            t = (np.arange(ray_samples) + 0.5) / (ray_samples + 1)
+            samples = origin + points[:, None, :] * t[None, :, None]
+            i, j = self.world_to_cell(samples.reshape(-1, 2))
+            mask = self.inside(i, j)
+            free = np.unique(i[mask] * self.cells + j[mask])
+            flat[free] = np.maximum(flat[free] - self.miss, 0)
+
+        # 点云命中的栅格计数增加
+        i, j = self.world_to_cell(origin + points)
+        mask = self.inside(i, j)
+        hits = np.unique(i[mask] * self.cells + j[mask])
+        flat[hits] = np.minimum(flat[hits] + self.hit, self.max_count)
+
+    def occupied(self) -> np.ndarray:
+        """
+        Returns:
+            布尔数组形式的障碍栅格
+        """
+        return self.grid >= self.threshold
+
+    def is_occupied(self, xy) -> np.ndarray | bool:
+        """
+        查询世界坐标处是否有障碍(栅格范围外视为无障碍)
+        """
+        if self.origin is None:
+            return False
+        i, j = self.world_to_cell(np.asarray(xy, dtype=float))
+        mask = self.inside(i, j)
+        result = np.zeros(np.shape(i), dtype=bool)
+        result[mask] = self.grid[i[mask], j[mask]] >= self.threshold
+
+        return result if result.ndim else bool(result)
+
+    def obstacles_near(self, pos: list, radius: float) -> np.ndarray:
+        """
+        返回pos附近radius范围内障碍栅格中心的相对坐标(N, 2)
+        """
+        if self.origin is None:
+            return np.zeros((0, 2))
+        r = int(np.ceil(radius / self.resolution)) + 1
+        ci, cj = self.world_to_cell(np.asarray(pos[:2], dtype=float))
+        i0, i1 = max(ci - r, 0), min(ci + r + 1, self.cells)
+        j0, j1 = max(cj - r, 0), min(cj + r + 1, self.cells)
+        if i0 >= i1 or j0 >= j1:
+            return np.zeros((0, 2))
+        i, j = np.nonzero(self.grid[i0:i1, j0:j1] >= self.threshold)
+        relative = self.cell_to_world(i + i0, j + j0) - np.asarray(pos[:2], dtype=float)
+
+        return relative[np.hypot(relative[:, 0], relative[:, 1]) < radius]
+
+    def obstacle_diagram(self, pos: list, o_range: float=1.2) -> np.ndarray:
+        """
+        由栅格中记忆的障碍生成72区间障碍分布图
+        """
+        relative = self.obstacles_near(pos, o_range)
+        points = np.hstack((relative, np.full((len(relative), 1), 0.5)))
+
+        return generate_od(points, o_range)
@@ -2,20 +2,59 @@ import asyncio
 
 from config import *
 import nodes
-from drone import Drone
+from drone import Drone, backend_factory
+from detector import get_detector
+from frame_buffer import FrameRing
+from llm import aclose_clients
+from replay import Player, Recorder, Recording
+from telemetry import get_telemetry
+from utils import LoopLagMonitor
 import nodes.agent_node
 import nodes.camera_node
 import nodes.drone_node
 
 
 async def main():
-    drone = Drone()
+    # 回放录制数据或录制本次任务
+    agent = nodes.agent_node.create_agent()
+    recorder = None
+    if REPLAY_PATH is not None:
+        player = Player(Recording(REPLAY_PATH), realtime=REPLAY_REALTIME)
+        drone = Drone(player.connect)
+        for llm in (agent.small_llm, agent.large_llm):
+            player.attach_llm(llm)
+    elif RECORD_PATH is not None:
+        recorder = Recorder(RECORD_PATH)
+        drone = Drone(recorder.wrap(backend_factory()))
+        for llm in (agent.small_llm, agent.large_llm):
+            recorder.attach_llm(llm)
+    else:
+        drone = Drone()
+    detector = get_detector()
+    detector.load()
+    print(f"YOLO模型加载完成 {detector.stats()}")
     action_queue = asyncio.Queue()
     feedback_queue = asyncio.Queue()
-    img_queue = asyncio.Queue(maxsize=1)
-    await asyncio.gather(nodes.camera_node.main(drone, img_queue, 0.1),
-                         nodes.drone_node.main(drone, action_queue, feedback_queue),
-                         nodes.agent_node.main(img_queue, action_queue, feedback_queue))
+    frames = FrameRing(CAMERA_SHAPE, FRAME_RING_SLOTS, shared=FRAME_RING_SHARED)
+    lag_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL)
+    telemetry = get_telemetry()
+    if TELEMETRY_PATH is not None:
+        telemetry.open(TELEMETRY_PATH)
+    try:
+        await asyncio.gather(lag_monitor.run(LOOP_LAG_REPORT),
+                             telemetry.sample_queues({"action": action_queue, "feedback": feedback_queue},
+                                                     TELEMETRY_SAMPLE_INTERVAL),
+                             nodes.camera_node.main(drone, frames, 0.1),
+                             nodes.drone_node.main(drone, action_queue, feedback_queue, frames),
+                             nodes.agent_node.main(frames.reader(), action_queue, feedback_queue, agent))
+    finally:
+        frames.close()
+        await aclose_clients()
+        if recorder is not None:
+            recorder.close()
+            print(f"录制完成 {recorder.counts}")
+        print(telemetry.report())
+        telemetry.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,125 +1,241 @@
 import asyncio
-from ultralytics import YOLO
 import time
 import numpy as np
 import cv2
+from dataclasses import dataclass
 
-from llm import LLM
+from llm import LLM, RequestPool
+from detector import get_worker
+from frame_buffer import FrameReader
 from config import *
 from utils import check_queue
+from vision import dhash, SceneGate
+from response_cache import ResponseCache
+from action_lib import ACTIONS, action_prompt, parse_action
+from tracker import Tracker
+from telemetry import get_telemetry
 
 
-model = YOLO("models/yolo11x.pt")  # 使用 YOLOv11 Extra-Large 模型
-small_llm = LLM(init_msg="你是一个执行搜救任务的人工智能助手，请根据信息判断附近是否有被困人员。")
-large_llm = LLM(model=MODEL_MAX_VL,
-                init_msg="你是一个执行搜救任务的人工智能助手，请根据信息判断附近是否有被困人员，如果有，请从操作库中选择需要执行的操作(每次只可选择1种操作)。")
+@dataclass
+class Agent:
+    """
+    单架无人机的agent状态: 对话记录、判断缓存、画面门控与人员跟踪
+    """
+    small_llm: LLM
+    large_llm: LLM
+    triage_cache: ResponseCache
+    scene_gate: SceneGate
+    tracker: Tracker
+    name: str = "" # 无人机名(多机时用于区分输出)
+    frames: int = 0 # 已识别帧数
+    person_frames: int = 0 # 识别到人员的帧数
+
+def create_agent(name: str="", pool: RequestPool | None=None, cache_path: str | None=TRIAGE_CACHE_PATH) -> Agent:
+    """
+    Args:
+        name:无人机名
+        pool:共享的大模型请求池
+        cache_path:小模型判断结果磁盘缓存路径
+    """
+    small_llm = LLM(init_msg="你是一个执行搜救任务的人工智能助手，请根据信息判断附近是否有被困人员。", pool=pool)
+    large_llm = LLM(model=MODEL_MAX_VL,
+                    init_msg="你是一个执行搜救任务的人工智能助手，请根据信息判断附近是否有被困人员，如果有，请从操作库中选择需要执行的操作(每次只可选择1种操作)。",
+                    pool=pool)
+
+    return Agent(small_llm, large_llm,
+                 ResponseCache(TRIAGE_CACHE_SIZE, TRIAGE_CACHE_TTL, TRIAGE_CACHE_DISTANCE, cache_path),
+                 SceneGate(SCENE_CHANGE_THRESHOLD, max_skips=SCENE_MAX_SKIPS), Tracker(min_hits=1), name)
+
+telemetry = get_telemetry()
+TRIAGE_PROMPT = "参考YOLO模型的识别结果判断附近是否可能有被困人员，请回答'有'或'没有'。"
+ACTION_PROMPT = action_prompt()
     
-def yolo_fliter(image: np.uint8) -> tuple[np.uint8, list]:
+def scene_layout(classes: set, boxes: list, grid: int=TRIAGE_CACHE_GRID) -> str:
     """
-    yolo模型识别并过滤掉结果中过小的框
+    识别目标的布局摘要, 作为判断缓存键的一部分
 
+    感知哈希对画面中的小目标不敏感, 新出现的人员只改变少量哈希位, 因此目标类别集合与人员检测框位置须完全一致才复用缓存。
     Args:
-        image:场景图像
-    Returns:
-        np.uint8:过滤后识别结果图像
-        list:过滤后识别结果列表
+        classes:识别目标集合
+        boxes:检测框(类别名, 置信度, x1, y1, x2, y2)
+        grid:人员检测框坐标取整的网格大小(px)
     """
-    image = image.copy()
-    results = model(image, verbose=False)
-    detected_classes = set()
-    MIN_HEIGHT = 120
-    MIN_CONFIDENCE = 0.5
+    people = sorted(tuple(round(v / grid) for v in box[2:]) for box in boxes if box[0] == "person")
 
-    for result in results:
-        boxes = result.boxes.cpu().numpy()
-        for box in boxes:
-            x1, y1, x2, y2 = box.xyxy[0]
-            class_id = box.cls[0]
-            bbox_height = y2 - y1
-            confidence = box.conf[0]
+    return f"{','.join(sorted(classes))}|{';'.join(','.join(map(str, box)) for box in people)}"
 
-            if bbox_height > MIN_HEIGHT and confidence > MIN_CONFIDENCE:
-                detected_classes.add(result.names[class_id])
-                label = f"{result.names[int(class_id)]} {confidence:.2f}"
-                cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-                cv2.putText(image, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)               
+@telemetry.timed("agent.triage")
+async def triage(agent: Agent, image: np.uint8, layout: str="") -> bool:
+    """
+    小模型判断附近是否可能有被困人员, 相同画面直接复用缓存结论
 
-    return image, detected_classes
+    Args:
+        image:YOLO识别结果图像
+        layout:识别目标布局摘要(scene_layout)
+    """
+    scene = dhash(image)
+    key = f"{TRIAGE_PROMPT}\0{layout}"
+    cached = agent.triage_cache.get(key, scene)
+    if cached is not None:
+        return cached == "有"
+
+    try:
+        answer = await agent.small_llm.call_async(TRIAGE_PROMPT, image, timeout=LLM_TRIAGE_TIMEOUT)
+        while (presence := parse_presence(answer)) is None:
+            answer = await agent.small_llm.call_async("格式输出错误，请回答'有'或'没有'。", image, timeout=LLM_TRIAGE_TIMEOUT)
+        agent.triage_cache.put(key, scene, "有" if presence else "没有")
+
+        return presence
+    finally:
+        agent.small_llm.clear_messages()
+
+async def detect(agent: Agent, image: np.uint8) -> tuple[np.uint8, set, list, str]:
+    """
+    识别图像并更新人员跟踪
 
+    Returns:
+        识别结果图像, 目标集合(含background), 新出现的人员轨迹, 目标布局摘要
+    """
+    with telemetry.span("agent.detect"):
+        detections = await get_worker().detect(image)
+    with telemetry.span("tracker.update"):
+        agent.tracker.update(detections)
+    agent.frames += 1
+    if "person" in detections.classes:
+        agent.person_frames += 1
+    detections.classes.add('background')
+
+    return detections.image, detections.classes, agent.tracker.new, scene_layout(detections.classes, detections.boxes)
 
-async def observe(img_queue: asyncio.Queue, action_queue: asyncio.Queue, detected_classes: set, feedback_queue: asyncio.Queue):
+async def observe(agent: Agent, frames: FrameReader, action_queue: asyncio.Queue, detected_classes: set, feedback_queue: asyncio.Queue):
     """
     识别场景中的异常并判断是否与任务有关
+
+    小模型判断期间持续识别新帧, 新帧中出现不同的目标时取消进行中的判断并改用新帧。
     Args:
-        img_queue:相机图像队列
+        agent:该无人机的agent状态
+        frames:相机帧读取游标
         action_queue:无人机动作队列
         detected_classes:上次检测目标集合
         feedback_queue:反馈信息队列
     """
-    image = await img_queue.get()
-    result, new_detected_classes = yolo_fliter(image)
+    image = (await frames.get()).image
+    if not agent.scene_gate.changed(image):
+        return detected_classes
+    # 识别与判断在推理线程和远程调用中进行, 期间缓冲区槽位可能被覆盖, 拷贝后再交出
+    result, new_detected_classes, new_people, layout = await detect(agent, image.copy())
+
+    # 目标集合不变且没有新的人员(已跟踪的同一人员不重复判断)
+    if new_detected_classes <= detected_classes and not new_people:
+        return new_detected_classes.copy()
 
-    new_detected_classes.add('background')
-    if not new_detected_classes <= detected_classes:
-        answer = small_llm.call("参考YOLO模型的识别结果判断附近是否可能有被困人员，请回答'有'或'没有'。", result)
-        
+    triage_task = asyncio.create_task(triage(agent, result, layout))
+    try:
         while True:
-            if "没有" in answer:
+            frame_task = asyncio.create_task(frames.get())
+            done, _ = await asyncio.wait({triage_task, frame_task}, return_when=asyncio.FIRST_COMPLETED)
+            if triage_task in done:
+                frame_task.cancel()
                 break
-            elif "有" in answer:
-                # cv2.imshow("Detection Result", image)  # 第一个参数是窗口名，第二个是图像
-                # cv2.waitKey(0)  # 等待按键
-                await make_decision(img_queue, action_queue, feedback_queue)
-                break
-            else:
-                answer = small_llm.call("格式输出错误，请回答'有'或'没有'。", result)
 
-        small_llm.clear_messages()
+            # 新帧中目标集合变化且仍有未见过的目标时, 原判断已过时
+            newer_image = frame_task.result().image
+            if not agent.scene_gate.changed(newer_image):
+                continue
+            newer, newer_classes, newer_people, newer_layout = await detect(agent, newer_image.copy())
+            if newer_people or (newer_classes != new_detected_classes and not newer_classes <= detected_classes):
+                triage_task.cancel()
+                await asyncio.gather(triage_task, return_exceptions=True)
+                new_detected_classes = newer_classes
+                triage_task = asyncio.create_task(triage(agent, newer, newer_layout))
+
+        if triage_task.result():
+            with telemetry.span("agent.decision"):
+                await make_decision(agent, frames, action_queue, feedback_queue)
+    except asyncio.TimeoutError:
+        # 大模型响应超时, 保留原检测集合并清除画面门控的参考帧, 使下一帧(即使画面静止)重新判断
+        print("大模型响应超时, 跳过本次判断")
+        agent.scene_gate.reset()
+        return detected_classes
+    finally:
+        triage_task.cancel()
     
     return new_detected_classes.copy()
 
-async def make_decision(img_queue: asyncio.Queue, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue):
+def parse_presence(answer: str) -> bool | None:
+    """
+    解析'有'/'没有'形式的回答, 无法识别时返回None
+    """
+    if "没有" in answer:
+        return False
+    elif "有" in answer:
+        return True
+
+    return None
+
+def parse_decision(answer: str) -> tuple[bool | None, str | None]:
+    """
+    解析是否有被困人员的回答及其中包含的操作
+
+    Returns:
+        是否有被困人员(无法识别时为None), 动作名(否定回答时始终为None)
+    """
+    presence = parse_presence(answer)
+    if presence is False:
+        return False, None
+
+    return presence, parse_action(answer)
+
+async def make_decision(agent: Agent, frames: FrameReader, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue):
     """
     场景判断并作出相应决策
     Args:
-        img_queue:相机图像队列
+        agent:该无人机的agent状态
+        frames:相机帧读取游标
         action_queue:无人机动作队列
         feedback_queue:反馈信息队列
     """
-    image = await img_queue.get()
-    answer = large_llm.call("附近是否可能有被困人员，请回答'有'或'没有'。", image)
-    
-    while True:
-        if "没有" in answer:
-            large_llm.del_last_message()
-            break
-        elif "有" in answer:
-            answer = large_llm.call("请选择需要执行的操作。(可执行操作包含:'移动至被困人员处','在被困人员物品周围搜寻被困人员','通知总部找到被困人员','向被困人员发放紧急救援物资','安抚被困人员','继续寻找其他被困人员')", image)
-            while True:
-                if "在被困人员物品周围搜寻被困人员" in answer:
-                    action_queue.put_nowait("seek")
-                elif "移动至被困人员处" in answer:
-                    action_queue.put_nowait("moveto")
-                elif "通知总部找到被困人员" in answer:
-                    action_queue.put_nowait("broadcast")
-                elif "向被困人员发放紧急救援物资" in answer:
-                    action_queue.put_nowait("drop")
-                elif "安抚被困人员" in answer:
-                    action_queue.put_nowait("console")
-                elif "继续寻找其他被困人员" in answer:
-                    action_queue.put_nowait("seek_next")
-                    feedback = await check_feedback(feedback_queue)
-                    large_llm.user_put(feedback)
-                    break
-                else:
-                    answer = large_llm.call("未从回答中识别到可执行操作，请输出正确的需要执行的操作。(可执行操作包含:'移动至被困人员处','在被困人员物品周围搜寻被困人员','通知总部找到被困人员','向被困人员发放紧急救援物资','安抚被困人员','继续寻找其他被困人员')", image)
-                
-                feedback = await check_feedback(feedback_queue)
-                image = await img_queue.get()
-                answer = large_llm.call(feedback, image)
+    # 决策过程跨越多次远程调用, 拷贝帧以免缓冲区槽位被覆盖
+    image = (await frames.get()).image.copy()
+    answer = await agent.large_llm.call_async("附近是否可能有被困人员，请回答'有'或'没有'。", image, timeout=LLM_DECISION_TIMEOUT)
+
+    # 回答中已包含可执行操作时直接采用, 省去一次询问; 否定回答中提到的操作不执行
+    presence, action = parse_decision(answer)
+    while action is None:
+        if presence is False:
+            agent.large_llm.del_last_message()
             break
+        elif presence is True:
+            answer = await agent.large_llm.call_async(f"请选择需要执行的操作。{ACTION_PROMPT}", image, timeout=LLM_DECISION_TIMEOUT)
+            action = parse_action(answer)
+            while action is None:
+                answer = await agent.large_llm.call_async(f"未从回答中识别到可执行操作，请输出正确的需要执行的操作。{ACTION_PROMPT}", image,
+                                                    timeout=LLM_DECISION_TIMEOUT)
+                action = parse_action(answer)
         else:
-            answer = large_llm.call("格式输出错误，请回答选择需要执行的操作或'没有'。", image)
+            answer = await agent.large_llm.call_async("格式输出错误，请回答选择需要执行的操作或'没有'。", image, timeout=LLM_DECISION_TIMEOUT)
+            presence, action = parse_decision(answer)
+
+    while action is not None:
+        with telemetry.span("agent.action"):
+            action_queue.put_nowait(action)
+            feedback = await check_feedback(feedback_queue)
+        if ACTIONS[action].resume:
+            agent.large_llm.user_put(feedback)
+            break
+
+        image = (await frames.get()).image.copy()
+        answer = await agent.large_llm.call_async(f"{feedback}{ACTION_PROMPT}", image, timeout=LLM_DECISION_TIMEOUT)
+        action = parse_action(answer)
+        while action is None:
+            answer = await agent.large_llm.call_async(f"未从回答中识别到可执行操作，请输出正确的需要执行的操作。{ACTION_PROMPT}", image,
+                                                timeout=LLM_DECISION_TIMEOUT)
+            action = parse_action(answer)
+
+    prompt_stats = agent.large_llm.prompt_stats()
+    latency_stats = agent.large_llm.latency_stats()
+    print(f"{agent.name}大模型请求 {prompt_stats['calls']}次, 最近请求{prompt_stats['last_bytes'] / 1024:.0f}KB, "
+          f"平均延迟{latency_stats['mean_ms']:.0f}ms")
 
 async def check_feedback(feedback_queue: asyncio.Queue):
     feedback = None
@@ -128,8 +244,16 @@ async def check_feedback(feedback_queue: asyncio.Queue):
 
     return feedback
 
-async def main(img_queue: asyncio.Queue, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue):
+async def main(frames: FrameReader, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue, agent: Agent | None=None):
+    agent = agent or create_agent()
     detected_classes = set(['background'])
+    reported = 0 # 上次打印统计时的门控检查帧数
     while True:
-        detected_classes = await observe(img_queue, action_queue, detected_classes, feedback_queue)
+        with telemetry.span("agent.observe"):
+            detected_classes = await observe(agent, frames, action_queue, detected_classes, feedback_queue)
+        # 一次observe可能检查多帧, 按累计帧数而非整除判断
+        if agent.scene_gate.checked - reported >= SCENE_REPORT_FRAMES:
+            reported = agent.scene_gate.checked
+            stats = agent.tracker.stats()
+            print(f"{agent.name}画面无变化跳过识别比例 {agent.scene_gate.skip_rate():.0%}, 跟踪平均耗时{stats['mean_ms']:.2f}ms")
 
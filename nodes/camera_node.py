@@ -1,17 +1,40 @@
 import drone
 import asyncio
+import cv2
+import numpy as np
 
+from frame_buffer import FrameRing
+from telemetry import get_telemetry
 
-async def main(drone: drone.Drone, img_queue: asyncio.Queue, refresh_time: float):
+
+telemetry = get_telemetry()
+
+def fit_frame(image: np.uint8, shape: tuple | None) -> np.uint8 | None:
+    """
+    将相机图像调整为缓冲区的帧形状
+
+    Args:
+        shape:缓冲区帧形状(H, W, 3), None表示尚未分配
+    Returns:
+        调整后的图像, 空图像或通道数不符时返回None
+    """
+    if image is None or image.ndim != 3 or image.size == 0:
+        return None
+    if shape is None or image.shape == tuple(shape):
+        return image
+    if image.shape[2] != shape[2]:
+        return None
+    # 相机分辨率与缓冲区不一致(如修改了settings.json), 缩放后写入
+    telemetry.count("camera.resized")
+
+    return cv2.resize(image, (shape[1], shape[0]), interpolation=cv2.INTER_AREA)
+
+async def main(drone: drone.Drone, frames: FrameRing, refresh_time: float):
     while True:
-        img_rgb = drone.take_photos()
-        try:
-            img_queue.put_nowait(img_rgb)
-        except asyncio.QueueFull:
-            try:
-                img_queue.get_nowait()
-            except img_queue.Empty:
-                print("Unexpected state: img_queue was reported as full but was empty.")
-            
-            img_queue.put_nowait(img_rgb)
-        await asyncio.sleep(refresh_time)
\ No newline at end of file
+        with telemetry.span("camera.frame"):
+            image = fit_frame(await drone.take_photos_async(), frames.shape)
+            if image is None:
+                telemetry.count("camera.dropped")
+            else:
+                frames.write(image)
+        await asyncio.sleep(refresh_time)
@@ -4,66 +4,75 @@ from typing import Callable
 
 import drone
 from action_lib import *
-from utils import check_queue
+from action_executor import ActionExecutor
+from frame_buffer import FrameRing
+from perception import Perception
+from planner import PathPlanner
+from telemetry import get_telemetry
 
     
-def match_action(action: str) -> Callable[[drone.Drone, asyncio.Queue], bool]:
+def match_action(action: str) -> Callable[[drone.Drone, asyncio.Queue, Perception], bool] | None:
     """
     根据动作名返回相应的动作函数
     """
-    if action == "seek":
-        return seek
-    elif action == "moveto":
-        return moveto
-    elif action == "broadcast":
-        return broadcast
-    elif action == "drop":
-        return drop
-    elif action == "console":
-        return console
-    elif action == "seek_next":
-        return seek_next
-    else:
-        return None
+    item = ACTIONS.get(action)
+
+    return item.handler if item is not None else None
     
-async def check_action_status(drone: drone.Drone, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue) -> bool:
+async def check_action_status(executor: ActionExecutor, action_queue: asyncio.Queue, timeout: float=0.5) -> bool:
     """
     检查当前无人机行动状态并反馈
 
+    Args:
+        timeout:等待新动作的最长时间(s)
     Returns:
         bool:是否跳过下一导航点
     """
-    signal = False
-    action = await check_queue(action_queue)
-    if action is not None:
-        while True:
-            action_func = match_action(action)
-            signal = await action_func(drone, feedback_queue)
-            if signal: break
-            action = await action_queue.get()
-
-    return signal
+    return await executor.poll(action_queue, timeout)
 
-async def main(drone: drone.Drone, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue):
-    way_points = [
-                  [-38, 0, -1],
-                  [-56.5, -46, -1],
-                  [-65, -0.7, -1],
-                  [-100, -0.7, -1]
-                  ]  
+async def main(drone: drone.Drone, action_queue: asyncio.Queue, feedback_queue: asyncio.Queue, frames: FrameRing,
+               way_points: list | None=None):
+    """
+    Args:
+        way_points:导航点NED坐标(无人机本地坐标), 默认为单机任务的固定航线
+    """
+    if way_points is None:
+        way_points = [
+                      [-38, 0, -1],
+                      [-56.5, -46, -1],
+                      [-65, -0.7, -1],
+                      [-100, -0.7, -1]
+                      ]
+    executor = ActionExecutor(drone, feedback_queue, Perception(frames), match_action)
+    planner = PathPlanner(drone.local_map)
+    telemetry = get_telemetry()
     await drone.move_to_pos([0, 0, -1])
     signal = False
 
     while True:
         for target_pos in way_points:
+            with telemetry.span("planner.plan"):
+                await planner.plan_async(await drone.get_pos_async(), target_pos)
             if signal:
                 for i in range(10):
-                    await drone.move_to_pos_oa(target_pos)
+                    await drone.move_to_pos_oa(planner.next_waypoint(await drone.get_pos_async(), target_pos), blend=True)
 
-            while np.linalg.norm(np.array(target_pos) - np.array(drone.get_pos())) >= 1:
-                await drone.move_to_pos_oa(target_pos)
-                signal = await check_action_status(drone, action_queue, feedback_queue)
+            while np.linalg.norm(np.array(target_pos) - np.array(pos := await drone.get_pos_async())) >= 1:
+                drone.tick()
+                with telemetry.span("drone_node.step"):
+                    # 新障碍阻断剩余路径时重新规划, 无可行路径时冷却期内不再重试
+                    if not planner.cooling_down(target_pos) and planner.blocked(pos):
+                        with telemetry.span("planner.plan"):
+                            await planner.plan_async(pos, target_pos)
+                    await drone.move_to_pos_oa(planner.next_waypoint(pos, target_pos), blend=True)
+                # 连续轨迹模式下不等待动作队列, 避免打断移动
+                signal = await check_action_status(executor, action_queue, 0)
                 if signal: break
+            drone.hover()
+            drone.legs += 1
+
+            rpc_per_tick = ", ".join(f"{stream}:{count:.2f}" for stream, count in drone.rpc_per_tick().items())
+            print(f"平均每控制周期RPC次数 {rpc_per_tick}, 累计路径规划 {planner.plans} 次(失败{planner.failures}次)")
 
 
 
@@ -0,0 +1,97 @@
+import asyncio
+
+from detector import Detections, InferenceWorker, get_worker
+from frame_buffer import FrameRing
+
+
+class Perception:
+    """
+    后台感知任务: 持续识别最新相机帧, 并将检测结果推送给订阅者
+    """
+    def __init__(self, frames: FrameRing, worker: InferenceWorker | None=None):
+        self.frames = frames
+        self.worker = worker or get_worker()
+        self.latest = None # 最新检测结果
+        self._version = 0
+        self._condition = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._condition = asyncio.Condition()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        reader = self.frames.reader()
+        while True:
+            frame = await reader.get()
+            try:
+                # 推理线程处理期间缓冲区槽位可能被覆盖, 交出拷贝
+                detections = await self.worker.detect(frame.image.copy())
+            except Exception as e:
+                print(f"感知任务识别失败: {e}")
+                continue
+            detections.seq = frame.seq
+            detections.timestamp = frame.timestamp
+            async with self._condition:
+                self.latest = detections
+                self._version += 1
+                self._condition.notify_all()
+
+    async def capture(self, since: float=0.0) -> Detections:
+        """
+        识别一帧拍摄时间不早于since(time.time)的图像, 不启动持续识别
+
+        用于只在指定拍摄点识别的场景(如覆盖搜寻)
+        """
+        frame = await self.frames.get(since=since)
+        detections = await self.worker.detect(frame.image.copy())
+        detections.seq = frame.seq
+        detections.timestamp = frame.timestamp
+
+        return detections
+
+    def subscribe(self, since: float=0.0) -> "DetectionStream":
+        """
+        订阅检测结果
+
+        Args:
+            since:只接收拍摄时间不早于since(time.time)的帧
+        """
+        return DetectionStream(self, since)
+
+
+class DetectionStream:
+    """
+    检测结果订阅: 每次get返回上次之后的最新结果(跳过来不及处理的旧结果)
+    """
+    def __init__(self, perception: Perception, since: float):
+        self.perception = perception
+        self.since = since
+        self._version = 0
+
+    async def get(self) -> Detections:
+        perception = self.perception
+        perception.start()
+        async with perception._condition:
+            await perception._condition.wait_for(
+                lambda: perception._version > self._version and perception.latest.timestamp >= self.since)
+            self._version = perception._version
+
+            return perception.latest
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Detections:
+        return await self.get()
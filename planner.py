@@ -0,0 +1,382 @@
+import time, heapq, math, asyncio
+import numpy as np
+
+from config import *
+from local_map import OccupancyGrid
+
+
+_NEIGHBORS = [(-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+              (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))]
+
+
+def inflate(occupied: np.ndarray, radius: int) -> np.ndarray:
+    """
+    按圆形邻域膨胀障碍栅格(为无人机留出安全距离)
+
+    Args:
+        radius:膨胀半径(栅格数)
+    """
+    if radius <= 0:
+        return occupied.copy()
+    result = occupied.copy()
+    n, m = occupied.shape
+    for di in range(-radius, radius + 1):
+        for dj in range(-radius, radius + 1):
+            if (di or dj) and di * di + dj * dj <= radius * radius:
+                result[max(di, 0):n + min(di, 0), max(dj, 0):m + min(dj, 0)] |= \
+                    occupied[max(-di, 0):n + min(-di, 0), max(-dj, 0):m + min(-dj, 0)]
+
+    return result
+
+def astar(occupied: np.ndarray, start: tuple, goal: tuple, max_expansions: int | None=None) -> list | None:
+    """
+    八邻域A*栅格路径搜索
+
+    Args:
+        occupied:布尔障碍栅格
+        start:起点栅格序号(i, j), 起点处的障碍被忽略
+        goal:终点栅格序号(i, j)
+        max_expansions:最多扩展的栅格数, 超出时视为无可行路径, None表示不限制
+    Returns:
+        栅格序号列表(含起点与终点), 无可行路径时返回None
+    """
+    n, m = occupied.shape
+    if not (0 <= goal[0] < n and 0 <= goal[1] < m) or occupied[goal]:
+        return None
+    start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+    g_score = np.full(n * m, np.inf)
+    parent = np.full(n * m, -1, dtype=np.int64)
+    closed = np.zeros(n * m, dtype=bool)
+    blocked = occupied.reshape(-1)
+    gi, gj = goal
+
+    def heuristic(i, j):
+        # 八邻域下的octile距离
+        di, dj = abs(i - gi), abs(j - gj)
+        return max(di, dj) + (math.sqrt(2) - 1) * min(di, dj)
+
+    start_index = start[0] * m + start[1]
+    goal_index = gi * m + gj
+    g_score[start_index] = 0.0
+    heap = [(heuristic(*start), 0.0, start_index)]
+    expansions = 0
+    while heap:
+        _, g, index = heapq.heappop(heap)
+        if closed[index]:
+            continue
+        if index == goal_index:
+            path = [index]
+            while parent[path[-1]] >= 0:
+                path.append(int(parent[path[-1]]))
+            return [divmod(index, m) for index in reversed(path)]
+        # 终点不可达时A*会扩展整张栅格, 限制扩展数以控制单次规划耗时
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            return None
+        closed[index] = True
+        i, j = divmod(index, m)
+        for di, dj, cost in _NEIGHBORS:
+            ni, nj = i + di, j + dj
+            if ni < 0 or ni >= n or nj < 0 or nj >= m:
+                continue
+            neighbor = ni * m + nj
+            if blocked[neighbor] or closed[neighbor]:
+                continue
+            # 斜向移动不穿过障碍拐角
+            if di and dj and (blocked[i * m + nj] or blocked[ni * m + j]):
+                continue
+            new_g = g + cost
+            if new_g < g_score[neighbor]:
+                g_score[neighbor] = new_g
+                parent[neighbor] = index
+                heapq.heappush(heap, (new_g + heuristic(ni, nj), new_g, neighbor))
+
+    return None
+
+def line_of_sight(occupied: np.ndarray, a: tuple, b: tuple) -> bool:
+    """
+    判断两个栅格之间的连线是否无障碍
+    """
+    steps = int(max(abs(b[0] - a[0]), abs(b[1] - a[1]))) * 2 + 1
+    i = np.rint(np.linspace(a[0], b[0], steps)).astype(int)
+    j = np.rint(np.linspace(a[1], b[1], steps)).astype(int)
+    n, m = occupied.shape
+    mask = (i >= 0) & (i < n) & (j >= 0) & (j < m)
+
+    return not occupied[i[mask], j[mask]].any()
+
+def smooth(occupied: np.ndarray, path: list) -> list:
+    """
+    视线捷径平滑: 删除可直接连通的中间路径点
+    """
+    if len(path) <= 2:
+        return list(path)
+    result = [path[0]]
+    anchor = 0
+    while anchor < len(path) - 1:
+        farthest = anchor + 1
+        for k in range(len(path) - 1, anchor, -1):
+            if line_of_sight(occupied, path[anchor], path[k]):
+                farthest = k
+                break
+        result.append(path[farthest])
+        anchor = farthest
+
+    return result
+
+
+class PathPlanner:
+    """
+    基于局部占据栅格的航段路径规划器, 新障碍阻断剩余路径时重新规划
+    """
+    def __init__(self, local_map: OccupancyGrid, clearance: float=0.6, lookahead: float=2.0,
+                 max_expansions: int | None=PLANNER_MAX_EXPANSIONS, replan_cooldown: float=PLANNER_REPLAN_COOLDOWN):
+        """
+        Args:
+            local_map:局部占据栅格
+            clearance:与障碍保持的距离(m)
+            lookahead:跟踪路径时的前视距离(m)
+            max_expansions:单次A*最多扩展的栅格数
+            replan_cooldown:规划失败后同一终点暂停重新规划的时间(s)
+        """
+        self.local_map = local_map
+        self.clearance = clearance
+        self.lookahead = lookahead
+        self.max_expansions = max_expansions
+        self.replan_cooldown = replan_cooldown
+        self.path = [] # 平滑后的世界坐标路径点(x, y)
+        self.plans = 0 # 规划次数
+        self.failures = 0 # 无可行路径(退化为直线)的次数
+        self._failed = None # 最近一次规划失败的终点(x, y)与时间(time.monotonic)
+
+    def _occupied(self, pos: list) -> np.ndarray:
+        """
+        膨胀后的障碍栅格, 无人机所在邻域保留原始栅格以免起点被膨胀区域困住
+        """
+        raw = self.local_map.occupied()
+        radius = int(math.ceil(self.clearance / self.local_map.resolution))
+        occupied = inflate(raw, radius)
+        i, j = self.local_map.world_to_cell(np.asarray(pos[:2], dtype=float))
+        region = (slice(max(i - radius, 0), max(i + radius + 1, 0)), slice(max(j - radius, 0), max(j + radius + 1, 0)))
+        occupied[region] = raw[region]
+
+        return occupied
+
+    def _clamp_goal(self, pos: list, goal: list) -> np.ndarray:
+        """
+        终点在栅格范围外时取连线与栅格边界(留出余量)的交点
+        """
+        local_map = self.local_map
+        low = local_map.origin + local_map.resolution
+        high = local_map.origin + (local_map.cells - 1) * local_map.resolution
+        start, goal = np.asarray(pos[:2], dtype=float), np.asarray(goal[:2], dtype=float)
+        if np.all(goal > low) and np.all(goal < high):
+            return goal
+        direction = goal - start
+        scale = 1.0
+        for axis in range(2):
+            if direction[axis] > 0:
+                scale = min(scale, (high[axis] - start[axis]) / direction[axis])
+            elif direction[axis] < 0:
+                scale = min(scale, (low[axis] - start[axis]) / direction[axis])
+
+        return start + direction * max(scale, 0.0)
+
+    def _prepare(self, pos: list, goal: list) -> tuple:
+        """
+        平移栅格并取出本次规划所需的障碍栅格快照(在事件循环线程中执行, 与点云融合不并发)
+        """
+        local_map = self.local_map
+        local_map.recenter(pos)
+        occupied = self._occupied(pos)
+        goal_xy = self._clamp_goal(pos, goal)
+        start = local_map.world_to_cell(np.asarray(pos[:2], dtype=float))
+        end = local_map.world_to_cell(goal_xy)
+        self.plans += 1
+
+        return occupied, start, end, goal_xy, local_map.origin.copy()
+
+    def _search(self, occupied: np.ndarray, start: tuple, end: tuple) -> list | None:
+        cells = astar(occupied, start, end, self.max_expansions)
+
+        return smooth(occupied, cells) if cells is not None else None
+
+    def _finish(self, cells: list | None, goal: list, goal_xy: np.ndarray, origin: np.ndarray) -> list:
+        if cells is None:
+            self.failures += 1
+            self._failed = (tuple(np.asarray(goal[:2], dtype=float)), time.monotonic())
+            self.path = [np.asarray(goal[:2], dtype=float)]
+            return self.path
+        self._failed = None
+        # 按规划时的栅格原点换算, 规划期间栅格可能已平移
+        self.path = [origin + (np.array([i, j]) + 0.5) * self.local_map.resolution for i, j in cells[1:]]
+        if np.allclose(goal_xy, goal[:2]) or not self.path:
+            self.path.append(np.asarray(goal[:2], dtype=float))
+        else:
+            # 终点在栅格外, 先到达边界点再继续规划
+            self.path[-1] = goal_xy
+
+        return self.path
+
+    def plan(self, pos: list, goal: list) -> list:
+        """
+        规划从pos到goal的平滑路径, 无可行路径时退化为直线
+
+        Returns:
+            世界坐标路径点列表(不含起点)
+        """
+        occupied, start, end, goal_xy, origin = self._prepare(pos, goal)
+
+        return self._finish(self._search(occupied, start, end), goal, goal_xy, origin)
+
+    async def plan_async(self, pos: list, goal: list) -> list:
+        """
+        同plan, 路径搜索在线程池中进行, 不阻塞事件循环
+        """
+        occupied, start, end, goal_xy, origin = self._prepare(pos, goal)
+        cells = await asyncio.get_running_loop().run_in_executor(None, self._search, occupied, start, end)
+
+        return self._finish(cells, goal, goal_xy, origin)
+
+    def cooling_down(self, goal: list) -> bool:
+        """
+        最近一次对该终点的规划失败且尚在冷却时间内(直线路径始终被阻断, 避免每步都重新规划)
+        """
+        if self._failed is None:
+            return False
+        failed_goal, failed_at = self._failed
+
+        return np.allclose(failed_goal, goal[:2]) and time.monotonic() - failed_at < self.replan_cooldown
+
+    def blocked(self, pos: list) -> bool:
+        """
+        剩余路径是否被新出现的障碍阻断
+        """
+        if not self.path:
+            return True
+        local_map = self.local_map
+        occupied = self._occupied(pos)
+        points = [np.asarray(pos[:2], dtype=float)] + self.path
+        cells = [local_map.world_to_cell(point) for point in points]
+        for a, b in zip(cells, cells[1:]):
+            if not line_of_sight(occupied, a, b):
+                return True
+
+        return False
+
+    def next_waypoint(self, pos: list, goal: list) -> list:
+        """
+        返回跟踪路径的下一目标点(前视距离内已到达的路径点被丢弃)
+        """
+        xy = np.asarray(pos[:2], dtype=float)
+        goal_xy = np.asarray(goal[:2], dtype=float)
+        if len(self.path) == 1 and not np.allclose(self.path[0], goal_xy) and np.linalg.norm(self.path[0] - xy) < self.lookahead:
+            # 接近栅格边界的中间终点, 以当前位置为中心继续规划
+            self.plan(pos, goal)
+        while len(self.path) > 1 and np.linalg.norm(self.path[0] - xy) < self.lookahead:
+            self.path.pop(0)
+        if not self.path:
+            return list(goal)
+        target = self.path[0]
+
+        return [float(target[0]), float(target[1]), goal[2]]
+
+
+def footprint(fov: float, distance: float) -> float:
+    """
+    相机在观测距离处的视野宽度(m)
+
+    Args:
+        fov:水平视场角(度)
+        distance:相机到观测平面的距离(m)
+    """
+    return 2 * distance * math.tan(math.radians(fov) / 2)
+
+def sweep(bounds: tuple, spacing: float, step: float) -> list:
+    """
+    矩形区域的往复式覆盖路线: 沿x方向往返, 航线间距spacing, 航线上每隔step一个拍摄点
+
+    Args:
+        bounds:区域范围(x1, y1, x2, y2)
+    """
+    x1, y1, x2, y2 = bounds
+    lanes = max(int(math.ceil((y2 - y1) / spacing)), 1)
+    ys = np.minimum(y1 + spacing * (np.arange(lanes) + 0.5), y2)
+    count = max(int(math.ceil((x2 - x1) / step)), 1) + 1
+    xs = np.linspace(x1, x2, count)
+    points = []
+    for lane, y in enumerate(ys):
+        for x in (xs if lane % 2 == 0 else xs[::-1]):
+            points.append([float(x), float(y)])
+
+    return points
+
+def boustrophedon(center: list, half_size: float, spacing: float, step: float) -> list:
+    """
+    往复式(牛耕式)覆盖路线: 沿x方向往返, 航线间距spacing, 航线上每隔step一个拍摄点
+    """
+    return sweep((center[0] - half_size, center[1] - half_size, center[0] + half_size, center[1] + half_size),
+                 spacing, step)
+
+def split_area(bounds: tuple, n: int) -> list:
+    """
+    沿较长边将矩形区域等分为n个条带, 供多架无人机分别搜寻
+
+    Args:
+        bounds:区域范围(x1, y1, x2, y2)
+    Returns:
+        各条带范围(x1, y1, x2, y2)
+    """
+    if n < 1:
+        raise ValueError("区域数量必须为正整数")
+    x1, y1, x2, y2 = bounds
+    if x2 - x1 >= y2 - y1:
+        edges = np.linspace(x1, x2, n + 1)
+        return [(float(a), y1, float(b), y2) for a, b in zip(edges, edges[1:])]
+    edges = np.linspace(y1, y2, n + 1)
+
+    return [(x1, float(a), x2, float(b)) for a, b in zip(edges, edges[1:])]
+
+def spiral(center: list, half_size: float, spacing: float, step: float) -> list:
+    """
+    方形螺旋覆盖路线: 由中心向外, 每圈向外扩展spacing, 边上每隔step一个拍摄点
+    """
+    points = [[float(center[0]), float(center[1])]]
+    ring = spacing / 2
+    while ring - spacing / 2 < half_size:
+        radius = min(ring, half_size)
+        corners = [(radius, -radius), (radius, radius), (-radius, radius), (-radius, -radius), (radius, -radius)]
+        for (x0, y0), (x1, y1) in zip(corners, corners[1:]):
+            count = max(int(math.ceil(2 * radius / step)), 1)
+            for t in np.arange(1, count + 1) / count:
+                points.append([float(center[0] + x0 + (x1 - x0) * t), float(center[1] + y0 + (y1 - y0) * t)])
+        ring += spacing
+
+    return points
+
+def coverage_path(center: list, half_size: float, fov: float, distance: float, overlap: float=0.2,
+                  pattern: str="boustrophedon", z: float=-1.0) -> list:
+    """
+    按相机视野生成覆盖搜寻的拍摄点
+
+    Args:
+        center:搜寻区域中心
+        half_size:搜寻区域半边长(m)
+        fov:相机水平视场角(度)
+        distance:相机到观测平面的距离(m)
+        overlap:相邻拍摄点视野重叠比例
+        pattern:覆盖路线(boustrophedon/spiral)
+        z:飞行高度(NED)
+    Returns:
+        拍摄点NED坐标列表
+    """
+    spacing = footprint(fov, distance) * (1 - overlap)
+    step = distance * (1 - overlap)
+    if pattern == "boustrophedon":
+        points = boustrophedon(center, half_size, spacing, step)
+    elif pattern == "spiral":
+        points = spiral(center, half_size, spacing, step)
+    else:
+        raise ValueError(f"未知的覆盖路线: {pattern}")
+
+    return [[x, y, z] for x, y in points]
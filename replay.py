@@ -0,0 +1,359 @@
+"""
+传感器数据与大模型应答的录制和回放, 用于在相同任务数据上比较不同版本的性能
+
+录制目录结构:
+    index.jsonl 按发生顺序记录每次调用(类别、相对时间与数据位置)
+    camera_000.npy ... 相机帧分块(内存映射, 每块chunk_frames帧)
+    lidar_000.npy ... 点云分块(多帧点云拼接, 由index中的偏移定位)
+"""
+import os, json, time, asyncio, hashlib, threading, bisect
+import numpy as np
+from typing import Callable
+
+from drone import DroneState
+
+
+def _request_key(model: str, messages: list) -> str:
+    return hashlib.sha1(json.dumps([model, messages], ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+class Recorder:
+    """
+    录制器: 包装无人机后端与LLM实例, 将读取到的数据写入录制目录(可在多个线程中使用)
+    """
+    def __init__(self, path: str, chunk_frames: int=32, chunk_scans: int=256):
+        """
+        Args:
+            path:录制目录
+            chunk_frames:每个相机帧分块的帧数
+            chunk_scans:每个点云分块的扫描数
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.chunk_scans = chunk_scans
+        self.counts = {"state": 0, "camera": 0, "lidar": 0, "control": 0, "llm": 0}
+        self._index = open(os.path.join(path, "index.jsonl"), "w", encoding="utf-8")
+        self._camera = None # 当前相机帧分块(内存映射)
+        self._scans = [] # 当前点云分块中尚未写出的扫描
+        self._scan_offset = 0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def _write(self, record: dict):
+        # 调用方已持有锁
+        record["t"] = round(time.perf_counter() - self._start, 6)
+        self._index.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.counts[record["kind"]] += 1
+
+    def state(self, state: DroneState):
+        with self._lock:
+            self._write({"kind": "state", "pos": state.pos, "yaw": state.yaw, "velocity": state.velocity})
+
+    def camera(self, image: np.uint8):
+        with self._lock:
+            n = self.counts["camera"]
+            chunk, slot = divmod(n, self.chunk_frames)
+            if slot == 0:
+                if self._camera is not None:
+                    self._camera.flush()
+                self._camera = np.lib.format.open_memmap(os.path.join(self.path, f"camera_{chunk:03d}.npy"), mode="w+",
+                                                         dtype=np.uint8, shape=(self.chunk_frames, *image.shape))
+            self._camera[slot] = image
+            self._write({"kind": "camera", "chunk": chunk, "slot": slot})
+
+    def lidar(self, points: np.ndarray):
+        with self._lock:
+            chunk = self.counts["lidar"] // self.chunk_scans
+            points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+            self._scans.append(points)
+            self._write({"kind": "lidar", "chunk": chunk, "offset": self._scan_offset, "count": len(points)})
+            self._scan_offset += len(points)
+            if len(self._scans) == self.chunk_scans:
+                self._flush_scans(chunk)
+
+    def _flush_scans(self, chunk: int):
+        np.save(os.path.join(self.path, f"lidar_{chunk:03d}.npy"), np.concatenate(self._scans))
+        self._scans = []
+        self._scan_offset = 0
+
+    def control(self, command: str, *args):
+        with self._lock:
+            self._write({"kind": "control", "command": command, "args": [np.asarray(arg).tolist() for arg in args]})
+
+    def llm(self, model: str, messages: list, response: str, latency: float):
+        with self._lock:
+            self._write({"kind": "llm", "model": model, "key": _request_key(model, messages),
+                         "response": response, "latency": round(latency, 6)})
+
+    def wrap(self, client_factory: Callable) -> Callable:
+        """
+        包装无人机后端构造函数, 新建的连接读取的数据均被录制
+        """
+        return lambda: RecordingBackend(client_factory(), self)
+
+    def attach_llm(self, llm):
+        """
+        录制LLM实例的每次请求与应答
+        """
+        call_async, call = llm._call_llm_async, llm._call_llm
+
+        async def recorded_async() -> str:
+            messages, start = list(llm.messages), time.perf_counter()
+            output = await call_async()
+            self.llm(llm.model, messages, output, time.perf_counter() - start)
+            return output
+
+        def recorded() -> str:
+            messages, start = list(llm.messages), time.perf_counter()
+            output = call()
+            self.llm(llm.model, messages, output, time.perf_counter() - start)
+            return output
+
+        llm._call_llm_async, llm._call_llm = recorded_async, recorded
+
+    def close(self):
+        with self._lock:
+            if self._camera is not None:
+                self._camera.flush()
+                self._camera = None
+            if self._scans:
+                self._flush_scans(self.counts["lidar"] // self.chunk_scans)
+            self._index.close()
+
+
+class RecordingBackend:
+    """
+    录制包装后端: 转发调用至实际后端并录制结果
+    """
+    def __init__(self, backend, recorder: Recorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    def connect(self):
+        self.backend.connect()
+
+    def read_state(self) -> DroneState:
+        state = self.backend.read_state()
+        self.recorder.state(state)
+        return state
+
+    def read_image(self) -> np.uint8:
+        image = self.backend.read_image()
+        self.recorder.camera(image)
+        return image
+
+    def read_lidar(self) -> np.ndarray:
+        points = self.backend.read_lidar()
+        self.recorder.lidar(points)
+        return points
+
+    def move_to(self, pos: list, velocity: float, yaw: float):
+        self.recorder.control("move_to", pos, velocity, yaw)
+        self.backend.move_to(pos, velocity, yaw)
+
+    def hover(self):
+        self.recorder.control("hover")
+        self.backend.hover()
+
+    def take_off(self):
+        self.backend.take_off()
+
+    def land(self):
+        self.backend.land()
+
+
+class Recording:
+    """
+    录制数据读取(相机帧与点云按需从内存映射文件读取)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.records = {"state": [], "camera": [], "lidar": [], "control": [], "llm": []}
+        with open(os.path.join(path, "index.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    record["seq"] = len(self)
+                    self.records[record["kind"]].append(record)
+        self.times = {kind: [record["t"] for record in records] for kind, records in self.records.items()}
+        self.order = {kind: [record["seq"] for record in records] for kind, records in self.records.items()}
+        self._chunks = {}
+
+    def __len__(self) -> int:
+        """
+        记录总条数
+        """
+        return sum(len(records) for records in self.records.values())
+
+    @property
+    def duration(self) -> float:
+        return max((times[-1] for times in self.times.values() if times), default=0.0)
+
+    def _chunk(self, kind: str, chunk: int) -> np.ndarray:
+        key = (kind, chunk)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(os.path.join(self.path, f"{kind}_{chunk:03d}.npy"), mmap_mode="r")
+        return self._chunks[key]
+
+    def state(self, index: int) -> DroneState:
+        record = self.records["state"][index]
+        return DroneState(pos=list(record["pos"]), yaw=record["yaw"], velocity=list(record["velocity"]),
+                          timestamp=time.monotonic())
+
+    def camera(self, index: int) -> np.uint8:
+        """
+        Returns:
+            相机帧(内存映射的只读视图)
+        """
+        record = self.records["camera"][index]
+        return self._chunk("camera", record["chunk"])[record["slot"]]
+
+    def lidar(self, index: int) -> np.ndarray:
+        record = self.records["lidar"][index]
+        return np.asarray(self._chunk("lidar", record["chunk"])[record["offset"]:record["offset"] + record["count"]],
+                          dtype=float)
+
+    def frames(self):
+        """
+        按顺序遍历全部相机帧
+        """
+        for index in range(len(self.records["camera"])):
+            yield self.camera(index)
+
+
+class Player:
+    """
+    回放器: 作为无人机后端回放录制的传感器数据, 所有连接共享同一回放进度
+
+    realtime为False时以最快速度回放: 状态按录制顺序逐条返回, 相机帧与点云取录制顺序在下一条
+    状态之前的最新一条, 回放内容只取决于状态读取次数而与运行快慢无关。
+    realtime为True时按录制时间轴(乘以speed倍速)返回当时的最新数据。
+    """
+    def __init__(self, recording: Recording, realtime: bool=False, speed: float=1.0):
+        self.recording = recording
+        self.realtime = realtime
+        self.speed = speed
+        self.commands = [] # 回放期间收到的控制指令
+        self._state_index = -1
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def now(self) -> float:
+        """
+        当前回放位置(录制时间, s)
+        """
+        if self.realtime:
+            return (time.perf_counter() - self._start) * self.speed
+        if self._state_index < 0:
+            return self.recording.times["state"][0] if self.recording.times["state"] else 0.0
+
+        return self.recording.times["state"][self._state_index]
+
+    def _latest(self, kind: str) -> int:
+        if not self.recording.records[kind]:
+            raise EOFError(f"录制数据中没有{kind}")
+        if self.realtime:
+            return max(bisect.bisect_right(self.recording.times[kind], self.now()) - 1, 0)
+        states = self.recording.order["state"]
+        bound = states[self._state_index + 1] if self._state_index + 1 < len(states) else len(self.recording)
+
+        return max(bisect.bisect_left(self.recording.order[kind], bound) - 1, 0)
+
+    @property
+    def finished(self) -> bool:
+        if self.realtime:
+            return self.now() >= self.recording.duration
+        return self._state_index >= len(self.recording.records["state"]) - 1
+
+    def connect(self) -> "ReplayBackend":
+        return ReplayBackend(self)
+
+    def state(self) -> DroneState:
+        with self._lock:
+            if self.realtime:
+                return self.recording.state(self._latest("state"))
+            if self._state_index + 1 >= len(self.recording.records["state"]):
+                raise EOFError("录制的状态数据已回放完毕")
+            self._state_index += 1
+            return self.recording.state(self._state_index)
+
+    def camera(self) -> np.uint8:
+        with self._lock:
+            return np.array(self.recording.camera(self._latest("camera")))
+
+    def lidar(self) -> np.ndarray:
+        with self._lock:
+            return self.recording.lidar(self._latest("lidar"))
+
+    def control(self, command: str, *args):
+        with self._lock:
+            self.commands.append((command, *args))
+
+    def attach_llm(self, llm):
+        """
+        LLM实例改为返回录制的应答: 请求内容相同时返回对应应答, 否则按顺序返回该模型的下一条应答
+        """
+        records = [record for record in self.recording.records["llm"] if record["model"] == llm.model]
+        by_key = {}
+        for record in records:
+            by_key.setdefault(record["key"], []).append(record)
+        cursor = {"next": 0}
+
+        def lookup() -> dict:
+            matches = by_key.get(_request_key(llm.model, llm.messages))
+            if matches:
+                record = matches.pop(0) if len(matches) > 1 else matches[0]
+            else:
+                if cursor["next"] >= len(records):
+                    raise EOFError(f"录制数据中{llm.model}的应答已回放完毕")
+                record = records[cursor["next"]]
+                cursor["next"] += 1
+            llm.latencies.append(record["latency"] if self.realtime else 0.0)
+            return record
+
+        async def replayed_async() -> str:
+            record = lookup()
+            if self.realtime:
+                await asyncio.sleep(record["latency"] / self.speed)
+            return record["response"]
+
+        def replayed() -> str:
+            record = lookup()
+            if self.realtime:
+                time.sleep(record["latency"] / self.speed)
+            return record["response"]
+
+        llm._call_llm_async, llm._call_llm = replayed_async, replayed
+
+
+class ReplayBackend:
+    """
+    回放后端连接, 接口与AirSimBackend相同
+    """
+    def __init__(self, player: Player):
+        self.player = player
+
+    def connect(self):
+        pass
+
+    def read_state(self) -> DroneState:
+        return self.player.state()
+
+    def read_image(self) -> np.uint8:
+        return self.player.camera()
+
+    def read_lidar(self) -> np.ndarray:
+        return self.player.lidar()
+
+    def move_to(self, pos: list, velocity: float, yaw: float):
+        self.player.control("move_to", list(pos), velocity, yaw)
+
+    def hover(self):
+        self.player.control("hover")
+
+    def take_off(self):
+        self.player.control("take_off")
+
+    def land(self):
+        self.player.control("land")
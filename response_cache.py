@@ -0,0 +1,102 @@
+import time, shelve
+from collections import OrderedDict
+
+from vision import hamming
+
+
+class ResponseCache:
+    """
+    大模型回答缓存: 以提问内容加画面感知哈希为键, LRU+TTL淘汰, 可选落盘
+    """
+    def __init__(self, max_size: int=256, ttl: float | None=300.0, max_distance: int=0, path: str | None=None):
+        """
+        Args:
+            max_size:内存中最多缓存的条目数
+            ttl:条目有效期(s), None表示永久有效
+            max_distance:视为同一画面的最大哈希汉明距离
+            path:磁盘缓存文件路径(shelve), None表示仅使用内存
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries = OrderedDict() # (prompt, hash) -> (answer, 写入时间)
+        self._store = shelve.open(path) if path else None
+
+        self.hits = 0
+        self.near_hits = 0 # 命中的条目中哈希不完全相同的数量
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _lookup(self, prompt: str, key: int) -> str | None:
+        entry = self._entries.get((prompt, key))
+        if entry is not None:
+            if self._expired(entry[1]):
+                self._entries.pop((prompt, key), None)
+                return None
+            self._entries.move_to_end((prompt, key))
+            return entry[0]
+
+        if self._store is not None:
+            entry = self._store.get(f"{prompt}\0{key}")
+            # 先判断是否过期再载入, 载入时可能立即被LRU淘汰
+            if entry is not None and not self._expired(entry[1]):
+                self._insert((prompt, key), entry)
+                return entry[0]
+
+        return None
+
+    def get(self, prompt: str, key: int) -> str | None:
+        """
+        查找缓存回答, 未命中时返回None
+
+        Args:
+            prompt:提问内容
+            key:画面感知哈希
+        """
+        answer = self._lookup(prompt, key)
+        if answer is not None:
+            self.hits += 1
+            return answer
+
+        if self.max_distance > 0:
+            for (cached_prompt, cached_key), (cached_answer, created) in reversed(self._entries.items()):
+                if cached_prompt == prompt and hamming(cached_key, key) <= self.max_distance and not self._expired(created):
+                    self._entries.move_to_end((cached_prompt, cached_key))
+                    self.hits += 1
+                    self.near_hits += 1
+                    return cached_answer
+
+        self.misses += 1
+        return None
+
+    def _insert(self, item: tuple, entry: tuple):
+        # 写入内存并按LRU淘汰(从磁盘载入的条目同样受max_size限制)
+        self._entries[item] = entry
+        self._entries.move_to_end(item)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, prompt: str, key: int, answer: str):
+        entry = (answer, time.time())
+        self._insert((prompt, key), entry)
+        if self._store is not None:
+            self._store[f"{prompt}\0{key}"] = entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {"size": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
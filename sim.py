@@ -0,0 +1,264 @@
+"""
+进程内无人机运动学模拟器: 代替AirSim在无界面环境中运行完整任务循环
+
+用法: Drone(SimWorld.default().connect), 或在config中设置DRONE_BACKEND = "sim"
+"""
+import math, time, threading
+import numpy as np
+
+from config import CAMERA_FOV, CAMERA_SHAPE
+from drone import DroneState, Z_OFFSET
+
+
+PERSON_HEIGHT = 1.8 # 渲染人员的身高(m)
+PERSON_WIDTH = 0.6 # 渲染人员的宽度(m)
+
+
+class SimWorld:
+    """
+    模拟世界: 圆柱/方块障碍、人员与一架匀速运动的无人机, 所有连接共享同一状态
+    """
+    def __init__(self, circles: list=(), boxes: list=(), people: list=(), start: list=(0.0, 0.0, 0.0),
+                 time_scale: float=1.0, lidar_range: float=10.0, lidar_beams: int=360,
+                 camera_shape: tuple=CAMERA_SHAPE, fov: float=CAMERA_FOV, camera_frames: list | None=None,
+                 latency: float=0.0):
+        """
+        Args:
+            circles:圆柱障碍(x, y, 半径)
+            boxes:方块障碍(x1, y1, x2, y2)
+            people:人员位置(x, y)
+            start:无人机初始位置NED坐标
+            time_scale:模拟时间相对真实时间的倍速
+            lidar_range:激光雷达量程(m)
+            lidar_beams:激光雷达水平线数
+            camera_shape:相机图像形状(H, W, 3)
+            fov:相机水平视场角(度)
+            camera_frames:回放的相机图像序列, None表示按场景渲染
+            latency:每次调用模拟的RPC往返延迟(真实时间, s)
+        """
+        self.circles = np.asarray(circles, dtype=float).reshape(-1, 3)
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.people = np.asarray(people, dtype=float).reshape(-1, 2)
+        self.time_scale = time_scale
+        self.lidar_range = lidar_range
+        angles = np.linspace(0, 2 * math.pi, lidar_beams, endpoint=False)
+        self._beams = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        self.camera_shape = camera_shape
+        self.focal = camera_shape[1] / 2 / math.tan(math.radians(fov) / 2)
+        self.camera_frames = camera_frames
+        self.latency = latency
+
+        self.pos = np.array(start, dtype=float)
+        self.velocity = np.zeros(3)
+        self.yaw = 0.0
+        self.target = None # (目标位置, 速度)
+        self.collisions = 0 # 进入障碍物内部的次数
+        self.frames = 0 # 已输出的相机帧数
+        self._colliding = False
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._last = 0.0
+        self._background = self._render_background()
+
+    @classmethod
+    def default(cls, time_scale: float=1.0, origin: tuple=(0.0, 0.0)) -> "SimWorld":
+        """
+        与drone_node中导航点对应的默认场景
+
+        Args:
+            origin:无人机出生点在全局坐标中的位置(x, y), 场景平移到以出生点为原点的本地坐标(与AirSim多机一致)
+        """
+        ox, oy = origin
+        return cls(circles=[(x - ox, y - oy, r) for x, y, r in
+                            [(-20, 0.4, 1.0), (-30, -0.6, 0.8), (-47, -23, 1.5), (-60, -25, 1.2), (-82, -0.5, 1.0)]],
+                   boxes=[(x1 - ox, y1 - oy, x2 - ox, y2 - oy) for x1, y1, x2, y2 in
+                          [(-66, -15, -62, -12), (-92, 1.5, -88, 4)]],
+                   people=[(x - ox, y - oy) for x, y in [(-58, -50), (-68, 2.5), (-103, -1)]],
+                   start=(0, 0, -1), time_scale=time_scale)
+
+    def now(self) -> float:
+        """
+        模拟时间(s)
+        """
+        return (time.perf_counter() - self._start) * self.time_scale
+
+    def connect(self) -> "SimBackend":
+        return SimBackend(self)
+
+    def _advance(self):
+        # 调用方已持有锁: 按模拟时间推进无人机位置
+        now = self.now()
+        dt, self._last = now - self._last, now
+        if self.target is None or dt <= 0:
+            self.velocity = np.zeros(3)
+            return
+        target, speed = self.target
+        offset = target - self.pos
+        distance = np.linalg.norm(offset)
+        step = min(speed * dt, distance)
+        if distance > 0:
+            self.velocity = offset / distance * speed
+            self.pos = self.pos + offset / distance * step
+        if step >= distance:
+            self.target = None
+            self.velocity = np.zeros(3)
+
+        colliding = self.inside_obstacle(self.pos[:2])
+        if colliding and not self._colliding:
+            self.collisions += 1
+        self._colliding = colliding
+
+    def inside_obstacle(self, xy: np.ndarray) -> bool:
+        circles, boxes = self.circles, self.boxes
+        in_circle = np.any(np.hypot(circles[:, 0] - xy[0], circles[:, 1] - xy[1]) < circles[:, 2])
+        in_box = np.any((boxes[:, 0] < xy[0]) & (xy[0] < boxes[:, 2]) & (boxes[:, 1] < xy[1]) & (xy[1] < boxes[:, 3]))
+
+        return bool(in_circle or in_box)
+
+    def _raycast(self, origin: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            每条水平射线命中障碍的距离(未命中为inf)
+        """
+        beams = self._beams
+        hits = np.full(len(beams), np.inf)
+        if len(self.circles):
+            rel = origin - self.circles[:, :2]
+            b = beams @ rel.T
+            c = (rel ** 2).sum(axis=1) - self.circles[:, 2] ** 2
+            disc = b ** 2 - c
+            t = np.where(disc >= 0, -b - np.sqrt(np.maximum(disc, 0)), np.inf)
+            t = np.where(c < 0, 0.0, t)
+            hits = np.minimum(hits, np.where(t >= 0, t, np.inf).min(axis=1))
+        if len(self.boxes):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                inv = 1 / beams
+                t1 = (self.boxes[None, :, 0:2] - origin) * inv[:, None, :]
+                t2 = (self.boxes[None, :, 2:4] - origin) * inv[:, None, :]
+            near = np.nan_to_num(np.minimum(t1, t2), nan=-np.inf).max(axis=2)
+            far = np.nan_to_num(np.maximum(t1, t2), nan=np.inf).min(axis=2)
+            t = np.where((far >= np.maximum(near, 0)), np.maximum(near, 0), np.inf)
+            hits = np.minimum(hits, t.min(axis=1))
+
+        return hits
+
+    def _render_background(self) -> np.ndarray:
+        h, w, _ = self.camera_shape
+        image = np.empty(self.camera_shape, dtype=np.uint8)
+        image[:h // 2] = (235, 206, 135) # 天空(BGR)
+        image[h // 2:] = (90, 110, 100) # 地面
+
+        return image
+
+    def _render(self, pos: np.ndarray, yaw: float) -> np.ndarray:
+        """
+        针孔相机模型渲染人员矩形
+        """
+        image = self._background.copy()
+        h, w, _ = self.camera_shape
+        heading = math.radians(yaw)
+        forward = np.array([math.cos(heading), math.sin(heading)])
+        right = np.array([-math.sin(heading), math.cos(heading)])
+        camera_height = max(-pos[2], 0.0)
+        rel = self.people - pos[:2]
+        depth, lateral = rel @ forward, rel @ right
+        # 由远及近绘制
+        for index in np.argsort(-depth):
+            if depth[index] < 0.5:
+                continue
+            cx = w / 2 + self.focal * lateral[index] / depth[index]
+            half_width = self.focal * PERSON_WIDTH / 2 / depth[index]
+            feet = h / 2 + self.focal * camera_height / depth[index]
+            top = feet - self.focal * PERSON_HEIGHT / depth[index]
+            x1, x2 = int(max(cx - half_width, 0)), int(min(cx + half_width, w))
+            y1, y2 = int(max(top, 0)), int(min(feet, h))
+            if x1 < x2 and y1 < y2:
+                image[y1:y2, x1:x2] = (40, 60, 200)
+
+        return image
+
+    def state(self) -> DroneState:
+        with self._lock:
+            self._advance()
+            # 与AirSim后端保持一致的高度约定
+            return DroneState(pos=[float(self.pos[0]), float(self.pos[1]), float(self.pos[2] - Z_OFFSET)],
+                              yaw=self.yaw,
+                              velocity=self.velocity.tolist(),
+                              timestamp=time.monotonic())
+
+    def image(self) -> np.uint8:
+        with self._lock:
+            self._advance()
+            pos, yaw = self.pos.copy(), self.yaw
+            self.frames += 1
+            frames = self.frames
+        if self.camera_frames:
+            return np.asarray(self.camera_frames[(frames - 1) % len(self.camera_frames)])
+
+        return self._render(pos, yaw)
+
+    def lidar(self) -> np.ndarray:
+        """
+        Returns:
+            相对无人机的点云(与AirSim点云相同的坐标约定)
+        """
+        with self._lock:
+            self._advance()
+            origin = self.pos[:2].copy()
+        distance = self._raycast(origin)
+        hit = distance <= self.lidar_range
+        points = self._beams[hit] * distance[hit, None]
+
+        return np.hstack([points, np.full((len(points), 1), 0.5)])
+
+    def move_to(self, pos: list, velocity: float, yaw: float):
+        with self._lock:
+            self._advance()
+            self.target = (np.array(pos, dtype=float), velocity)
+            self.yaw = yaw
+
+    def hover(self):
+        with self._lock:
+            self._advance()
+            self.target = None
+
+
+class SimBackend:
+    """
+    模拟器后端连接, 接口与AirSimBackend相同
+    """
+    def __init__(self, world: SimWorld):
+        self.world = world
+
+    def _delay(self):
+        if self.world.latency > 0:
+            time.sleep(self.world.latency)
+
+    def connect(self):
+        pass
+
+    def read_state(self) -> DroneState:
+        self._delay()
+        return self.world.state()
+
+    def read_image(self) -> np.uint8:
+        self._delay()
+        return self.world.image()
+
+    def read_lidar(self) -> np.ndarray:
+        self._delay()
+        return self.world.lidar()
+
+    def move_to(self, pos: list, velocity: float, yaw: float):
+        self._delay()
+        self.world.move_to(pos, velocity, yaw)
+
+    def hover(self):
+        self._delay()
+        self.world.hover()
+
+    def take_off(self):
+        self.move_to(list(self.world.pos[:2]) + [-3.0], 1.0, self.world.yaw)
+
+    def land(self):
+        self.move_to(list(self.world.pos[:2]) + [0.0], 1.0, self.world.yaw)
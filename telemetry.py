@@ -0,0 +1,222 @@
+"""
+任务遥测: 计时区间(span)、计数器与采样值, 可写入JSONL轨迹文件并在任务结束后汇总
+
+汇总轨迹文件: python -m telemetry trace.jsonl
+"""
+import sys, json, time, asyncio, threading, functools
+import numpy as np
+from collections import defaultdict, deque
+
+
+class _Span:
+    __slots__ = ("telemetry", "name", "start")
+
+    def __init__(self, telemetry: "Telemetry", name: str):
+        self.telemetry = telemetry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Telemetry:
+    """
+    遥测记录器, 可在多个线程中使用
+    """
+    def __init__(self, path: str | None=None, window: int=2000, flush_size: int=256):
+        """
+        Args:
+            path:JSONL轨迹文件路径, None表示只在内存中统计
+            window:每个计时项保留的最近样本数
+            flush_size:轨迹缓冲达到该条数时写入文件
+        """
+        self.window = window
+        self.flush_size = flush_size
+        self.spans = defaultdict(lambda: deque(maxlen=window)) # 计时项 -> 最近耗时(s)
+        self.span_counts = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.gauges = defaultdict(lambda: deque(maxlen=window)) # 采样项 -> 最近采样值
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = None
+        if path is not None:
+            self.open(path)
+
+    def open(self, path: str):
+        """
+        开始写入轨迹文件(追加)
+        """
+        self.close()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _trace(self, kind: str, name: str, value: float):
+        # 调用方已持有锁
+        if self._file is None:
+            return
+        self._buffer.append((kind, name, value, time.time()))
+        if len(self._buffer) >= self.flush_size:
+            self._flush()
+
+    def _flush(self):
+        if self._file is None or not self._buffer:
+            return
+        self._file.write("".join(json.dumps({"k": kind, "n": name, "v": value, "t": round(t, 6)}) + "\n"
+                                 for kind, name, value, t in self._buffer))
+        self._file.flush()
+        self._buffer.clear()
+
+    def span(self, name: str) -> _Span:
+        """
+        计时区间, 用法: with telemetry.span("llm.call"): ...
+        """
+        return _Span(self, name)
+
+    def timed(self, name: str):
+        """
+        函数计时装饰器, 支持协程函数
+        """
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return func(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def record(self, name: str, duration: float):
+        """
+        记录一次耗时(s)
+        """
+        with self._lock:
+            self.spans[name].append(duration)
+            self.span_counts[name] += 1
+            self._trace("span", name, round(duration, 6))
+
+    def count(self, name: str, n: int=1):
+        """
+        计数器累加(如丢帧数)
+        """
+        with self._lock:
+            self.counters[name] += n
+            self._trace("count", name, n)
+
+    def gauge(self, name: str, value: float):
+        """
+        记录一次采样值(如队列长度)
+        """
+        with self._lock:
+            self.gauges[name].append(value)
+            self._trace("gauge", name, value)
+
+    async def sample_queues(self, queues: dict, interval: float=0.5):
+        """
+        周期性记录各队列长度
+
+        Args:
+            queues:名称 -> 具有qsize()的队列
+        """
+        while True:
+            for name, queue in queues.items():
+                self.gauge(f"queue.{name}", queue.qsize())
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:计时项耗时统计(ms)、计数器与采样值统计
+        """
+        with self._lock:
+            spans = {name: (self.span_counts[name], np.array(samples)) for name, samples in self.spans.items()}
+            gauges = {name: np.array(samples) for name, samples in self.gauges.items()}
+            counters = dict(self.counters)
+
+        return {"spans": {name: _summarize(samples * 1000, count) for name, (count, samples) in spans.items()},
+                "counters": counters,
+                "gauges": {name: _summarize(samples, len(samples)) for name, samples in gauges.items()}}
+
+    def report(self) -> str:
+        return format_stats(self.stats())
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _summarize(samples: np.ndarray, count: int) -> dict:
+    if len(samples) == 0:
+        return {"count": count, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+
+    return {"count": count,
+            "mean": float(samples.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(samples.max())}
+
+def format_stats(stats: dict) -> str:
+    """
+    将统计结果格式化为文本表格
+    """
+    lines = [f"{'计时项':<28}{'次数':>8}{'总计s':>10}{'平均ms':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'最大':>10}"]
+    for name, item in sorted(stats["spans"].items(), key=lambda kv: -kv[1]["mean"] * kv[1]["count"]):
+        lines.append(f"{name:<28}{item['count']:>8}{item['mean'] * item['count'] / 1000:>10.2f}{item['mean']:>10.2f}"
+                     f"{item['p50']:>10.2f}{item['p95']:>10.2f}{item['p99']:>10.2f}{item['max']:>10.2f}")
+    for name, value in sorted(stats["counters"].items()):
+        lines.append(f"{name:<28}{value:>8}")
+    for name, item in sorted(stats["gauges"].items()):
+        lines.append(f"{name:<28}{item['count']:>8} 平均{item['mean']:.2f} p95 {item['p95']:.2f} 最大{item['max']:.2f}")
+
+    return "\n".join(lines)
+
+def load_trace(path: str) -> dict:
+    """
+    读取JSONL轨迹文件并汇总为与Telemetry.stats相同格式的结果
+    """
+    spans, counters, gauges = defaultdict(list), defaultdict(int), defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item["k"] == "span":
+                spans[item["n"]].append(item["v"])
+            elif item["k"] == "count":
+                counters[item["n"]] += item["v"]
+            else:
+                gauges[item["n"]].append(item["v"])
+
+    return {"spans": {name: _summarize(np.array(samples) * 1000, len(samples)) for name, samples in spans.items()},
+            "counters": dict(counters),
+            "gauges": {name: _summarize(np.array(samples), len(samples)) for name, samples in gauges.items()}}
+
+
+_telemetry = Telemetry()
+
+def get_telemetry() -> Telemetry:
+    """
+    获取进程内共享的遥测记录器
+    """
+    return _telemetry
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python -m telemetry trace.jsonl")
+        sys.exit(1)
+    print(format_stats(load_trace(sys.argv[1])))
@@ -0,0 +1,82 @@
+import asyncio
+
+from action_executor import ActionExecutor
+
+
+class FakePerception:
+    def __init__(self):
+        self.stopped = 0
+
+    async def stop(self):
+        self.stopped += 1
+
+
+def make_executor(actions: dict, next_timeout: float | None=None) -> ActionExecutor:
+    return ActionExecutor(None, asyncio.Queue(), FakePerception(), actions.get, next_timeout)
+
+
+def test_executor_runs_until_release():
+    """依次执行动作直至动作返回True"""
+    log = []
+
+    async def broadcast(drone, feedback_queue, perception):
+        log.append("broadcast")
+        return False
+
+    async def seek_next(drone, feedback_queue, perception):
+        log.append("seek_next")
+        return True
+
+    async def run():
+        executor = make_executor({"broadcast": broadcast, "seek_next": seek_next})
+        action_queue = asyncio.Queue()
+        assert not await executor.poll(action_queue, 0)
+        action_queue.put_nowait("broadcast")
+        task = asyncio.create_task(executor.poll(action_queue, 0))
+        await asyncio.sleep(0.01)
+        action_queue.put_nowait("seek_next")
+        return await asyncio.wait_for(task, 1), executor.perception.stopped
+
+    assert asyncio.run(run()) == (True, 1)
+    assert log == ["broadcast", "seek_next"]
+
+def test_executor_preempts_running_action():
+    """新动作到达时取消正在执行的动作"""
+    log = []
+
+    async def seek(drone, feedback_queue, perception):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            log.append("seek cancelled")
+            raise
+
+    async def seek_next(drone, feedback_queue, perception):
+        log.append("seek_next")
+        return True
+
+    async def run():
+        executor = make_executor({"seek": seek, "seek_next": seek_next})
+        action_queue = asyncio.Queue()
+        action_queue.put_nowait("seek")
+        task = asyncio.create_task(executor.poll(action_queue, 0))
+        await asyncio.sleep(0.01)
+        assert executor.current == "seek"
+        action_queue.put_nowait("seek_next")
+        return await asyncio.wait_for(task, 1), executor.preempted
+
+    assert asyncio.run(run()) == (True, 1)
+    assert log == ["seek cancelled", "seek_next"]
+
+def test_executor_resumes_when_next_action_never_arrives():
+    """决策链中断(agent决策超时)后不再等待下一步动作, 恢复导航"""
+    async def broadcast(drone, feedback_queue, perception):
+        return False
+
+    async def run():
+        executor = make_executor({"broadcast": broadcast}, next_timeout=0.05)
+        action_queue = asyncio.Queue()
+        action_queue.put_nowait("broadcast")
+        return await asyncio.wait_for(executor.poll(action_queue, 0), 1), executor.current, executor.perception.stopped
+
+    assert asyncio.run(run()) == (False, None, 1)
@@ -0,0 +1,32 @@
+import pytest
+
+from action_lib import ACTIONS, action_prompt, parse_action
+from nodes.agent_node import parse_decision
+
+
+def test_registry_covers_actions():
+    assert list(ACTIONS) == ["seek", "moveto", "broadcast", "drop", "console", "seek_next"]
+    assert [name for name, item in ACTIONS.items() if item.resume] == ["seek_next"]
+    for item in ACTIONS.values():
+        assert item.description in action_prompt()
+
+@pytest.mark.parametrize("answer, action", [
+    ('{"action": "安抚被困人员"}', "console"),
+    ('```json\n{"action": "moveto"}\n```', "moveto"),
+    ("需要执行的操作是'在被困人员物品周围搜寻被困人员'", "seek"),
+    ("继续寻找其他被困人员", "seek_next"),
+    ('{"action": "未知"} 通知总部找到被困人员', "broadcast"),
+    ("不确定", None),
+    ("I think we should seek and moveto", None),
+])
+def test_parse_action(answer, action):
+    assert parse_action(answer) == action
+
+@pytest.mark.parametrize("answer, decision", [
+    ("没有, 无需安抚被困人员", (False, None)),
+    ('有 {"action": "安抚被困人员"}', (True, "console")),
+    ('{"action": "drop"}', (None, "drop")),
+])
+def test_parse_decision(answer, decision):
+    """否定回答中提到的操作不执行"""
+    assert parse_decision(answer) == decision
@@ -0,0 +1,57 @@
+import asyncio
+import numpy as np
+
+from frame_buffer import FrameRing
+import nodes.agent_node as agent_node
+
+
+def test_observe_timeout_retriages_static_scene(monkeypatch):
+    """大模型超时后同一静止画面在下一帧重新判断"""
+    calls = []
+
+    async def detect(agent, image):
+        return image, {"person", "background"}, [], ""
+
+    async def triage(agent, image, layout):
+        calls.append(image)
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(agent_node, "detect", detect)
+    monkeypatch.setattr(agent_node, "triage", triage)
+    agent = agent_node.create_agent(cache_path=None)
+    ring = FrameRing((36, 64, 3), 4)
+    reader = ring.reader()
+    image = np.full((36, 64, 3), 128, dtype=np.uint8)
+
+    async def run():
+        detected = {"background"}
+        for _ in range(2):
+            ring.write(image)
+            detected = await agent_node.observe(agent, reader, asyncio.Queue(), detected, asyncio.Queue())
+        return detected
+
+    assert asyncio.run(run()) == {"background"}
+    assert len(calls) == 2
+
+def test_triage_cache_misses_new_person_box(monkeypatch):
+    """画面哈希相同但出现新的人员检测框时不复用缓存结论"""
+    answers = []
+
+    async def call_async(prompt, image, timeout=None):
+        answers.append(prompt)
+        return "没有"
+
+    agent = agent_node.create_agent(cache_path=None)
+    monkeypatch.setattr(agent.small_llm, "call_async", call_async)
+    image = np.full((108, 192, 3), 128, dtype=np.uint8)
+    empty = agent_node.scene_layout({"background"}, [])
+    person = agent_node.scene_layout({"person", "background"}, [("person", 0.9, 100.0, 100.0, 160.0, 260.0)])
+
+    async def run():
+        return [await agent_node.triage(agent, image, empty),
+                await agent_node.triage(agent, image, empty),
+                await agent_node.triage(agent, image, person)]
+
+    assert asyncio.run(run()) == [False, False, False]
+    assert len(answers) == 2
+    assert agent.triage_cache.stats()["hits"] == 1
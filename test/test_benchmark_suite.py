@@ -0,0 +1,32 @@
+import json
+
+from benchmark.suite import compare, load_history, missing_optional
+
+
+def result(mean: float, p50: float, name: str="od.generate_od", points: int=1000) -> dict:
+    return {"name": name, "params": {"points": points}, "mean_ms": mean, "p50_ms": p50}
+
+def test_compare_flags_regression():
+    previous = result(1.0, 1.0)
+    assert compare(result(1.1, 1.1), previous, 0.2) is None
+    assert compare(result(1.5, 1.4), previous, 0.2) is not None
+    # 仅均值受单次抖动影响时不判定为退化
+    assert compare(result(2.0, 1.0), previous, 0.2) is None
+    assert compare(result(2.0, 2.0), None, 0.2) is None
+
+def test_load_history_keeps_latest(tmp_path):
+    path = tmp_path / "history.jsonl"
+    with open(path, "w") as f:
+        for item in (result(1.0, 1.0), result(2.0, 2.0, points=10000), result(3.0, 3.0)):
+            f.write(json.dumps(item) + "\n")
+    history = load_history(str(path))
+    assert len(history) == 2
+    assert sorted(item["mean_ms"] for item in history.values()) == [2.0, 3.0]
+
+def test_missing_optional_only_skips_third_party():
+    """只有缺少可选依赖或权重文件时跳过用例"""
+    assert missing_optional(ModuleNotFoundError("No module named 'ultralytics'", name="ultralytics"))
+    assert missing_optional(FileNotFoundError(2, "No such file", "models/yolo11n.pt"))
+    assert not missing_optional(ModuleNotFoundError("No module named 'httpx'", name="httpx"))
+    assert not missing_optional(ImportError("cannot import name 'x'", name="llm"))
+    assert not missing_optional(OSError("address in use"))
@@ -0,0 +1,37 @@
+import asyncio
+import numpy as np
+
+from frame_buffer import FrameRing
+from nodes.camera_node import fit_frame, main
+
+
+class Camera:
+    """依次返回给定图像的相机"""
+    def __init__(self, images: list):
+        self.images = images
+
+    async def take_photos_async(self):
+        return self.images.pop(0) if self.images else np.zeros((36, 64, 3), dtype=np.uint8)
+
+
+def test_fit_frame_resizes_and_drops():
+    assert fit_frame(np.zeros((72, 128, 3), dtype=np.uint8), (36, 64, 3)).shape == (36, 64, 3)
+    assert fit_frame(np.zeros((0, 0, 3), dtype=np.uint8), (36, 64, 3)) is None
+    assert fit_frame(np.zeros((36, 64, 4), dtype=np.uint8), (36, 64, 3)) is None
+
+def test_camera_loop_survives_resolution_change():
+    """分辨率变化与空图像不会终止相机循环"""
+    ring = FrameRing((36, 64, 3), 4)
+    camera = Camera([np.zeros((36, 64, 3), dtype=np.uint8),
+                     np.zeros((0, 0, 3), dtype=np.uint8),
+                     np.full((72, 128, 3), 200, dtype=np.uint8)])
+
+    async def run():
+        try:
+            await asyncio.wait_for(main(camera, ring, 0.001), 0.1)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    assert ring.latest().seq >= 2
+    assert ring.latest().image.shape == (36, 64, 3)
@@ -0,0 +1,102 @@
+import pytest
+import asyncio, threading
+import numpy as np
+
+from detector import InferenceWorker
+
+
+class FakeBoxes:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self
+
+    def __iter__(self):
+        return iter(self.boxes)
+
+
+class FakeBox:
+    def __init__(self, cls, conf, xyxy):
+        self.cls = np.array([cls])
+        self.conf = np.array([conf])
+        self.xyxy = np.array([xyxy], dtype=np.float32)
+
+
+class FakeResult:
+    names = {0: "person", 16: "dog"}
+
+    def __init__(self, boxes):
+        self.boxes = FakeBoxes(boxes)
+
+
+class FakeDetector:
+    """按图像像素值返回检测框, 并记录每次推理的批大小"""
+    def __init__(self):
+        self.batch_sizes = []
+        self.gate = threading.Event()
+
+    def __call__(self, images):
+        self.gate.wait()
+        self.batch_sizes.append(len(images))
+        return [FakeResult([FakeBox(int(image[0, 0, 0]), 0.9, [0, 0, 50, 200])]) for image in images]
+
+
+def test_worker_batches_pending_frames():
+    """同时等待的帧被合并为一次推理, 结果按帧返回"""
+    detector = FakeDetector()
+    worker = InferenceWorker(detector, max_batch=8)
+
+    async def run():
+        frames = [np.full((240, 320, 3), value, dtype=np.uint8) for value in (0, 16, 0)]
+        futures = [worker.submit(frame) for frame in frames]
+        detector.gate.set()
+        return await asyncio.gather(*futures)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        worker.close()
+
+    assert [detections.classes for detections in results] == [{"person"}, {"dog"}, {"person"}]
+    assert sum(detector.batch_sizes) == 3 and len(detector.batch_sizes) <= 2
+    assert worker.stats()["frames"] == 3
+
+def test_worker_propagates_errors():
+    """推理异常传递给等待方"""
+    def broken(images):
+        raise RuntimeError("boom")
+    worker = InferenceWorker(broken)
+
+    async def run():
+        return await worker.detect(np.zeros((8, 8, 3), dtype=np.uint8))
+
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+    finally:
+        worker.close()
+
+def test_worker_close_rejects_new_frames():
+    """关闭期间已排队的图像全部返回结果, 关闭开始后的提交被拒绝"""
+    detector = FakeDetector()
+    worker = InferenceWorker(detector, max_batch=1)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    async def run():
+        futures = [worker.submit(frame) for _ in range(3)]
+        # 推理线程阻塞在第一帧时开始关闭
+        closing = asyncio.get_running_loop().run_in_executor(None, worker.close)
+        await asyncio.sleep(0.05)
+        with pytest.raises(RuntimeError):
+            worker.submit(frame)
+        detector.gate.set()
+        await closing
+        return await asyncio.wait_for(asyncio.gather(*futures), 1)
+
+    results = asyncio.run(run())
+    assert [detections.classes for detections in results] == [{"person"}] * 3
+    assert not worker._queue.qsize()
@@ -0,0 +1,23 @@
+import numpy as np
+
+from fleet import Fleet
+
+
+def test_fleet_splits_area_in_local_frames():
+    """各无人机分到不重叠的条带, 导航点换算到以出生点为原点的本地坐标"""
+    fleet = Fleet(vehicles={"Drone1": (0.0, 0.0), "Drone2": (0.0, 4.0)}, area=(-100, -50, 0, 5), lane_spacing=10,
+                  backend="sim")
+    try:
+        first, second = fleet.members
+        assert first.area[2] == second.area[0]
+        assert first.agent.small_llm.pool is fleet.pool is second.agent.large_llm.pool
+        for member in fleet.members:
+            ox, oy = member.origin
+            world = np.array(member.way_points)[:, :2] + [ox, oy]
+            x1, y1, x2, y2 = member.area
+            assert np.all((world[:, 0] >= x1) & (world[:, 0] <= x2) & (world[:, 1] >= y1) & (world[:, 1] <= y2))
+        # 模拟场景同样平移到本地坐标
+        assert np.allclose(second.drone.client.world.people[0], [-58, -54])
+        assert fleet.stats()["drones"]["Drone2"]["legs"] == f"0/{len(second.way_points)}"
+    finally:
+        fleet.close()
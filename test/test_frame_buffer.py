@@ -0,0 +1,64 @@
+import pytest
+import asyncio
+import numpy as np
+
+from frame_buffer import FrameRing
+
+
+def test_frame_ring_latest_is_zero_copy_view():
+    """读取到的最新帧为缓冲区只读视图并带有序号"""
+    ring = FrameRing(slots=3)
+    assert ring.latest() is None
+    for value in range(5):
+        seq = ring.write(np.full((4, 6, 3), value, dtype=np.uint8))
+
+    frame = ring.latest()
+    assert frame.seq == seq == 4
+    assert frame.image[0, 0, 0] == 4
+    assert not frame.image.flags.writeable
+    assert np.shares_memory(frame.image, ring._frames)
+
+def test_frame_ring_detects_overwritten_frames():
+    """槽位被覆盖后视图失效"""
+    ring = FrameRing((2, 2, 3), slots=2)
+    ring.write(np.zeros((2, 2, 3), dtype=np.uint8))
+    frame = ring.latest()
+    ring.write(np.ones((2, 2, 3), dtype=np.uint8))
+    assert ring.valid(frame)
+    ring.write(np.ones((2, 2, 3), dtype=np.uint8))
+    assert not ring.valid(frame)
+
+def test_frame_ring_rejects_shape_mismatch():
+    ring = FrameRing((2, 2, 3))
+    with pytest.raises(ValueError):
+        ring.write(np.zeros((3, 2, 3), dtype=np.uint8))
+
+def test_frame_reader_waits_for_new_frame():
+    """读取游标只返回尚未读过的帧"""
+    ring = FrameRing((2, 2, 3))
+
+    async def run():
+        reader = ring.reader()
+        ring.write(np.zeros((2, 2, 3), dtype=np.uint8))
+        first = await reader.get()
+        pending = asyncio.ensure_future(reader.get())
+        await asyncio.sleep(0.02)
+        assert not pending.done()
+        ring.write(np.ones((2, 2, 3), dtype=np.uint8))
+        second = await asyncio.wait_for(pending, 1)
+        return first.seq, second.seq
+
+    assert asyncio.run(run()) == (0, 1)
+
+def test_frame_ring_shared_memory_attach():
+    """其他进程可通过共享内存名称连接缓冲区"""
+    ring = FrameRing((2, 2, 3), slots=2, shared=True)
+    try:
+        ring.write(np.full((2, 2, 3), 7, dtype=np.uint8))
+        other = FrameRing.attach(ring.name, (2, 2, 3), slots=2)
+        frame = other.latest()
+        assert (frame.seq, int(frame.image[1, 1, 2])) == (0, 7)
+        del frame
+        other.close()
+    finally:
+        ring.close()
@@ -0,0 +1,110 @@
+import io, time, base64, asyncio
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmark.mock_llm_server import MockLLMServer
+from llm import LLM, RequestPool, Role, aclose_clients, close_clients, encode_image, image_data_url
+
+
+def test_encode_image_resize_and_format():
+    """图像编码按长边缩放并输出对应格式"""
+    img = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    data = base64.b64decode(encode_image(img, fmt="JPEG", max_side=960))
+    image = Image.open(io.BytesIO(data))
+    assert image.format == "JPEG" and image.size == (960, 540)
+
+def test_image_data_url_cache():
+    """同一图像对象重复编码时复用缓存结果"""
+    img = np.zeros((64, 64, 3), dtype=np.uint8)
+    url = image_data_url(img, fmt="PNG")
+    assert url.startswith("data:image/png;base64,")
+    assert image_data_url(img, fmt="PNG") is url
+    assert image_data_url(img.copy(), fmt="PNG") is not url
+
+def test_llm_shared_client_reuses_connection():
+    """多次调用复用同一连接"""
+    with MockLLMServer("2") as server:
+        llm = LLM(model="mock", api_key="mock", base_url=server.base_url)
+        for _ in range(3):
+            assert llm.call("1+1等于几") == "2"
+        close_clients()
+        assert server.requests == 3 and server.connections == 1
+        assert llm.latency_stats()["calls"] == 3
+
+def test_llm_call_async_timeout_rolls_back():
+    """异步调用超时后撤回本次提问"""
+    async def run(llm):
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await llm.call_async("1+1等于几", timeout=0.05)
+            return len(llm.messages)
+        finally:
+            await aclose_clients()
+
+    with MockLLMServer("2", delay=0.5) as server:
+        llm = LLM(model="mock", api_key="mock", base_url=server.base_url)
+        assert asyncio.run(run(llm)) == 1
+
+def test_llm_call_async_timeout_restores_pruned_history():
+    """提问触发裁剪后超时, 被去除的图像与被丢弃的消息全部恢复"""
+    async def run(llm):
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await llm.call_async("问题2", url, timeout=0.05)
+        finally:
+            await aclose_clients()
+
+    url = "data:image/png;base64," + "A" * 1000
+    with MockLLMServer("2", delay=0.5) as server:
+        llm = LLM(model="mock", api_key="mock", base_url=server.base_url, max_messages=4, max_images=1, max_prompt_bytes=None)
+        for i in range(2):
+            llm._update_messages(Role.user, f"问题{i}", url)
+            llm._update_messages(Role.assistant, f"回答{i}")
+        before = [dict(message) for message in llm.messages]
+        asyncio.run(run(llm))
+        assert llm.messages == before
+        assert isinstance(llm.messages[3]["content"], list)
+
+def test_llm_prunes_old_images_and_messages():
+    """对话记录超出窗口时裁剪旧消息, 旧图像替换为文字摘要"""
+    llm = LLM(max_messages=4, max_images=1, max_prompt_bytes=None)
+    url = "data:image/png;base64," + "A" * 1000
+    for i in range(3):
+        llm._update_messages(Role.user, f"问题{i}", url)
+        llm._update_messages(Role.assistant, f"回答{i}")
+
+    assert len(llm.messages) == 5
+    assert llm.messages[1]["role"] == "user"
+    assert llm.messages[1]["content"] == "问题1[历史图像已省略, 当时回答: 回答1]"
+    assert isinstance(llm.messages[3]["content"], list)
+
+def test_llm_prompt_byte_budget():
+    """消息总字节数超出预算时优先去除旧图像"""
+    llm = LLM(max_messages=None, max_images=None, max_prompt_bytes=1500)
+    url = "data:image/png;base64," + "A" * 1000
+    llm._update_messages(Role.user, "问题0", url)
+    llm._update_messages(Role.assistant, "回答0")
+    llm._update_messages(Role.user, "问题1", url)
+
+    assert llm.prompt_bytes() <= 1500
+    assert isinstance(llm.messages[1]["content"], str)
+    assert isinstance(llm.messages[-1]["content"], list)
+
+def test_request_pool_limits_concurrency_and_rate():
+    """请求池限制同时进行的请求数与发送速率"""
+    pool = RequestPool(max_concurrency=2, rate=50)
+
+    async def request():
+        async with pool.slot():
+            await asyncio.sleep(0.02)
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(6)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    assert pool.requests == 6 and pool.max_in_flight == 2 and pool.in_flight == 0
+    # 6个请求间隔至少1/50s
+    assert elapsed >= 5 / 50
@@ -0,0 +1,44 @@
+import numpy as np
+
+from local_map import OccupancyGrid
+
+
+def wall(x: float, y0: float, y1: float, n: int=50) -> np.ndarray:
+    """相对坐标下x处的一段墙面点云"""
+    y = np.linspace(y0, y1, n)
+    return np.stack([np.full(n, x), y, np.full(n, 0.5)], axis=1)
+
+
+def test_integrate_marks_hits_and_clears_rays():
+    grid = OccupancyGrid(size=20, resolution=0.5)
+    grid.integrate([0, 0, -1], wall(3.0, -1, 1))
+
+    assert grid.is_occupied([3.1, 0.0])
+    assert not grid.is_occupied([1.5, 0.0])
+    occupied = grid.is_occupied(np.array([[3.1, 0.5], [-3.0, 0.0]]))
+    assert occupied.tolist() == [True, False]
+
+def test_points_outside_height_band_ignored():
+    grid = OccupancyGrid(size=20, resolution=0.5)
+    points = wall(3.0, -1, 1)
+    points[:, 2] = -2.0
+    grid.integrate([0, 0, -1], points)
+    assert not grid.occupied().any()
+
+def test_rolling_window_keeps_world_frame():
+    """栅格平移后障碍仍位于原世界坐标"""
+    grid = OccupancyGrid(size=20, resolution=0.5)
+    grid.integrate([0, 0, -1], wall(3.0, -1, 1))
+    grid.integrate([4, 0, -1], np.zeros((0, 3)))
+    assert grid.is_occupied([3.1, 0.0])
+
+    grid.integrate([40, 0, -1], np.zeros((0, 3)))
+    assert not grid.occupied().any()
+    assert grid.grid.shape == (40, 40)
+
+def test_obstacle_diagram_from_memory():
+    """记忆的障碍生成与实时点云一致方向的分布图"""
+    grid = OccupancyGrid(size=20, resolution=0.1)
+    grid.integrate([0, 0, -1], wall(1.0, -0.05, 0.05, n=5))
+    diagram = grid.obstacle_diagram([0, 0, -1], 1.2)
+    assert diagram[0] > 0 and diagram[36] == 0
@@ -0,0 +1,63 @@
+import asyncio
+import numpy as np
+
+from detector import Detections
+from frame_buffer import FrameRing
+from perception import Perception
+
+
+class FakeWorker:
+    async def detect(self, image):
+        return Detections(image, {"person"} if image[0, 0, 0] else set())
+
+
+def test_perception_streams_new_detections():
+    """订阅者只收到订阅时间之后拍摄的帧的检测结果"""
+    ring = FrameRing((4, 4, 3))
+
+    async def run():
+        perception = Perception(ring, FakeWorker())
+        ring.write(np.zeros((4, 4, 3), dtype=np.uint8))
+        stream = perception.subscribe(since=ring.latest().timestamp + 1e-3)
+        pending = asyncio.ensure_future(stream.get())
+        await asyncio.sleep(0.02)
+        assert not pending.done()
+        await asyncio.sleep(0.002)
+        ring.write(np.ones((4, 4, 3), dtype=np.uint8))
+        detections = await asyncio.wait_for(pending, 1)
+        await perception.stop()
+        return detections
+
+    detections = asyncio.run(run())
+    assert detections.classes == {"person"} and detections.seq == 1
+
+def test_perception_capture_single_frame():
+    """capture只识别一帧指定时间之后的图像, 不启动持续识别"""
+    ring = FrameRing((4, 4, 3))
+
+    async def run():
+        perception = Perception(ring, FakeWorker())
+        ring.write(np.zeros((4, 4, 3), dtype=np.uint8))
+        pending = asyncio.ensure_future(perception.capture(ring.latest().timestamp + 1e-3))
+        await asyncio.sleep(0.02)
+        ring.write(np.ones((4, 4, 3), dtype=np.uint8))
+        detections = await asyncio.wait_for(pending, 1)
+        return detections, perception.running
+
+    detections, running = asyncio.run(run())
+    assert detections.classes == {"person"} and detections.seq == 1 and not running
+
+def test_perception_hands_worker_a_copy():
+    """交给推理线程的图像不随缓冲区槽位被覆盖"""
+    ring = FrameRing((4, 4, 3), slots=2)
+
+    async def run():
+        perception = Perception(ring, FakeWorker())
+        ring.write(np.ones((4, 4, 3), dtype=np.uint8))
+        detections = await perception.capture()
+        for value in (2, 3):
+            ring.write(np.full((4, 4, 3), value, dtype=np.uint8))
+        return detections
+
+    detections = asyncio.run(run())
+    assert (detections.image == 1).all()
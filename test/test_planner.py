@@ -0,0 +1,103 @@
+import time, asyncio
+import pytest
+import numpy as np
+
+from local_map import OccupancyGrid
+from planner import PathPlanner, astar, coverage_path, footprint, inflate, line_of_sight, smooth, split_area, sweep
+
+
+def test_astar_routes_around_concave_obstacle():
+    """A*绕过U形障碍, 平滑后路径仍无碰撞"""
+    occupied = np.zeros((30, 30), dtype=bool)
+    occupied[10:20, 20] = True
+    occupied[10, 12:21] = True
+    occupied[19, 12:21] = True
+    path = astar(occupied, (15, 15), (15, 27))
+
+    assert path[0] == (15, 15) and path[-1] == (15, 27)
+    assert not any(occupied[cell] for cell in path)
+    smoothed = smooth(occupied, path)
+    assert len(smoothed) < len(path)
+    assert all(line_of_sight(occupied, a, b) for a, b in zip(smoothed, smoothed[1:]))
+
+def test_astar_no_path():
+    occupied = np.zeros((10, 10), dtype=bool)
+    occupied[:, 5] = True
+    assert astar(occupied, (0, 0), (0, 9)) is None
+
+def test_inflate_radius():
+    occupied = np.zeros((9, 9), dtype=bool)
+    occupied[4, 4] = True
+    inflated = inflate(occupied, 2)
+    assert inflated.sum() == 13 and inflated[4, 6] and not inflated[6, 6]
+
+def test_planner_replans_when_path_blocked():
+    """新障碍阻断剩余路径时需要重新规划"""
+    local_map = OccupancyGrid(size=20, resolution=0.25)
+    planner = PathPlanner(local_map, clearance=0.5)
+    planner.plan([0, 0, -1], [6, 0, -1])
+    assert not planner.blocked([0, 0, -1])
+
+    y = np.linspace(-2, 2, 40)
+    local_map.integrate([0, 0, -1], np.stack([np.full(40, 3.0), y, np.full(40, 0.5)], axis=1))
+    assert planner.blocked([0, 0, -1])
+
+    path = planner.plan([0, 0, -1], [6, 0, -1])
+    assert np.allclose(path[-1], [6, 0])
+    assert not planner.blocked([0, 0, -1])
+    assert planner.next_waypoint([0, 0, -1], [6, 0, -1])[2] == -1
+
+@pytest.mark.parametrize("pattern", ["boustrophedon", "spiral"])
+def test_coverage_path_covers_area(pattern):
+    """拍摄点视野覆盖整个搜寻区域"""
+    points = np.array(coverage_path([10, -5], 15, 90, 8, 0.2, pattern, z=-2))
+    assert np.all(points[:, 2] == -2)
+    assert np.all(np.abs(points[:, :2] - [10, -5]) <= 15 + 1e-6)
+
+    grid = np.stack(np.meshgrid(np.linspace(-5, 25, 31), np.linspace(-20, 10, 31)), axis=-1).reshape(-1, 2)
+    nearest = np.abs(grid[:, None, :] - points[None, :, :2]).max(axis=-1).min(axis=1)
+    assert nearest.max() <= footprint(90, 8) / 2
+
+def test_coverage_path_unknown_pattern():
+    with pytest.raises(ValueError):
+        coverage_path([0, 0], 10, 90, 8, pattern="zigzag")
+
+def test_split_area_strips():
+    """沿较长边等分区域, 各条带相接"""
+    strips = split_area((-100, -50, 0, 5), 2)
+    assert strips == [(-100.0, -50, -50.0, 5), (-50.0, -50, 0.0, 5)]
+    assert split_area((0, 0, 10, 30), 3)[1] == (0, 10.0, 10, 20.0)
+    with pytest.raises(ValueError):
+        split_area((0, 0, 1, 1), 0)
+
+def test_sweep_lanes_alternate():
+    """往复航线在区域内且相邻航线方向相反"""
+    points = np.array(sweep((0, 0, 20, 10), 5, 20))
+    assert len(points) == 4
+    assert points[0].tolist() == [0, 2.5] and points[1].tolist() == [20, 2.5]
+    assert points[2].tolist() == [20, 7.5] and points[3].tolist() == [0, 7.5]
+
+def test_astar_expansion_limit():
+    """终点不可达时扩展数受限, 提前返回None"""
+    occupied = np.zeros((100, 100), dtype=bool)
+    occupied[:, 50] = True
+    assert astar(occupied, (0, 0), (0, 99), max_expansions=100) is None
+    assert astar(np.zeros((100, 100), dtype=bool), (0, 0), (0, 99), max_expansions=1000) is not None
+
+def test_planner_failed_plan_cooldown():
+    """规划失败后冷却期内不重新规划, 异步规划与同步结果一致"""
+    local_map = OccupancyGrid(size=20, resolution=0.25)
+    planner = PathPlanner(local_map, clearance=0.5, replan_cooldown=0.05)
+    y = np.linspace(-10, 10, 200)
+    local_map.integrate([0, 0, -1], np.stack([np.full(200, 3.0), y, np.full(200, 0.5)], axis=1))
+
+    path = asyncio.run(planner.plan_async([0, 0, -1], [6, 0, -1]))
+    assert len(path) == 1 and planner.failures == 1
+    assert planner.blocked([0, 0, -1]) and planner.cooling_down([6, 0, -1])
+    assert not planner.cooling_down([0, 6, -1])
+    time.sleep(0.06)
+    assert not planner.cooling_down([6, 0, -1])
+
+    path = asyncio.run(planner.plan_async([0, 0, -1], [0, 6, -1]))
+    assert np.allclose(path[-1], [0, 6]) and not planner.cooling_down([0, 6, -1])
+    assert all(np.allclose(a, b) for a, b in zip(path, planner.plan([0, 0, -1], [0, 6, -1])))
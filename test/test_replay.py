@@ -0,0 +1,66 @@
+import asyncio
+import numpy as np
+
+from benchmark.mock_llm_server import MockLLMServer
+from drone import Drone
+from llm import LLM, close_clients
+from replay import Player, Recorder, Recording
+from sim import SimWorld
+
+
+def record_mission(path) -> list:
+    world = SimWorld(circles=[(4, 0, 1)], people=[(8, 1)], camera_shape=(36, 64, 3), start=(0, 0, -1), time_scale=20)
+    recorder = Recorder(str(path), chunk_frames=2, chunk_scans=2)
+    drone = Drone(recorder.wrap(world.connect))
+
+    async def run():
+        images, scans = [], []
+        for target in ([0, 2, -1], [1, 3, -1]):
+            await drone.move_to_pos(target, velocity=2.0, timeout=2.0)
+            images.append(await drone.take_photos_async())
+            scans.append(await drone.get_lidar_data_async())
+        return images, scans
+
+    images, scans = asyncio.run(run())
+    recorder.close()
+    return images, scans
+
+def test_replay_returns_recorded_sensor_data(tmp_path):
+    """以最快速度回放时, 相同的调用顺序得到与录制时相同的数据"""
+    images, scans = record_mission(tmp_path)
+    recording = Recording(str(tmp_path))
+    assert len(recording.records["camera"]) == 2 and len(recording.records["control"]) == 4
+    assert np.array_equal(recording.camera(1), images[1])
+
+    for _ in range(2):
+        player = Player(recording)
+        drone = Drone(player.connect)
+
+        async def run():
+            replayed_images, replayed_scans = [], []
+            for target in ([0, 2, -1], [1, 3, -1]):
+                await drone.move_to_pos(target, velocity=2.0, timeout=2.0)
+                replayed_images.append(await drone.take_photos_async())
+                replayed_scans.append(await drone.get_lidar_data_async())
+            return replayed_images, replayed_scans
+
+        replayed_images, replayed_scans = asyncio.run(run())
+        assert all(np.array_equal(a, b) for a, b in zip(images, replayed_images))
+        assert all(np.allclose(a, b, atol=1e-5) for a, b in zip(scans, replayed_scans))
+        assert [command[0] for command in player.commands] == ["move_to", "hover", "move_to", "hover"]
+        assert player.finished
+
+def test_replay_llm_responses(tmp_path):
+    """回放LLM应答时不发起网络请求, 相同请求返回录制的应答"""
+    recorder = Recorder(str(tmp_path))
+    with MockLLMServer("有") as server:
+        llm = LLM(base_url=server.base_url, api_key="test")
+        recorder.attach_llm(llm)
+        assert llm.call("附近是否有被困人员") == "有"
+        close_clients()
+    recorder.close()
+
+    llm = LLM(base_url="http://127.0.0.1:9", api_key="test")
+    Player(Recording(str(tmp_path))).attach_llm(llm)
+    assert asyncio.run(llm.call_async("附近是否有被困人员")) == "有"
+    assert asyncio.run(llm.call_async("其他问题")) == "有"
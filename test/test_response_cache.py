@@ -0,0 +1,67 @@
+import time
+
+from response_cache import ResponseCache
+
+
+def test_response_cache_lru_and_stats():
+    cache = ResponseCache(max_size=2)
+    cache.put("q", 1, "有")
+    cache.put("q", 2, "没有")
+    assert cache.get("q", 1) == "有"
+    cache.put("q", 3, "没有")
+
+    assert cache.get("q", 2) is None
+    assert cache.get("p", 1) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+
+def test_response_cache_near_match_and_ttl():
+    """汉明距离内的画面视为命中, 过期条目失效"""
+    cache = ResponseCache(max_distance=2, ttl=0.05)
+    cache.put("q", 0b1011, "有")
+    assert cache.get("q", 0b1000) == "有"
+    assert cache.get("q", 0b0100) is None
+    time.sleep(0.06)
+    assert cache.get("q", 0b1011) is None
+
+def test_response_cache_disk_store(tmp_path):
+    """磁盘缓存在重新创建后仍可命中"""
+    path = str(tmp_path / "triage")
+    cache = ResponseCache(path=path)
+    cache.put("q", 42, "没有")
+    cache.close()
+
+    cache = ResponseCache(path=path)
+    assert cache.get("q", 42) == "没有"
+    cache.close()
+
+def test_response_cache_store_respects_max_size(tmp_path):
+    """从磁盘载入的条目同样按LRU淘汰"""
+    path = str(tmp_path / "triage")
+    cache = ResponseCache(path=path)
+    for key in range(5):
+        cache.put("q", key, "有")
+    cache.close()
+
+    cache = ResponseCache(max_size=2, path=path)
+    for key in range(5):
+        assert cache.get("q", key) == "有"
+    assert cache.stats()["size"] == 2 and cache.evictions == 3
+    cache.close()
+
+def test_response_cache_store_expired_and_zero_size(tmp_path):
+    """max_size为0时仍可读取磁盘条目, 过期的磁盘条目不命中"""
+    path = str(tmp_path / "triage")
+    cache = ResponseCache(path=path)
+    cache.put("q", 1, "有")
+    cache.close()
+
+    cache = ResponseCache(max_size=0, path=path)
+    assert cache.get("q", 1) == "有"
+    assert cache.stats()["size"] == 0
+    cache.close()
+
+    cache = ResponseCache(ttl=0.01, path=path)
+    time.sleep(0.02)
+    assert cache.get("q", 1) is None
+    cache.close()
@@ -0,0 +1,47 @@
+import time, asyncio
+import numpy as np
+
+from drone import Drone
+from sim import SimWorld
+
+
+def test_lidar_hits_obstacles():
+    """合成点云命中圆柱与方块障碍的最近表面"""
+    world = SimWorld(circles=[(5, 0, 1)], boxes=[(-1, 3, 1, 4)], lidar_beams=4)
+    points = world.lidar()
+    assert np.allclose(points, [[4, 0, 0.5], [0, 3, 0.5]])
+
+def test_camera_renders_person_ahead():
+    world = SimWorld(people=[(10, 0)], start=(0, 0, -1), camera_shape=(108, 192, 3), fov=90)
+    image = world.image()
+    columns = np.where((image == (40, 60, 200)).all(axis=2).any(axis=0))[0]
+    assert abs((columns[0] + columns[-1]) / 2 - 96) <= 1
+    assert world.frames == 1
+
+def test_drone_flies_on_simulated_time():
+    """Drone通过模拟器后端移动, 倍速下比真实时间更快到达"""
+    world = SimWorld(start=(0, 0, -1), time_scale=20)
+    drone = Drone(world.connect)
+
+    async def run():
+        arrived = await drone.move_to_pos([5, 0, -1], velocity=2.0, timeout=2.0)
+        return arrived, await drone.get_pos_async(), await drone.get_lidar_data_async()
+
+    arrived, pos, lidar = asyncio.run(run())
+    assert arrived and np.allclose(pos, [5, 0, -1.5], atol=0.25)
+    assert world.now() < 20 * 2.0 and len(lidar) == 0
+    assert drone.rpc_counter["control"] == 2
+
+def test_drone_takes_off_and_lands():
+    """起飞与降落指令经后端转发至模拟器"""
+    world = SimWorld(start=(0, 0, -1), time_scale=50)
+    drone = Drone(world.connect)
+
+    drone.take_off()
+    time.sleep(0.2)
+    world.state()
+    assert np.isclose(world.pos[2], -3.0)
+    drone.land()
+    time.sleep(0.2)
+    world.state()
+    assert np.isclose(world.pos[2], 0.0)
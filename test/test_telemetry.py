@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from telemetry import Telemetry, load_trace
+
+
+def test_telemetry_stats_and_trace(tmp_path):
+    """内存统计与JSONL轨迹汇总结果一致"""
+    path = tmp_path / "trace.jsonl"
+    telemetry = Telemetry(str(path), flush_size=4)
+    for duration in (0.001, 0.002, 0.003, 0.004):
+        telemetry.record("rpc.state", duration)
+    with telemetry.span("yolo.filter"):
+        time.sleep(0.01)
+    telemetry.count("frames.dropped", 3)
+    telemetry.gauge("queue.action", 2)
+    stats = telemetry.stats()
+    telemetry.close()
+
+    assert stats["spans"]["rpc.state"]["count"] == 4
+    assert abs(stats["spans"]["rpc.state"]["mean"] - 2.5) < 1e-6
+    assert stats["spans"]["yolo.filter"]["mean"] >= 10
+    assert stats["counters"] == {"frames.dropped": 3}
+
+    trace = load_trace(str(path))
+    assert trace["spans"]["rpc.state"] == stats["spans"]["rpc.state"]
+    assert trace["counters"] == stats["counters"]
+    assert trace["gauges"]["queue.action"]["max"] == 2
+    assert "rpc.state" in telemetry.report()
+
+def test_telemetry_timed_coroutine():
+    telemetry = Telemetry()
+
+    @telemetry.timed("agent.triage")
+    async def triage():
+        await asyncio.sleep(0.01)
+        return True
+
+    assert asyncio.run(triage()) is True
+    assert telemetry.stats()["spans"]["agent.triage"]["count"] == 1
+
+def test_telemetry_overhead():
+    """单次计时开销足够小, 可在正式任务中常开"""
+    telemetry = Telemetry()
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        with telemetry.span("hot"):
+            pass
+    assert (time.perf_counter() - start) / n < 50e-6
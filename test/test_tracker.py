@@ -0,0 +1,46 @@
+import numpy as np
+
+from detector import Detections
+from tracker import Tracker, iou_matrix
+
+
+def frame(boxes: list, timestamp: float) -> Detections:
+    return Detections(None, {name for name, *_ in boxes}, boxes, timestamp=timestamp)
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    assert np.allclose(iou_matrix(a, b), [[1.0, 1 / 3, 0.0]])
+    assert iou_matrix(a, np.zeros((0, 4))).shape == (1, 0)
+
+def test_tracker_keeps_ids_for_moving_targets():
+    """移动中的目标保持编号, 新出现的人员获得新编号"""
+    tracker = Tracker(min_hits=2)
+    ids = []
+    for k in range(6):
+        boxes = [("person", 0.9, 100 + 10 * k, 100, 200 + 10 * k, 400)]
+        if k >= 3:
+            boxes.append(("person", 0.8, 1000, 200, 1100, 500))
+        tracks = tracker.update(frame(boxes, k * 0.1))
+        ids.append(sorted(track.id for track in tracks))
+        if k == 4:
+            assert [track.id for track in tracker.new] == [2]
+
+    assert ids == [[], [1], [1], [1], [1, 2], [1, 2]]
+    assert np.allclose(tracker.get(1).box, [150, 100, 250, 400], atol=5)
+    assert tracker.stats()["frames"] == 6
+
+def test_tracker_drops_lost_tracks_and_ignores_other_classes():
+    tracker = Tracker(min_hits=1, max_misses=2)
+    tracker.update(frame([("person", 0.9, 0, 0, 50, 100), ("car", 0.9, 0, 0, 50, 100)], 0.0))
+    assert [track.name for track in tracker.tracks] == ["person"]
+    for k in range(3):
+        tracker.update(frame([], 0.1 * (k + 1)))
+    assert tracker.tracks == []
+
+def test_tracker_estimates_world_position():
+    """画面中央高度对应1.8m人员的检测框, 估计位置位于正前方相应距离处"""
+    tracker = Tracker(min_hits=1, fov=90, image_width=1920)
+    height = 1.8 * 960 / 10 # 10m处
+    tracks = tracker.update(frame([("person", 0.9, 910, 300, 1010, 300 + height)], 0.0), ([5, 5, -1], 90.0))
+    assert np.allclose(tracks[0].world_pos, [5, 15], atol=1e-6)
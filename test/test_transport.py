@@ -0,0 +1,92 @@
+import time, asyncio, threading, multiprocessing
+import numpy as np
+import pytest
+
+from frame_buffer import Frame, FrameRing
+from transport import Channel, PipeTransport, accept, connect, decode, encode, listen, receive_frames
+
+
+@pytest.mark.parametrize("message", ["向前移动", {"action": "悬停", "args": [1, 2.5]}, None])
+def test_encode_roundtrip_messages(message):
+    head, payload = encode(message, 1.5)
+    assert decode(head, bytes(payload)) == (message, 1.5)
+
+def test_encode_roundtrip_arrays():
+    """数组与相机帧按原形状和类型还原"""
+    image = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    frame, _ = decode(*map(bytes, encode(Frame(7, 123.25, image))))
+    assert frame.seq == 7 and frame.timestamp == 123.25
+    assert np.array_equal(frame.image, image)
+
+    points = np.arange(12, dtype=np.float32).reshape(4, 3)[::2]
+    decoded, _ = decode(*map(bytes, encode(points)))
+    assert decoded.dtype == np.float32 and np.array_equal(decoded, points)
+
+def test_pipe_channel_keeps_order():
+    """管道通道按发送顺序交付消息并统计延迟"""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    inbox, outbox = Channel(PipeTransport(receiver), "test"), Channel(PipeTransport(sender), "test")
+
+    async def run():
+        for i in range(5):
+            await outbox.put(f"消息{i}")
+        return [await inbox.get() for _ in range(5)]
+
+    try:
+        assert asyncio.run(run()) == [f"消息{i}" for i in range(5)]
+        assert inbox.stats()["received"] == 5 and inbox.latencies
+    finally:
+        inbox.close()
+        outbox.close()
+
+def test_tcp_channel_frames_into_ring():
+    """TCP通道传输的相机帧写入本地缓冲区并保留拍摄时间"""
+    server = listen("127.0.0.1", 0)
+    port = server.getsockname()[1]
+    outbox = Channel(connect("127.0.0.1", port, timeout=5), "frames")
+    inbox = Channel(accept(server, 5), "frames")
+    ring = FrameRing((24, 32, 3), 4)
+    image = np.full((24, 32, 3), 9, dtype=np.uint8)
+
+    async def run():
+        task = asyncio.create_task(receive_frames(inbox, ring))
+        outbox.put_nowait(Frame(0, 100.0, image))
+        frame = await asyncio.wait_for(ring.get(), 5)
+        outbox.close()
+        with pytest.raises(EOFError):
+            await asyncio.wait_for(task, 5)
+        return frame
+
+    try:
+        frame = asyncio.run(run())
+        assert frame.timestamp == 100.0 and np.array_equal(frame.image, image)
+    finally:
+        inbox.close()
+        ring.close()
+
+def test_channel_drops_oldest_when_full():
+    """发送缓冲满时丢弃最旧的消息"""
+    class SlowTransport:
+        def __init__(self):
+            self.release = threading.Event()
+            self.sent = []
+
+        def send(self, head, payload):
+            self.release.wait(5)
+            self.sent.append(decode(head, bytes(payload))[0])
+
+        def close(self):
+            self.release.set()
+
+    transport = SlowTransport()
+    channel = Channel(transport, "frames", maxsize=1)
+    for i in range(4):
+        channel.put_nowait(i)
+    transport.release.set()
+    deadline = time.monotonic() + 5
+    while channel.sent + channel.dropped < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    channel.close()
+
+    assert channel.dropped >= 2
+    assert transport.sent[-1] == 3
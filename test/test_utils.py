@@ -0,0 +1,44 @@
+import time, asyncio
+import pytest
+import numpy as np
+
+from utils import LoopLagMonitor, check_queue, generate_od
+from benchmark.bench_od import generate_od_loop
+from benchmark.common import random_point_cloud
+
+
+@pytest.mark.parametrize("n", [0, 1, 500, 5000])
+def test_generate_od_matches_loop(n):
+    """向量化障碍分布图与逐点循环实现结果一致"""
+    lidar_data = random_point_cloud(n, seed=n, radius=2.0)
+    assert generate_od(lidar_data).tolist() == generate_od_loop(lidar_data)
+
+def test_generate_od_wraps_around():
+    """0度附近的障碍向两侧环形扩展"""
+    obstacle_diagram = generate_od(np.array([[1.0, 0.0, 0.5]]))
+    assert obstacle_diagram.sum() == 37
+    assert obstacle_diagram[0] == obstacle_diagram[18] == obstacle_diagram[54] == 1
+    assert obstacle_diagram[19] == obstacle_diagram[53] == 0
+
+def test_loop_lag_monitor_detects_blocking():
+    """阻塞调用导致的事件循环延迟可被记录"""
+    async def run():
+        monitor = LoopLagMonitor(interval=0.01)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        task.cancel()
+        return monitor.stats()
+
+    assert asyncio.run(run())["max_ms"] >= 80
+
+def test_check_queue_nowait():
+    """time为0时不等待直接返回"""
+    async def run():
+        queue = asyncio.Queue()
+        empty = await check_queue(queue, 0)
+        queue.put_nowait("seek")
+        return empty, await check_queue(queue, 0)
+
+    assert asyncio.run(run()) == (None, "seek")
@@ -0,0 +1,48 @@
+import numpy as np
+
+from vision import SceneGate, dhash, hamming
+
+
+def test_dhash_similar_frames():
+    """轻微噪声不改变感知哈希, 不同画面哈希差异较大"""
+    rng = np.random.default_rng(0)
+    scene = np.tile(np.linspace(0, 255, 320, dtype=np.float32), (240, 1))[..., None].repeat(3, axis=2)
+    scene[60:180, 100:160] = 0
+    noisy = np.clip(scene + rng.normal(0, 2, scene.shape), 0, 255)
+    other = scene[:, ::-1]
+
+    assert hamming(dhash(scene.astype(np.uint8)), dhash(noisy.astype(np.uint8))) <= 2
+    assert hamming(dhash(scene.astype(np.uint8)), dhash(other.astype(np.uint8))) > 16
+
+def test_scene_gate_skips_static_frames():
+    """静止画面被跳过, 画面变化后放行"""
+    rng = np.random.default_rng(1)
+    scene = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    gate = SceneGate(threshold=4.0)
+
+    assert gate.changed(scene)
+    assert not gate.changed(np.clip(scene.astype(int) + 1, 0, 255).astype(np.uint8))
+    assert gate.changed(255 - scene)
+    assert gate.skip_rate() == 1 / 3
+
+def test_scene_gate_passes_small_object():
+    """静止背景上出现人员大小的目标时放行, 传感器噪声被跳过"""
+    rng = np.random.default_rng(2)
+    background = np.clip(np.tile(np.linspace(60, 200, 1920), (1080, 1))[..., None] + rng.normal(0, 20, (1080, 1920, 1)), 0, 255)
+    scene = background.repeat(3, axis=2).astype(np.uint8)
+    noisy = np.clip(scene + rng.normal(0, 3, scene.shape), 0, 255).astype(np.uint8)
+    person = scene.copy()
+    person[500:620, 900:940] = np.clip(person[500:620, 900:940].astype(int) + 20, 0, 255)
+    gate = SceneGate(threshold=6.0)
+
+    assert gate.changed(scene)
+    assert not gate.changed(noisy)
+    assert gate.score(person) > 6.0
+    assert gate.changed(person)
+
+def test_scene_gate_forces_periodic_pass():
+    """连续跳过max_skips帧后强制放行"""
+    scene = np.full((72, 128, 3), 100, dtype=np.uint8)
+    gate = SceneGate(max_skips=2)
+
+    assert [gate.changed(scene) for _ in range(7)] == [True, False, False, True, False, False, True]
@@ -0,0 +1,217 @@
+import math, time, itertools
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+
+from config import CAMERA_FOV, CAMERA_SHAPE
+from detector import Detections
+from utils import cal_pos
+
+
+PERSON_HEIGHT = 1.8 # 人员身高假设(m), 用于由检测框高度估计距离
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    两组检测框(x1, y1, x2, y2)两两之间的交并比
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    a, b = a[:, None, :], b[None, :, :]
+    w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = w * h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class KalmanBox:
+    """
+    检测框匀速运动卡尔曼滤波, 状态为(cx, cy, w, h)及其速度(像素/s)
+    """
+    def __init__(self, box: np.ndarray, timestamp: float):
+        self.x = np.zeros(8)
+        self.x[:4] = self._to_state(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4, 1e4])
+        self.R = np.diag([10.0, 10.0, 20.0, 20.0])
+        self.timestamp = timestamp
+
+    @staticmethod
+    def _to_state(box: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = box
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    @property
+    def box(self) -> np.ndarray:
+        cx, cy, w, h = self.x[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+    def predict(self, timestamp: float) -> np.ndarray:
+        """
+        预测至timestamp时刻的检测框
+        """
+        dt = max(timestamp - self.timestamp, 0.0)
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        Q = np.diag([1.0, 1.0, 1.0, 1.0, 100.0, 100.0, 50.0, 50.0]) * max(dt, 1e-3)
+        self.x = F @ self.x
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+        self.P = F @ self.P @ F.T + Q
+        self.timestamp = timestamp
+
+        return self.box
+
+    def update(self, box: np.ndarray):
+        H = np.eye(4, 8)
+        S = H @ self.P @ H.T + self.R
+        K = self.P @ H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (self._to_state(box) - H @ self.x)
+        self.P = (np.eye(8) - K @ H) @ self.P
+
+
+@dataclass
+class Track:
+    """
+    目标跟踪轨迹
+    """
+    id: int # 轨迹编号(目标离开视野前保持不变)
+    name: str # 类别名
+    filter: KalmanBox
+    confidence: float
+    hits: int = 1 # 累计匹配次数
+    misses: int = 0 # 连续未匹配次数
+    last_seen: float = 0.0 # 最近一次匹配的帧拍摄时间(time.time)
+    world_pos: np.ndarray | None = field(default=None) # 估计的世界坐标(x, y)
+
+    @property
+    def box(self) -> np.ndarray:
+        """
+        平滑后的检测框(x1, y1, x2, y2)
+        """
+        return self.filter.box
+
+    @property
+    def height(self) -> float:
+        return float(self.filter.x[3])
+
+
+class Tracker:
+    """
+    SORT式多目标跟踪: 卡尔曼预测 + 交并比贪心匹配
+    """
+    def __init__(self, classes: tuple=("person",), iou_threshold: float=0.3, min_confidence: float=0.5,
+                 min_hits: int=2, max_misses: int=5, fov: float=CAMERA_FOV, image_width: int=CAMERA_SHAPE[1],
+                 smoothing: float=0.5, window: int=1000):
+        """
+        Args:
+            classes:跟踪的类别
+            iou_threshold:匹配所需的最小交并比
+            min_confidence:参与跟踪的最低置信度
+            min_hits:轨迹确认所需的匹配次数
+            max_misses:连续未匹配超过该次数时删除轨迹
+            fov:相机水平视场角(度)
+            image_width:图像宽度(像素)
+            smoothing:世界坐标估计的指数平滑系数(新观测权重)
+            window:耗时统计窗口帧数
+        """
+        self.classes = set(classes)
+        self.iou_threshold = iou_threshold
+        self.min_confidence = min_confidence
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.image_width = image_width
+        self.focal = image_width / 2 / math.tan(math.radians(fov) / 2)
+        self.smoothing = smoothing
+        self.tracks = []
+        self.new = [] # 最近一次更新中新确认的轨迹
+        self._ids = itertools.count(1)
+        self.costs = deque(maxlen=window) # 每帧跟踪耗时(s)
+
+    def locate(self, box: np.ndarray, pose: tuple) -> np.ndarray:
+        """
+        由检测框估计目标世界坐标(x, y)
+
+        Args:
+            pose:拍摄时无人机位置与朝向(度)
+        """
+        x1, y1, x2, y2 = box
+        offset = (x1 + x2) / 2 - self.image_width / 2
+        bearing = math.degrees(math.atan2(offset, self.focal))
+        distance = PERSON_HEIGHT * self.focal / max(y2 - y1, 1.0) * math.hypot(offset, self.focal) / self.focal
+        pos, yaw = pose
+
+        return cal_pos(pos, yaw + bearing, distance)[:2]
+
+    def update(self, detections: Detections, pose: tuple | None=None) -> list:
+        """
+        用一帧检测结果更新轨迹
+
+        Args:
+            pose:拍摄时无人机位置与朝向(度), 提供时更新轨迹的世界坐标估计
+        Returns:
+            已确认的轨迹列表
+        """
+        start = time.perf_counter()
+        timestamp = detections.timestamp or time.time()
+        boxes = [(name, conf, np.array(box)) for name, conf, *box in detections.boxes
+                 if name in self.classes and conf >= self.min_confidence]
+
+        predicted = np.array([track.filter.predict(timestamp) for track in self.tracks]).reshape(-1, 4)
+        measured = np.array([box for _, _, box in boxes]).reshape(-1, 4)
+        iou = iou_matrix(predicted, measured)
+        for t, track in enumerate(self.tracks):
+            iou[t, [d for d, (name, _, _) in enumerate(boxes) if name != track.name]] = 0
+
+        # 按交并比从大到小贪心匹配
+        matched_tracks, matched_boxes = set(), set()
+        for t, d in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[t, d] < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(d)
+            track = self.tracks[t]
+            track.filter.update(boxes[d][2])
+            track.confidence = boxes[d][1]
+            track.hits += 1
+            track.misses = 0
+            track.last_seen = timestamp
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+        for d, (name, conf, box) in enumerate(boxes):
+            if d not in matched_boxes:
+                self.tracks.append(Track(next(self._ids), name, KalmanBox(box, timestamp), conf, last_seen=timestamp))
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        confirmed = [track for track in self.tracks if track.hits >= self.min_hits and track.misses == 0]
+        self.new = [track for track in confirmed if track.hits == self.min_hits]
+        if pose is not None:
+            for track in confirmed:
+                estimate = self.locate(track.box, pose)
+                if track.world_pos is None:
+                    track.world_pos = estimate
+                else:
+                    track.world_pos = track.world_pos + (estimate - track.world_pos) * self.smoothing
+        self.costs.append(time.perf_counter() - start)
+
+        return confirmed
+
+    def get(self, track_id: int) -> Track | None:
+        return next((track for track in self.tracks if track.id == track_id), None)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:每帧跟踪耗时(ms)与当前轨迹数
+        """
+        costs = np.array(self.costs) * 1000 if self.costs else np.zeros(1)
+
+        return {"frames": len(self.costs),
+                "mean_ms": float(costs.mean()),
+                "p95_ms": float(np.percentile(costs, 95)),
+                "tracks": len(self.tracks)}
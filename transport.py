@@ -0,0 +1,340 @@
+"""
+节点间消息传输: 二进制消息编码, 管道/TCP连接, 以及与asyncio.Queue接口相同的跨进程队列
+
+消息由头部与数据两部分组成, 相机帧等数组的数据部分直接发送数组内存, 接收端用np.frombuffer零拷贝还原。
+"""
+import json, time, socket, struct, asyncio, threading
+import numpy as np
+from collections import deque
+
+from frame_buffer import Frame
+from telemetry import get_telemetry
+
+
+telemetry = get_telemetry()
+
+_HEADER = struct.Struct("!cd") # 消息类型, 发送时间(time.time)
+_ARRAY = struct.Struct("!8sB") # dtype, 维数(其后为各维长度)
+_FRAME = struct.Struct("!qd") # 帧序号, 拍摄时间
+_LENGTHS = struct.Struct("!II") # TCP分帧: 头部长度, 数据长度
+_CLOSED = object()
+
+
+def _encode_array(array: np.ndarray) -> tuple[bytes, memoryview]:
+    array = np.ascontiguousarray(array)
+    head = _ARRAY.pack(array.dtype.str.encode(), array.ndim) + struct.pack(f"!{array.ndim}q", *array.shape)
+
+    return head, array.reshape(-1).view(np.uint8).data
+
+def _decode_array(head: memoryview, payload) -> tuple[np.ndarray, int]:
+    dtype, ndim = _ARRAY.unpack_from(head)
+    shape = struct.unpack_from(f"!{ndim}q", head, _ARRAY.size)
+    array = np.frombuffer(payload, dtype=np.dtype(dtype.rstrip(b"\0").decode())).reshape(shape)
+
+    return array, _ARRAY.size + 8 * ndim
+
+def encode(obj, sent: float | None=None) -> tuple[bytes, bytes | memoryview]:
+    """
+    将消息编码为头部与数据两部分
+
+    支持Frame、numpy数组、字符串以及可JSON序列化的对象
+    Args:
+        sent:发送时间(time.time), 默认为当前时间
+    """
+    sent = time.time() if sent is None else sent
+    if isinstance(obj, Frame):
+        head, payload = _encode_array(obj.image)
+        return _HEADER.pack(b"F", sent) + _FRAME.pack(obj.seq, obj.timestamp) + head, payload
+    if isinstance(obj, np.ndarray):
+        head, payload = _encode_array(obj)
+        return _HEADER.pack(b"A", sent) + head, payload
+    if isinstance(obj, str):
+        return _HEADER.pack(b"S", sent), obj.encode()
+
+    return _HEADER.pack(b"J", sent), json.dumps(obj, ensure_ascii=False).encode()
+
+def decode(head: bytes, payload: bytes) -> tuple[object, float]:
+    """
+    Returns:
+        消息, 发送时间(time.time)
+    """
+    kind, sent = _HEADER.unpack_from(head)
+    head = memoryview(head)[_HEADER.size:]
+    if kind == b"F":
+        seq, timestamp = _FRAME.unpack_from(head)
+        image, _ = _decode_array(head[_FRAME.size:], payload)
+        return Frame(seq, timestamp, image), sent
+    if kind == b"A":
+        return _decode_array(head, payload)[0], sent
+    if kind == b"S":
+        return bytes(payload).decode(), sent
+    if kind == b"J":
+        return json.loads(bytes(payload)), sent
+    raise ValueError(f"未知的消息类型: {kind}")
+
+
+class PipeTransport:
+    """
+    multiprocessing管道连接(同一主机的进程之间)
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def send(self, head: bytes, payload):
+        # 头部与数据分两次写出, 避免为拼接再拷贝一次数组
+        self.connection.send_bytes(head)
+        self.connection.send_bytes(payload)
+
+    def recv(self) -> tuple[bytes, bytes]:
+        return self.connection.recv_bytes(), self.connection.recv_bytes()
+
+    def close(self):
+        self.connection.close()
+
+
+class SocketTransport:
+    """
+    TCP连接(可跨主机), 每条消息前附加头部与数据长度
+    """
+    def __init__(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+
+    def send(self, head: bytes, payload):
+        payload = memoryview(payload)
+        self.sock.sendall(_LENGTHS.pack(len(head), payload.nbytes) + head)
+        if payload.nbytes:
+            self.sock.sendall(payload)
+
+    def _read(self, size: int) -> bytearray:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        while view:
+            n = self.sock.recv_into(view)
+            if n == 0:
+                raise EOFError("连接已关闭")
+            view = view[n:]
+        return buffer
+
+    def recv(self) -> tuple[bytearray, bytearray]:
+        head_size, payload_size = _LENGTHS.unpack(self._read(_LENGTHS.size))
+
+        return self._read(head_size), self._read(payload_size)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def listen(host: str, port: int) -> socket.socket:
+    """
+    开始监听端口(接受连接前对端即可完成连接)
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen(1)
+
+    return server
+
+def accept(server: socket.socket, timeout: float | None=None) -> SocketTransport:
+    server.settimeout(timeout)
+    sock, _ = server.accept()
+    sock.settimeout(None)
+    server.close()
+
+    return SocketTransport(sock)
+
+def connect(host: str, port: int, timeout: float=30.0) -> SocketTransport:
+    """
+    连接对端, 对端尚未监听时在timeout内重试
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return SocketTransport(socket.create_connection((host, port)))
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+class Channel:
+    """
+    跨进程消息队列, 接口与asyncio.Queue相同(put/put_nowait/get/get_nowait/qsize/empty)
+
+    发送与接收各由一个后台线程完成, 编码、拷贝与阻塞写入均不占用事件循环。
+    maxsize大于0时发送缓冲满后丢弃最旧的消息(用于相机帧, 与FrameRing覆盖旧帧的语义一致)。
+    """
+    def __init__(self, transport, name: str="channel", maxsize: int=0, window: int=500):
+        """
+        Args:
+            transport:PipeTransport或SocketTransport
+            name:通道名(遥测计时项为transport.<name>)
+            maxsize:发送缓冲最大消息数, 0表示不限制
+            window:保留的延迟采样数量
+        """
+        self.transport = transport
+        self.name = name
+        self.maxsize = maxsize
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0 # 发送缓冲满时丢弃的消息数
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latencies = deque(maxlen=window) # 发送至接收端取得消息的延迟(s)
+        self.closed = False
+        self._outbox = deque()
+        self._cond = threading.Condition()
+        self._sender = None
+        self._receiver = None
+        self._inbox = None
+        self._loop = None
+        self._start = time.perf_counter()
+
+    def put_nowait(self, obj):
+        with self._cond:
+            if self.closed:
+                raise EOFError(f"通道{self.name}已关闭")
+            if self.maxsize and len(self._outbox) >= self.maxsize:
+                self._outbox.popleft()
+                self.dropped += 1
+                telemetry.count(f"transport.{self.name}.dropped")
+            self._outbox.append((obj, time.time()))
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_loop, name=f"send-{self.name}", daemon=True)
+                self._sender.start()
+            self._cond.notify()
+
+    async def put(self, obj):
+        self.put_nowait(obj)
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                while not self._outbox and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    return
+                obj, sent = self._outbox.popleft()
+            head, payload = encode(obj, sent)
+            try:
+                self.transport.send(head, payload)
+            except (OSError, EOFError):
+                self._close_local()
+                return
+            self.sent += 1
+            self.bytes_sent += len(head) + memoryview(payload).nbytes
+
+    def _start_receiver(self):
+        if self._receiver is None:
+            self._loop = asyncio.get_running_loop()
+            self._inbox = asyncio.Queue()
+            self._receiver = threading.Thread(target=self._recv_loop, name=f"recv-{self.name}", daemon=True)
+            self._receiver.start()
+
+    def _recv_loop(self):
+        while True:
+            try:
+                head, payload = self.transport.recv()
+            except (OSError, EOFError):
+                self._call(self._inbox.put_nowait, _CLOSED)
+                return
+            obj, sent = decode(head, payload)
+            self._call(self._deliver, obj, sent, len(head) + len(payload))
+
+    def _call(self, func, *args):
+        try:
+            self._loop.call_soon_threadsafe(func, *args)
+        except RuntimeError:
+            # 接收方的事件循环已关闭
+            pass
+
+    def _deliver(self, obj, sent: float, size: int):
+        latency = time.time() - sent
+        self.received += 1
+        self.bytes_received += size
+        self.latencies.append(latency)
+        telemetry.record(f"transport.{self.name}", latency)
+        self._inbox.put_nowait(obj)
+
+    def _check(self, item):
+        if item is _CLOSED:
+            # 保留关闭标记, 之后的读取同样失败
+            self._inbox.put_nowait(_CLOSED)
+            raise EOFError(f"通道{self.name}的对端已关闭")
+        return item
+
+    async def get(self):
+        self._start_receiver()
+        return self._check(await self._inbox.get())
+
+    def get_nowait(self):
+        self._start_receiver()
+        return self._check(self._inbox.get_nowait())
+
+    def qsize(self) -> int:
+        """
+        待发送与已接收未读取的消息数
+        """
+        return len(self._outbox) + (self._inbox.qsize() if self._inbox is not None else 0)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:消息数、吞吐量(条/s, MB/s)与传输延迟(ms)
+        """
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        messages = self.sent + self.received
+        size = self.bytes_sent + self.bytes_received
+
+        return {"sent": self.sent,
+                "received": self.received,
+                "dropped": self.dropped,
+                "msgs_per_s": messages / elapsed,
+                "mb_per_s": size / elapsed / 1e6,
+                "latency_mean_ms": float(latencies.mean()),
+                "latency_p95_ms": float(np.percentile(latencies, 95))}
+
+    def _close_local(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def close(self):
+        self._close_local()
+        self.transport.close()
+
+
+async def publish_frames(frames, channels: list):
+    """
+    将本地相机帧缓冲区的新帧发送到各通道
+
+    Args:
+        frames:FrameReader
+        channels:接收相机帧的通道
+    """
+    while True:
+        frame = await frames.get()
+        # 缓冲区中的视图会被之后的帧覆盖, 发送前拷贝
+        frame = Frame(frame.seq, frame.timestamp, np.array(frame.image))
+        for channel in channels:
+            channel.put_nowait(frame)
+
+async def receive_frames(channel: Channel, ring):
+    """
+    将通道收到的相机帧写入本地帧缓冲区(保留原拍摄时间)
+
+    Args:
+        ring:FrameRing
+    """
+    while True:
+        frame = await channel.get()
+        ring.write(frame.image, frame.timestamp)
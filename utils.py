@@ -1,17 +1,69 @@
 import asyncio
 import numpy as np
 import math
+from collections import deque
 
 async def check_queue(queue: asyncio.Queue, time: float=0.5) -> str | None:
     """
-    在限定时间内检查队列是否有输入
+    在限定时间内检查队列是否有输入(time不大于0时立即返回)
     """
+    if time <= 0:
+        try:
+            return queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
     try:
         message = await asyncio.wait_for(queue.get(), timeout=time)
         return message
     except asyncio.TimeoutError:
         return None
 
+class LoopLagMonitor:
+    """
+    事件循环延迟监测: 周期性休眠并记录实际唤醒时间超出预期的部分
+    """
+    def __init__(self, interval: float=0.05, window: int=1200):
+        """
+        Args:
+            interval:采样间隔(s)
+            window:保留的采样数量
+        """
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+
+    async def run(self, report_interval: float | None=None):
+        """
+        持续采样, 设置report_interval时定期打印统计结果
+        """
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            lag = max(0.0, now - start - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+            if report_interval is not None and now - last_report >= report_interval:
+                last_report = now
+                stats = self.stats()
+                print(f"事件循环延迟: 平均{stats['mean_ms']:.1f}ms p95 {stats['p95_ms']:.1f}ms 最大{stats['max_ms']:.1f}ms")
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict:延迟统计结果(单位ms)
+        """
+        if not self.samples:
+            return {"mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        samples = np.array(self.samples) * 1000
+
+        return {"mean_ms": float(samples.mean()),
+                "p95_ms": float(np.percentile(samples, 95)),
+                "max_ms": self.max_lag * 1000}
+
 def cal_pos(pos: list, direction: float, distance: float):
     """
     根据角度，相对距离计算坐标
@@ -44,4 +96,31 @@ def cal_angel_index(pos: list, range: int=5) -> int:
     angel = cal_angle([0, 0], [pos[0], pos[1]]) % (360)
     index = int(angel / range)
 
-    return index
\ No newline at end of file
+    return index
+
+def generate_od(lidar_data: np.ndarray, o_range: float=1.2, spread: int=18, bins: int=72) -> np.ndarray:
+    """
+    由点云数据生成障碍分布图(向量化实现)
+
+    Args:
+        lidar_data:点云数据(每行为一个点的NED坐标)
+        o_range:障碍物检测范围
+        spread:每个障碍点向左右两侧扩展的区间数
+        bins:角度区间数
+    Returns:
+        长度为bins的障碍分布图
+    """
+    lidar_data = np.asarray(lidar_data, dtype=np.float64).reshape(-1, 3)
+    x, y, z = lidar_data[:, 0], lidar_data[:, 1], lidar_data[:, 2]
+
+    # 距离与高度过滤
+    mask = (np.sqrt(x * x + y * y) < o_range) & (np.abs(z - 0.5) < 0.5)
+    angel = np.degrees(np.arctan2(y[mask], x[mask])) % 360
+    index = (angel / (360 / bins)).astype(np.int64) % bins
+
+    # 区间计数后做环形卷积完成角度扩展
+    counts = np.bincount(index, minlength=bins)
+    padded = np.concatenate((counts[bins - spread:], counts, counts[:spread]))
+    obstacle_diagram = np.convolve(padded, np.ones(2 * spread + 1, dtype=np.int64), mode="valid")
+
+    return obstacle_diagram
\ No newline at end of file
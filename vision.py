@@ -0,0 +1,94 @@
+import numpy as np
+
+
+def downsample(image: np.uint8, shape: tuple) -> np.ndarray:
+    """
+    按区域均值将图像缩小为灰度图
+
+    Args:
+        image:RGB/BGR或灰度图像
+        shape:输出形状(高, 宽)
+    Returns:
+        float32灰度图
+    """
+    image = np.asarray(image)
+    gray = image.mean(axis=2, dtype=np.float32) if image.ndim == 3 else image.astype(np.float32)
+    h, w = shape
+    bh, bw = gray.shape[0] // h, gray.shape[1] // w
+    if bh == 0 or bw == 0:
+        raise ValueError(f"图像尺寸{gray.shape}小于输出尺寸{shape}")
+    gray = gray[:bh * h, :bw * w]
+
+    return gray.reshape(h, bh, w, bw).mean(axis=(1, 3))
+
+def dhash(image: np.uint8, size: int=8) -> int:
+    """
+    差值感知哈希: 相似画面的哈希值汉明距离较小
+
+    Returns:
+        size*size位整数
+    """
+    small = downsample(image, (size, size + 1))
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SceneGate:
+    """
+    画面变化门控: 与上次放行的画面比较缩略灰度图, 变化不大时跳过后续识别
+
+    按缩略图各区块的最大灰度差判断, 画面中局部出现的小目标(如远处的人员)同样放行;
+    全局平均差会被大面积静止背景稀释。连续跳过max_skips帧后强制放行一次。
+    """
+    def __init__(self, threshold: float=6.0, shape: tuple=(36, 64), max_skips: int | None=10):
+        """
+        Args:
+            threshold:放行所需的区块最大灰度差(0-255)
+            shape:比较用缩略图尺寸(高, 宽), 1080p画面每个区块约30x30像素
+            max_skips:最多连续跳过的帧数, None表示不限制
+        """
+        self.threshold = threshold
+        self.shape = shape
+        self.max_skips = max_skips
+        self._reference = None
+        self._skips = 0 # 连续跳过的帧数
+        self.checked = 0
+        self.skipped = 0
+
+    def _difference(self, small: np.ndarray) -> float:
+        return float(np.abs(small - self._reference).max())
+
+    def score(self, image: np.uint8) -> float:
+        """
+        图像与参考画面的区块最大灰度差, 尚无参考画面时返回inf
+        """
+        if self._reference is None:
+            return float("inf")
+
+        return self._difference(downsample(image, self.shape))
+
+    def changed(self, image: np.uint8) -> bool:
+        """
+        判断画面是否有变化, 有变化时以该画面作为新的参考
+        """
+        self.checked += 1
+        small = downsample(image, self.shape)
+        if self._reference is not None and self._difference(small) <= self.threshold \
+                and (self.max_skips is None or self._skips < self.max_skips):
+            self._skips += 1
+            self.skipped += 1
+            return False
+        self._reference = small
+        self._skips = 0
+
+        return True
+
+    def reset(self):
+        self._reference = None
+
+    def skip_rate(self) -> float:
+        return self.skipped / self.checked if self.checked else 0.0